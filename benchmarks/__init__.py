@@ -0,0 +1,4 @@
+# benchmarks/__init__.py
+#
+# Бенчмарки запускаются как модули из корня проекта, например:
+#     python -m benchmarks.bench_stats
@@ -0,0 +1,182 @@
+# benchmarks/bench_e2e.py
+#
+# Сквозной нагрузочный прогон: настоящий Dispatcher из src/telegram/bot.py в режиме polling работает
+# против локальной замены Bot API (benchmarks/fake_api.py). Виртуальные пользователи одновременно
+# проходят /start и регистрацию, администратор листает списки и статистику. Каждый пользователь
+# отправляет следующее обновление, когда бот закончил обрабатывать предыдущее.
+# Результат: обновлений в секунду, p50/p99 задержки (от публикации в getUpdates до конца обработки)
+# и вызовы API на обновление (JSON).
+# Запуск: python -m benchmarks.bench_e2e [--users 1000] [--admin-rounds 20] [--seed-users 10000]
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from itertools import count
+
+# Настройки должны быть заданы до импорта модулей проекта
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="vpn-bench-"), "bench.db")
+ADMIN_ID = 10 ** 12  # ID виртуальных участников не пересекаются со сгенерированными пользователями
+os.environ["DB_PATH"] = DB_FILE
+os.environ["TELEGRAM_ADMIN_ID"] = str(ADMIN_ID)
+os.environ["TELEGRAM_MODE"] = "polling"
+os.environ.setdefault("APP_NAME", "bench")
+os.environ.setdefault("APP_VERSION", "0")
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_PATH", "")
+os.environ.setdefault("DB_SLOW_QUERY_MS", "0")
+# Виртуальные участники шлют обновления быстрее живых людей - ограничение частоты не измеряем
+os.environ.setdefault("THROTTLE_MESSAGE_RATE", "0")
+os.environ.setdefault("THROTTLE_CALLBACK_RATE", "0")
+
+from aiogram import BaseMiddleware  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from benchmarks.fake_api import FakeTelegramAPI  # noqa: E402
+from src.db.database import init_db  # noqa: E402
+from src.db.repositories import billing_repo  # noqa: E402
+from src.app import app  # noqa: E402
+
+STEP_TIMEOUT = 30  # Сколько ждать обработки одного обновления, сек
+
+_ids = count(1)
+
+
+def _user(user_id: int) -> dict:
+	return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+
+def message(user_id: int, text: str) -> dict:
+	return {"message": {"message_id": next(_ids), "date": int(time.time()), "chat": {"id": user_id, "type": "private"},
+	                    "from": _user(user_id), "text": text}}
+
+
+def callback(user_id: int, data: str) -> dict:
+	return {"callback_query": {"id": f"{user_id}:{next(_ids)}", "chat_instance": str(user_id), "data": data,
+	                           "from": _user(user_id),
+	                           "message": {"message_id": 1, "date": int(time.time()),
+	                                       "chat": {"id": user_id, "type": "private"}, "text": ""}}}
+
+
+def registration_script(user_id: int) -> list[dict]:
+	return [
+		message(user_id, "/start"),
+		callback(user_id, "register"),
+		message(user_id, f"user{user_id}"),
+		callback(user_id, "user_ok"),
+	]
+
+
+def admin_script(rounds: int, middle_id: int) -> list[dict]:
+	steps = []
+	for _ in range(rounds):
+		steps += [
+			message(ADMIN_ID, "/admin"),
+			callback(ADMIN_ID, "user_control"),
+			callback(ADMIN_ID, "user_list"),
+			callback(ADMIN_ID, f"user_list_next_{middle_id}"),
+			callback(ADMIN_ID, "admin_panel"),
+			callback(ADMIN_ID, "billing_control"),
+			callback(ADMIN_ID, "tx_list"),
+			callback(ADMIN_ID, f"tx_list_next_{middle_id}"),
+			callback(ADMIN_ID, "system_stats"),
+		]
+	return steps
+
+
+class CompletionMiddleware(BaseMiddleware):
+	"""Сообщает фейковому API, что обновление обработано (успешно или с ошибкой)"""
+
+	def __init__(self, api: FakeTelegramAPI):
+		self.api = api
+
+	async def __call__(self, handler, event, data):
+		try:
+			return await handler(event, data)
+		finally:
+			self.api.complete(event.update_id)
+
+
+async def play(api: FakeTelegramAPI, steps: list[dict], latencies: list[float]) -> int:
+	"""Отправляет обновления по одному, дожидаясь обработки; возвращает число необработанных за STEP_TIMEOUT"""
+	lost = 0
+	for update in steps:
+		try:
+			latencies.append(await asyncio.wait_for(api.publish(update), STEP_TIMEOUT))
+		except asyncio.TimeoutError:
+			lost += 1
+	return lost
+
+
+def percentile(values: list[float], q: float) -> float:
+	return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else (values[0] if values else 0.0)
+
+
+async def main(users: int, admin_rounds: int, seed_users: int) -> dict:
+	await init_db()
+	if seed_users:
+		seed(DB_FILE, users=seed_users, transactions=seed_users, registrations=0)
+		await billing_repo.rebuild_balances()
+
+	telegram_bot = app.telegram_bot
+	api = FakeTelegramAPI()
+	await api.start()
+	telegram_bot.use_session(AiohttpSession(api=TelegramAPIServer.from_base(api.base_url)))
+	telegram_bot.dp.update.outer_middleware(CompletionMiddleware(api))
+	polling = asyncio.create_task(telegram_bot.start_polling())
+
+	# Ждём, пока бот начнёт опрашивать getUpdates
+	while not api.calls["getUpdates"]:
+		await asyncio.sleep(0.05)
+
+	scripts = [registration_script(ADMIN_ID + 1 + i) for i in range(users)]
+	scripts.append(admin_script(admin_rounds, max(seed_users // 2, 1)))
+
+	latencies: list[float] = []
+	started = time.perf_counter()
+	lost = sum(await asyncio.gather(*(play(api, steps, latencies) for steps in scripts)))
+	elapsed = time.perf_counter() - started
+	updates = sum(len(steps) for steps in scripts)
+	# Только ответы участникам: рассылка (например, напоминания о подписке) идёт сгенерированным пользователям
+	reply_calls = sum(calls for chat_id, calls in api.replies.items() if chat_id >= ADMIN_ID)
+
+	await telegram_bot.dp.stop_polling()
+	await polling
+	await api.stop()
+
+	return {
+		"users": users,
+		"admin_rounds": admin_rounds,
+		"seed_users": seed_users,
+		"updates": updates,
+		"timed_out": lost,
+		"seconds": round(elapsed, 3),
+		"updates_per_sec": round(updates / elapsed, 1),
+		"latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+		"latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+		"api_calls_per_update": round(reply_calls / updates, 2),
+		"api_calls": dict(api.calls),
+	}
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Сквозной нагрузочный прогон бота против локального Bot API")
+	parser.add_argument("--users", type=int, default=1_000, help="Одновременно регистрирующихся пользователей")
+	parser.add_argument("--admin-rounds", type=int, default=20, help="Кругов просмотра списков администратором")
+	parser.add_argument("--seed-users", type=int, default=10_000, help="Пользователей и транзакций в базе до начала")
+	parser.add_argument("--output", help="Файл для JSON-результата (по умолчанию stdout)")
+	args = parser.parse_args()
+
+	result = json.dumps(asyncio.run(main(args.users, args.admin_rounds, args.seed_users)), ensure_ascii=False, indent=2)
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as file:
+			file.write(result)
+	else:
+		print(result, file=sys.stdout)
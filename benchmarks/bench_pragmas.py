@@ -0,0 +1,76 @@
+# benchmarks/bench_pragmas.py
+#
+# Сравнение скорости записи через billing_repo.add при разных профилях PRAGMA SQLite.
+# Каждый профиль запускается в отдельном процессе: настройки и движок создаются при импорте.
+# Запуск: python -m benchmarks.bench_pragmas [--rows 2000]
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROFILES = {
+	# Поведение SQLite по умолчанию (как до появления настроек)
+	"default": {"DB_JOURNAL_MODE": "DELETE", "DB_SYNCHRONOUS": "FULL", "DB_MMAP_SIZE": "0",
+	            "DB_CACHE_SIZE": "-2000", "DB_TEMP_STORE": "DEFAULT"},
+	"wal_full": {"DB_JOURNAL_MODE": "WAL", "DB_SYNCHRONOUS": "FULL"},
+	"wal_normal": {"DB_JOURNAL_MODE": "WAL", "DB_SYNCHRONOUS": "NORMAL"},
+	"wal_off": {"DB_JOURNAL_MODE": "WAL", "DB_SYNCHRONOUS": "OFF"},
+}
+
+
+async def run_profile(rows: int) -> dict:
+	from src.db.database import init_db
+	from src.db.repositories import billing_repo
+	from src.core.dto import TransactionAddDTO
+
+	await init_db()
+	now = datetime.now()
+	dto = TransactionAddDTO(user_id=1, amount=100, created_at=now, updated_at=now)
+
+	started = time.perf_counter()
+	for _ in range(rows):
+		await billing_repo.add(dto)
+	elapsed = time.perf_counter() - started
+	return {"rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1)}
+
+
+def spawn(profile: str, rows: int) -> dict:
+	env = dict(os.environ)
+	env.update(PROFILES[profile])
+	env["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="vpn-bench-"), "bench.db")
+	env.setdefault("APP_NAME", "bench")
+	env.setdefault("APP_VERSION", "0")
+	env.setdefault("TELEGRAM_TOKEN", "0:bench")
+	env.setdefault("TELEGRAM_ADMIN_ID", "0")
+	env["LOG_CONSOLE"] = "false"  # stdout дочернего процесса занят результатом
+	output = subprocess.run(
+		[sys.executable, "-m", "benchmarks.bench_pragmas", "--child", "--rows", str(rows)],
+		env=env, capture_output=True, text=True, check=True
+	).stdout
+	return json.loads(output.strip().splitlines()[-1])
+
+
+def main(rows: int):
+	print(f"{'profile':>12} | {'rows/sec':>10} | {'seconds':>8}")
+	for profile in PROFILES:
+		result = spawn(profile, rows)
+		print(f"{profile:>12} | {result['rows_per_sec']:>10} | {result['seconds']:>8}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Бенчмарк записи при разных профилях PRAGMA")
+	parser.add_argument("--rows", type=int, default=2_000)
+	parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.child:
+		# Логи проекта пишутся в stdout, поэтому результат печатается последней строкой
+		print(json.dumps(asyncio.run(run_profile(args.rows))))
+	else:
+		main(args.rows)
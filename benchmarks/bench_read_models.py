@@ -0,0 +1,69 @@
+# benchmarks/bench_read_models.py
+#
+# Сравнение путей чтения списков: ORM-объекты + DTO (get_page / get_page_with_user_name) против
+# лёгких строк (get_page_rows). Время и число выделенных байт в пересчёте на одну строку.
+# Запуск: python -m benchmarks.bench_read_models [--users 10000] [--transactions 100000] [--limit 1000]
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Настройки должны быть заданы до импорта модулей проекта
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="vpn-bench-"), "bench.db")
+os.environ["DB_PATH"] = DB_FILE
+os.environ.setdefault("APP_NAME", "bench")
+os.environ.setdefault("APP_VERSION", "0")
+os.environ.setdefault("TELEGRAM_TOKEN", "0:bench")
+os.environ.setdefault("TELEGRAM_ADMIN_ID", "0")
+
+from benchmarks.datagen import seed_users, seed_transactions  # noqa: E402
+from src.db.database import init_db  # noqa: E402
+from src.db.repositories import user_repo, billing_repo  # noqa: E402
+
+REPEATS = 5
+
+
+async def measure(read, limit: int) -> tuple[float, float]:
+	"""Лучшее время за REPEATS прогонов (мкс/строку) и память, занятая результатом (байт/строку)"""
+	timings = []
+	for _ in range(REPEATS):
+		started = time.perf_counter()
+		rows = await read(limit)
+		timings.append(time.perf_counter() - started)
+
+	tracemalloc.start()
+	rows = await read(limit)
+	allocated = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del rows
+	return min(timings) / limit * 1_000_000, allocated / limit
+
+
+async def main(users: int, transactions: int, limit: int):
+	await init_db()
+	seed_users(DB_FILE, users)
+	seed_transactions(DB_FILE, transactions, users)
+
+	cases = {
+		"users / dto": lambda n: user_repo.get_page(limit=n),
+		"users / rows": lambda n: user_repo.get_page_rows(limit=n),
+		"tx / dto": lambda n: billing_repo.get_page_with_user_name(limit=n),
+		"tx / rows": lambda n: billing_repo.get_page_rows(limit=n),
+	}
+	print(f"{'case':>14} | {'us/row':>8} | {'bytes/row':>9}")
+	for name, read in cases.items():
+		await read(limit)  # прогрев пула соединений и кэша запросов
+		per_row, allocated = await measure(read, limit)
+		print(f"{name:>14} | {per_row:>8.2f} | {allocated:>9.0f}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Бенчмарк путей чтения списков")
+	parser.add_argument("--users", type=int, default=10_000)
+	parser.add_argument("--transactions", type=int, default=100_000)
+	parser.add_argument("--limit", type=int, default=1_000)
+	args = parser.parse_args()
+	asyncio.run(main(args.users, args.transactions, args.limit))
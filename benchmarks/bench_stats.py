@@ -0,0 +1,62 @@
+# benchmarks/bench_stats.py
+#
+# Замер времени и пиковой памяти экрана статистики (cb_system_stats) на разных объёмах транзакций.
+# Запуск: python -m benchmarks.bench_stats [--scales 1000 10000 100000 1000000] [--users 1000]
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Настройки должны быть заданы до импорта модулей проекта
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="vpn-bench-"), "bench.db")
+os.environ["DB_PATH"] = DB_FILE
+os.environ.setdefault("APP_NAME", "bench")
+os.environ.setdefault("APP_VERSION", "0")
+os.environ.setdefault("TELEGRAM_TOKEN", "0:bench")
+os.environ.setdefault("TELEGRAM_ADMIN_ID", "0")
+
+from benchmarks.datagen import seed_users, seed_transactions  # noqa: E402
+from src.db.database import init_db  # noqa: E402
+from src.db.repositories import user_repo, billing_repo  # noqa: E402
+
+REPEATS = 5
+
+
+async def measure() -> tuple[float, int]:
+	timings = []
+	peak = 0
+	for _ in range(REPEATS):
+		tracemalloc.start()
+		started = time.perf_counter()
+		await user_repo.get_status_stats()
+		await billing_repo.get_stats()
+		timings.append(time.perf_counter() - started)
+		peak = max(peak, tracemalloc.get_traced_memory()[1])
+		tracemalloc.stop()
+	return min(timings), peak
+
+
+async def main(scales: list[int], users: int):
+	await init_db()
+	seed_users(DB_FILE, users)
+	await measure()  # прогрев пула соединений
+
+	print(f"{'transactions':>12} | {'latency, ms':>11} | {'peak mem, KiB':>13}")
+	seeded = 0
+	for scale in sorted(scales):
+		seed_transactions(DB_FILE, scale - seeded, users)
+		seeded = scale
+		await billing_repo.rebuild_balances()  # Данные вставлены в обход репозитория
+		latency, peak = await measure()
+		print(f"{scale:>12} | {latency * 1000:>11.2f} | {peak / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Бенчмарк экрана системной статистики")
+	parser.add_argument("--scales", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+	parser.add_argument("--users", type=int, default=1_000)
+	args = parser.parse_args()
+	asyncio.run(main(args.scales, args.users))
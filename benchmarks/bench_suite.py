@@ -0,0 +1,241 @@
+# benchmarks/bench_suite.py
+#
+# Замер всех операций AbstractRepository и основных хэндлеров на заполненной базе разного объёма.
+# Каждый объём прогоняется в отдельном процессе с собственной временной базой (настройки и движок
+# создаются при импорте). Результат - JSON, пригодный для сравнения между запусками.
+# Запуск: python -m benchmarks.bench_suite [--scales 10000 100000 1000000] [--repeats 5] [--output result.json]
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable
+
+ADMIN_ID = 1
+
+
+def summarize(timings: list[float]) -> dict:
+	timings = sorted(timings)
+	return {
+		"repeats": len(timings),
+		"min_ms": round(timings[0] * 1000, 3),
+		"median_ms": round(statistics.median(timings) * 1000, 3),
+		"mean_ms": round(statistics.fmean(timings) * 1000, 3),
+		"max_ms": round(timings[-1] * 1000, 3),
+	}
+
+
+async def timed(repeats: int, operation: Callable[[int], Awaitable]) -> dict:
+	# operation получает номер повтора - чтобы добавлять/удалять разные записи
+	timings = []
+	for attempt in range(repeats):
+		started = time.perf_counter()
+		await operation(attempt)
+		timings.append(time.perf_counter() - started)
+	return summarize(timings)
+
+
+async def bench_repositories(scale: int, repeats: int, skip: set[str]) -> dict:
+	from src.core.dto import (UserAddDTO, UserUpdateDTO, TransactionAddDTO, TransactionUpdateDTO,
+	                          RegistrationAddDTO, RegistrationUpdateDTO)
+	from src.db.repositories import user_repo, billing_repo, registration_repo
+
+	today = date.today()
+	now = datetime.now()
+	middle = scale // 2
+	# Новые ID - за пределами сгенерированных (пользователи 1..scale, заявки scale+1..2*scale)
+	fresh = 10 * scale
+
+	def new_user(user_id: int) -> UserAddDTO:
+		return UserAddDTO(id=user_id, name=f"bench{user_id}", billing_start_date=today,
+		                  billing_end_date=today + timedelta(days=30), blocked=False)
+
+	def new_tx(attempt: int) -> TransactionAddDTO:
+		return TransactionAddDTO(user_id=1 + attempt, amount=100, created_at=now, updated_at=now)
+
+	def new_registration(user_id: int) -> RegistrationAddDTO:
+		return RegistrationAddDTO(id=user_id, name=f"bench{user_id}")
+
+	added_tx_ids = []
+
+	async def add_tx(attempt):
+		added_tx_ids.append(await billing_repo.add(new_tx(attempt)))
+
+	cases = {
+		"user_repo": {
+			"add": lambda i: user_repo.add(new_user(fresh + i)),
+			"add_many": lambda i: user_repo.add_many([new_user(fresh + 1000 * (i + 1) + j) for j in range(1000)]),
+			"upsert_many": lambda i: user_repo.upsert_many([new_user(middle + j) for j in range(1000)]),
+			"update": lambda i: user_repo.update(middle + i, UserUpdateDTO(blocked=bool(i % 2))),
+			"get_by_id": lambda i: user_repo.get_by_id(1 + (middle + 7919 * i) % scale),
+			"get_many_by_ids": lambda i: user_repo.get_many_by_ids(range(middle + 500 * i, middle + 500 * (i + 1))),
+			"get_page_first": lambda i: user_repo.get_page(limit=21),
+			"get_page_middle": lambda i: user_repo.get_page(after_id=middle, limit=21),
+			"count_query": lambda i: user_repo._count_query(),
+			"count_cached": lambda i: user_repo.count(),
+			"get_all": lambda i: user_repo.get_all(),
+			"delete": lambda i: user_repo.delete(fresh + i),
+		},
+		"billing_repo": {
+			"add": add_tx,
+			"add_many": lambda i: billing_repo.add_many([new_tx(j) for j in range(1000)]),
+			"update": lambda i: billing_repo.update(middle + i, TransactionUpdateDTO(amount=200 + i)),
+			"get_by_id": lambda i: billing_repo.get_by_id(1 + (middle + 7919 * i) % scale),
+			"get_many_by_ids": lambda i: billing_repo.get_many_by_ids(range(middle + 500 * i, middle + 500 * (i + 1))),
+			"get_page_first": lambda i: billing_repo.get_page(limit=21),
+			"get_page_middle": lambda i: billing_repo.get_page(after_id=middle, limit=21),
+			"count_query": lambda i: billing_repo._count_query(),
+			"get_all": lambda i: billing_repo.get_all(),
+			"delete": lambda i: billing_repo.delete(added_tx_ids[i]),
+		},
+		"registration_repo": {
+			"add": lambda i: registration_repo.add(new_registration(fresh + i)),
+			"add_many": lambda i: registration_repo.add_many(
+				[new_registration(fresh + 1000 * (i + 1) + j) for j in range(1000)]),
+			"upsert_many": lambda i: registration_repo.upsert_many(
+				[new_registration(scale + middle + j) for j in range(1000)]),
+			"update": lambda i: registration_repo.update(scale + middle + i, RegistrationUpdateDTO(name=f"renamed{i}")),
+			"get_by_id": lambda i: registration_repo.get_by_id(scale + 1 + (middle + 7919 * i) % scale),
+			"get_page_middle": lambda i: registration_repo.get_page(after_id=scale + middle, limit=21),
+			"count_query": lambda i: registration_repo._count_query(),
+			"get_all": lambda i: registration_repo.get_all(),
+			"delete": lambda i: registration_repo.delete(fresh + i),
+		},
+	}
+
+	results = {}
+	for repo_name, operations in cases.items():
+		for operation_name, operation in operations.items():
+			if operation_name in skip:
+				continue
+			results[f"{repo_name}.{operation_name}"] = await timed(repeats, operation)
+	return results
+
+
+async def bench_handlers(scale: int, repeats: int) -> dict:
+	from src.app import app
+	from src.telegram.handlers.user_control import UserControlStates
+	from benchmarks.fake_bot import FakeSession, callback_update, message_update
+
+	telegram_bot = app.telegram_bot
+	session = FakeSession()
+	telegram_bot.use_session(session)
+	dp, bot = telegram_bot.dp, telegram_bot.bot
+	state = dp.fsm.get_context(bot, chat_id=ADMIN_ID, user_id=ADMIN_ID)
+	middle = scale // 2
+	update_ids = iter(range(1, 10 ** 9))
+
+	async def check_name(attempt: int):
+		# Состояние ввода имени готовится вне замера, как если бы админ уже ввёл ID
+		await state.set_state(UserControlStates.enter_user_name)
+		await state.update_data(user_id=20 * scale + attempt)
+		started = time.perf_counter()
+		await dp.feed_update(bot, message_update(next(update_ids), ADMIN_ID, f"handler{attempt}"))
+		return time.perf_counter() - started
+
+	async def feed(data: str):
+		await dp.feed_update(bot, callback_update(next(update_ids), ADMIN_ID, data))
+
+	cases = {
+		"show_tx_list": lambda i: feed("tx_list"),
+		"show_tx_list_middle": lambda i: feed(f"tx_list_next_{middle}"),
+		"cb_user_list": lambda i: feed("user_list"),
+		"cb_user_list_middle": lambda i: feed(f"user_list_next_{middle}"),
+		"cb_system_stats": lambda i: feed("system_stats"),
+	}
+
+	results = {}
+	for name, operation in cases.items():
+		session.calls.clear()
+		results[name] = await timed(repeats, operation)
+		results[name]["api_calls_per_update"] = round(sum(session.calls.values()) / repeats, 2)
+
+	session.calls.clear()
+	timings = [await check_name(attempt) for attempt in range(repeats)]
+	results["check_name"] = summarize(timings)
+	results["check_name"]["api_calls_per_update"] = round(sum(session.calls.values()) / repeats, 2)
+	return results
+
+
+async def run_scale(scale: int, repeats: int, skip: set[str]) -> dict:
+	from src.core.config import settings
+	from src.db.database import init_db
+	from src.db.repositories import billing_repo
+	from benchmarks.datagen import seed
+
+	await init_db()
+	started = time.perf_counter()
+	seed(settings.DB_PATH, users=scale, transactions=scale, registrations=scale)
+	await billing_repo.rebuild_balances()  # Транзакции вставлены в обход репозитория
+	seed_seconds = time.perf_counter() - started
+
+	return {
+		"scale": scale,
+		"seed_seconds": round(seed_seconds, 3),
+		"repositories": await bench_repositories(scale, repeats, skip),
+		"handlers": await bench_handlers(scale, repeats),
+	}
+
+
+def spawn(scale: int, repeats: int, skip: list[str]) -> dict:
+	env = dict(os.environ)
+	env["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="vpn-bench-"), "bench.db")
+	env.setdefault("APP_NAME", "bench")
+	env.setdefault("APP_VERSION", "0")
+	env.setdefault("TELEGRAM_TOKEN", "0:bench")
+	env["TELEGRAM_ADMIN_ID"] = str(ADMIN_ID)
+	env["LOG_CONSOLE"] = "false"  # stdout дочернего процесса занят результатом
+	env["LOG_PATH"] = ""
+	env["DB_SLOW_QUERY_MS"] = "0"
+	command = [sys.executable, "-m", "benchmarks.bench_suite", "--child", "--scales", str(scale),
+	           "--repeats", str(repeats)]
+	if skip:
+		command += ["--skip", *skip]
+	output = subprocess.run(command, env=env, stdout=subprocess.PIPE, text=True, check=True).stdout
+	return json.loads(output.strip().splitlines()[-1])
+
+
+def main(scales: list[int], repeats: int, skip: list[str], output: str | None):
+	report = {
+		"meta": {
+			"started_at": datetime.now().isoformat(timespec="seconds"),
+			"python": platform.python_version(),
+			"sqlite": sqlite3.sqlite_version,
+			"platform": platform.platform(),
+			"repeats": repeats,
+		},
+		"results": [],
+	}
+	for scale in sorted(scales):
+		print(f"Объём {scale}...", file=sys.stderr)
+		report["results"].append(spawn(scale, repeats, skip))
+
+	text = json.dumps(report, ensure_ascii=False, indent=2)
+	if output:
+		with open(output, "w", encoding="utf-8") as file:
+			file.write(text)
+	else:
+		print(text)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Бенчмарк репозиториев и хэндлеров на больших базах")
+	parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+	parser.add_argument("--repeats", type=int, default=5)
+	parser.add_argument("--skip", nargs="*", default=[], help="Пропустить операции, например get_all")
+	parser.add_argument("--output", help="Файл для JSON-результата (по умолчанию stdout)")
+	parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.child:
+		print(json.dumps(asyncio.run(run_scale(args.scales[0], args.repeats, set(args.skip)))))
+	else:
+		main(args.scales, args.repeats, args.skip, args.output)
@@ -0,0 +1,84 @@
+# benchmarks/check_import_time.py
+#
+# Проверка бюджета времени импорта. Каждый модуль импортируется в чистом процессе (python -X importtime),
+# берётся лучшее из нескольких запусков. Дополнительно проверяется, что импорт не имеет побочных
+# эффектов: не читает настройки, не создаёт движок БД и не тянет aiogram (кроме самого бота).
+# Код возврата 1, если бюджет превышен или найден побочный эффект - можно запускать в CI.
+# Запуск: python -m benchmarks.check_import_time [--runs 3] [--factor 1.0]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Модуль -> (бюджет, мс; можно ли импортировать aiogram)
+BUDGETS: dict[str, tuple[float, bool]] = {
+	"src.core.config": (400, False),
+	"src.db.database": (900, False),
+	"src.db.repositories": (1000, False),
+	"src.db.maintenance": (1000, False),
+	"src.app": (1000, False),
+	"main": (1000, False),
+}
+
+PROBE = """
+import json, sys
+import {module}
+import src.core.config as config
+import src.db.database as database
+print(json.dumps({{
+	"settings_built": config._settings is not None,
+	"engine_built": database._engine is not None,
+	"aiogram_imported": "aiogram" in sys.modules,
+}}))
+"""
+
+
+def measure(module: str, env: dict) -> float:
+	stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+	                        env=env, capture_output=True, text=True, check=True).stderr
+	for line in stderr.splitlines():
+		# import time: self [us] | cumulative | imported package
+		_, cumulative, name = line.split("|")
+		if name.strip() == module and not name.startswith("  "):
+			return int(cumulative) / 1000
+	raise RuntimeError(f"Модуль {module} не найден в выводе -X importtime")
+
+
+def probe(module: str, env: dict) -> dict:
+	output = subprocess.run([sys.executable, "-c", PROBE.format(module=module)],
+	                        env=env, capture_output=True, text=True, check=True).stdout
+	return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int, factor: float) -> int:
+	env = dict(os.environ)
+	env.setdefault("APP_NAME", "bench")
+	env.setdefault("APP_VERSION", "0")
+	env.setdefault("TELEGRAM_TOKEN", "0:bench")
+	env.setdefault("TELEGRAM_ADMIN_ID", "0")
+	env.setdefault("DB_PATH", ":memory:")
+
+	failures = 0
+	print(f"{'module':>20} | {'import, ms':>10} | {'budget, ms':>10} | side effects")
+	for module, (budget, aiogram_allowed) in BUDGETS.items():
+		elapsed = min(measure(module, env) for _ in range(runs))
+		effects = probe(module, env)
+		if aiogram_allowed:
+			effects.pop("aiogram_imported")
+		found = [name for name, happened in effects.items() if happened]
+
+		ok = elapsed <= budget * factor and not found
+		failures += not ok
+		print(f"{module:>20} | {elapsed:>10.1f} | {budget * factor:>10.0f} | {', '.join(found) or '-'}"
+		      f"{'' if ok else '  <- FAIL'}")
+	return 1 if failures else 0
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Проверка бюджета времени импорта модулей")
+	parser.add_argument("--runs", type=int, default=3, help="Запусков на модуль (берётся лучший)")
+	parser.add_argument("--factor", type=float, default=1.0, help="Множитель бюджетов для медленных машин")
+	args = parser.parse_args()
+	sys.exit(main(args.runs, args.factor))
@@ -0,0 +1,59 @@
+# benchmarks/datagen.py
+#
+# Генератор тестовых данных: заполняет users, transactions и registration напрямую через sqlite3,
+# в обход репозиториев (на порядки быстрее). Схема должна быть создана заранее (init_db).
+# После заполнения transactions нужно пересчитать balances: billing_repo.rebuild_balances().
+
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterable
+
+CHUNK_SIZE = 50_000
+
+
+def _insert(db_path: str, statement: str, rows: Iterable[tuple]):
+	rows = iter(rows)
+	with sqlite3.connect(db_path) as conn:
+		while chunk := list(islice(rows, CHUNK_SIZE)):
+			conn.executemany(statement, chunk)
+
+
+def seed_users(db_path: str, count: int, start_id: int = 1, blocked_share: float = 0.05):
+	today = date.today()
+
+	def rows():
+		for user_id in range(start_id, start_id + count):
+			end_date = today + timedelta(days=random.randint(-60, 60))
+			name = f"user{user_id}"
+			yield (user_id, name, name, (end_date - timedelta(days=30)).isoformat(), end_date.isoformat(),
+			       random.random() < blocked_share)
+
+	_insert(db_path, "INSERT INTO users (id, name, name_key, billing_start_date, billing_end_date, blocked) "
+	                 "VALUES (?, ?, ?, ?, ?, ?)", rows())
+
+
+def seed_transactions(db_path: str, count: int, users: int):
+	# created_at / updated_at в transactions - столбцы DATE
+	today = date.today()
+
+	def rows():
+		for _ in range(count):
+			created_at = (today - timedelta(days=random.randint(0, 365))).isoformat()
+			yield random.randint(1, users), random.randint(1, 10) * 100, created_at, today.isoformat()
+
+	_insert(db_path, "INSERT INTO transactions (user_id, amount, created_at, updated_at) VALUES (?, ?, ?, ?)", rows())
+
+
+def seed_registrations(db_path: str, count: int, start_id: int):
+	now = datetime.now().isoformat(sep=" ")
+	_insert(db_path, "INSERT INTO registration (id, name, requested_at) VALUES (?, ?, ?)",
+	        ((user_id, f"guest{user_id}", now) for user_id in range(start_id, start_id + count)))
+
+
+def seed(db_path: str, users: int, transactions: int, registrations: int):
+	"""Заполняет все три таблицы. ID заявок на регистрацию не пересекаются с ID пользователей"""
+	seed_users(db_path, users)
+	seed_transactions(db_path, transactions, users)
+	seed_registrations(db_path, registrations, start_id=users + 1)
@@ -0,0 +1,102 @@
+# benchmarks/fake_api.py
+#
+# Локальная замена Telegram Bot API на aiohttp: getUpdates (long polling), sendMessage, editMessageText,
+# answerCallbackQuery; остальные методы отвечают True. Обновления публикуются через publish(),
+# который возвращает future; его завершает complete(update_id), когда бот закончил обработку.
+
+import asyncio
+import json
+import time
+from collections import Counter
+
+from aiohttp import web
+
+# Методы, которыми бот отвечает пользователю (служебные getUpdates/getMe/deleteWebhook не считаются)
+REPLY_METHODS = {"sendMessage", "editMessageText", "answerCallbackQuery"}
+
+
+class FakeTelegramAPI:
+	def __init__(self, host: str = "127.0.0.1", port: int = 0):
+		self.host = host
+		self.port = port
+		self.calls: Counter[str] = Counter()
+		self.replies: Counter[int] = Counter()  # Ответы бота (REPLY_METHODS) по chat_id
+		self._callback_chats: dict[str, int] = {}
+		self._updates: list[dict] = []
+		self._next_update_id = 1
+		self._new_updates = asyncio.Event()
+		self._pending: dict[int, asyncio.Future] = {}
+		self._runner: web.AppRunner | None = None
+
+	@property
+	def base_url(self) -> str:
+		return f"http://{self.host}:{self.port}"
+
+	async def start(self):
+		app = web.Application()
+		app.router.add_post("/bot{token}/{method}", self._handle)
+		self._runner = web.AppRunner(app, access_log=None)
+		await self._runner.setup()
+		site = web.TCPSite(self._runner, self.host, self.port)
+		await site.start()
+		self.port = site._server.sockets[0].getsockname()[1]
+
+	async def stop(self):
+		if self._runner is not None:
+			await self._runner.cleanup()
+
+	def publish(self, update: dict) -> asyncio.Future:
+		"""Ставит обновление в очередь getUpdates (update_id назначается здесь)"""
+		update["update_id"] = self._next_update_id
+		self._next_update_id += 1
+		future = asyncio.get_running_loop().create_future()
+		future.published_at = time.perf_counter()
+		self._pending[update["update_id"]] = future
+		if "callback_query" in update:
+			callback = update["callback_query"]
+			self._callback_chats[callback["id"]] = callback["from"]["id"]
+		self._updates.append(update)
+		self._new_updates.set()
+		return future
+
+	def complete(self, update_id: int):
+		"""Отмечает обновление обработанным; future получает время от публикации до конца обработки"""
+		future = self._pending.pop(update_id, None)
+		if future is not None and not future.done():
+			future.set_result(time.perf_counter() - future.published_at)
+
+	async def _get_updates(self, params: dict) -> list[dict]:
+		offset = int(params.get("offset", 0))
+		limit = int(params.get("limit", 100))
+		timeout = float(params.get("timeout", 0))
+		# offset подтверждает получение всех предыдущих обновлений
+		self._updates = [update for update in self._updates if update["update_id"] >= offset]
+		if not self._updates and timeout:
+			self._new_updates.clear()
+			try:
+				await asyncio.wait_for(self._new_updates.wait(), timeout)
+			except asyncio.TimeoutError:
+				pass
+		return self._updates[:limit]
+
+	async def _handle(self, request: web.Request) -> web.Response:
+		method = request.match_info["method"]
+		params = dict(await request.post())
+		self.calls[method] += 1
+
+		if method == "answerCallbackQuery":
+			self.replies[self._callback_chats.pop(params.get("callback_query_id"), 0)] += 1
+		elif method in REPLY_METHODS:
+			self.replies[int(params.get("chat_id", 0))] += 1
+
+		if method == "getUpdates":
+			result = await self._get_updates(params)
+		elif method == "getMe":
+			result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+		elif method in ("sendMessage", "editMessageText", "sendDocument"):
+			chat_id = int(params.get("chat_id", 0))
+			result = {"message_id": 1, "date": int(time.time()), "chat": {"id": chat_id, "type": "private"},
+			          "text": params.get("text", "")}
+		else:
+			result = True
+		return web.Response(text=json.dumps({"ok": True, "result": result}), content_type="application/json")
@@ -0,0 +1,53 @@
+# benchmarks/fake_bot.py
+#
+# Подмена сетевой сессии aiogram: запросы к Bot API не отправляются, а считаются и получают
+# правдоподобный ответ. Позволяет прогонять обновления через настоящий Dispatcher.
+
+from collections import Counter
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.types import Message, Update
+
+
+class FakeSession(BaseSession):
+	def __init__(self):
+		super().__init__()
+		self.calls: Counter[str] = Counter()
+
+	async def make_request(self, bot: Bot, method, timeout: int | None = None):
+		self.calls[type(method).__name__] += 1
+		# sendMessage / editMessageText и т.п. возвращают сообщение, остальные методы - True
+		if Message in getattr(method.__returning__, "__args__", (method.__returning__,)):
+			chat_id = getattr(method, "chat_id", None) or 1
+			# Как и настоящая сессия, привязываем ответ к боту - у него можно вызывать edit_text и т.п.
+			return Message(message_id=1, date=datetime.now(), chat={"id": chat_id, "type": "private"}, text="").as_(bot)
+		return True
+
+	async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+		yield b""
+
+	async def close(self):
+		pass
+
+
+def _user(user_id: int) -> dict:
+	return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+
+def message_update(update_id: int, user_id: int, text: str) -> Update:
+	return Update.model_validate({
+		"update_id": update_id,
+		"message": {"message_id": update_id, "date": 0, "chat": {"id": user_id, "type": "private"},
+		            "from": _user(user_id), "text": text}
+	})
+
+
+def callback_update(update_id: int, user_id: int, data: str) -> Update:
+	return Update.model_validate({
+		"update_id": update_id,
+		"callback_query": {"id": str(update_id), "chat_instance": "bench", "data": data, "from": _user(user_id),
+		                   "message": {"message_id": 1, "date": 0, "chat": {"id": user_id, "type": "private"},
+		                               "text": ""}}
+	})
@@ -0,0 +1,51 @@
+import gc
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import Settings, get_settings
+from src.core.logger import log
+from src.db.database import get_engine, init_db
+
+if TYPE_CHECKING:
+	from src.telegram.bot import TelegramBot
+
+
+class Application:
+	"""Фабрика приложения. Компоненты создаются при первом обращении и строго по порядку:
+	настройки (и логирование по ним) -> движок БД -> бот. Импорт модулей проекта ничего не создаёт,
+	поэтому CLI-команды и бенчмарки не платят за стек бота, который им не нужен"""
+
+	@cached_property
+	def settings(self) -> Settings:
+		return get_settings()
+
+	@cached_property
+	def engine(self) -> AsyncEngine:
+		self.settings
+		return get_engine()
+
+	@cached_property
+	def telegram_bot(self) -> "TelegramBot":
+		self.engine
+		# aiogram, роутеры и хэндлеры импортируются только здесь
+		from src.telegram.bot import TelegramBot
+		return TelegramBot()
+
+	async def run(self):
+		log.info(f"Запуск {self.settings.APP_NAME} v{self.settings.APP_VERSION}")
+
+		# Инициализация БД
+		await init_db()
+
+		# Объекты, созданные при импорте и сборке бота, живут до конца процесса: убираем их из обхода
+		# сборщика мусора, иначе полные сборки во время выгрузок с миллионами строк стопорят цикл событий
+		telegram_bot = self.telegram_bot
+		gc.freeze()
+
+		# Запуск Telegram-бота
+		await telegram_bot.start()
+
+
+app = Application()
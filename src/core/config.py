@@ -1,7 +1,9 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from src.core.logger import log
+from src.core.logger import log, setup_logging
 
 
 class Settings(BaseSettings):
@@ -11,12 +13,84 @@ class Settings(BaseSettings):
 	APP_NAME: str = Field(description="Название приложения")
 	APP_VERSION: str = Field(description="Версия приложения")
 
+	# Логирование
+	LOG_LEVEL: Literal["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"] = Field(
+		default="INFO", description="Минимальный уровень сообщений")
+	LOG_CONSOLE: bool = Field(default=True, description="Вывод логов в stdout")
+	LOG_PATH: str | None = Field(default="logs/app.log", description="Файл логов (пусто - не писать в файл)")
+	LOG_JSON_PATH: str | None = Field(default=None, description="Файл логов в формате JSON (пусто - отключён)")
+	LOG_ROTATION: str = Field(default="1 MB", description="Условие ротации файлов логов (размер или время)")
+	LOG_RETENTION: str = Field(default="10 days", description="Сколько хранить старые файлы логов")
+	LOG_COMPRESSION: str | None = Field(default="zip", description="Сжатие старых файлов логов (пусто - без сжатия)")
+	LOG_ENQUEUE: bool = Field(default=True, description="Писать логи из фонового потока, не блокируя цикл событий")
+
 	# Database
 	DB_PATH: str = Field(description="DSM-строка для доступа к базе данных")
+	DB_JOURNAL_MODE: Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"] = Field(
+		default="WAL", description="PRAGMA journal_mode")
+	DB_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field(
+		default="NORMAL", description="PRAGMA synchronous (NORMAL безопасен в режиме WAL)")
+	DB_MMAP_SIZE: int = Field(default=256 * 1024 * 1024, description="PRAGMA mmap_size, байт (0 - отключено)")
+	DB_CACHE_SIZE: int = Field(default=-64 * 1024, description="PRAGMA cache_size (отрицательное значение - в КиБ)")
+	DB_TEMP_STORE: Literal["DEFAULT", "FILE", "MEMORY"] = Field(default="MEMORY", description="PRAGMA temp_store")
+	DB_BUSY_TIMEOUT: int = Field(default=5000, description="PRAGMA busy_timeout, мс")
+	DB_FOREIGN_KEYS: bool = Field(default=False, description="PRAGMA foreign_keys")
+	DB_SLOW_QUERY_MS: float = Field(default=100, description="Порог медленного запроса для лога, мс (0 - отключено)")
+	DB_SLOW_QUERY_EXPLAIN: bool = Field(default=True, description="Логировать EXPLAIN QUERY PLAN при первом медленном выполнении")
+	USER_CACHE_SIZE: int = Field(default=10_000, description="Размер кэша пользователей (0 - отключён)")
+	USER_CACHE_TTL: float = Field(default=60, description="Время жизни записи в кэше пользователей, сек")
 
 	# Telegram
 	TELEGRAM_TOKEN: str = Field(description="Telegram Token")
 	TELEGRAM_ADMIN_ID: int = Field(description="Admin ID")
+	LIST_PAGE_SIZE: int = Field(default=20, description="Количество строк на странице списков")
+	TELEGRAM_MODE: Literal["polling", "webhook"] = Field(default="polling", description="Способ получения обновлений")
+	FSM_STORAGE: Literal["memory", "sqlite"] = Field(default="sqlite", description="Хранилище состояний FSM")
+	FSM_CACHE_SIZE: int = Field(default=10_000, description="Размер кэша состояний FSM в памяти (0 - отключён; в режиме webhook всегда отключён)")
+	FSM_CACHE_TTL: float = Field(default=600, description="Время жизни записи в кэше состояний FSM, сек")
+
+	# Ограничение частоты обновлений от одного пользователя (администратор не ограничивается)
+	THROTTLE_MESSAGE_RATE: float = Field(default=1, description="Сообщений в секунду от пользователя (0 - без ограничения)")
+	THROTTLE_MESSAGE_BURST: int = Field(default=5, description="Сообщений подряд сверх частоты")
+	THROTTLE_CALLBACK_RATE: float = Field(default=3, description="Нажатий кнопок в секунду от пользователя (0 - без ограничения)")
+	THROTTLE_CALLBACK_BURST: int = Field(default=10, description="Нажатий кнопок подряд сверх частоты")
+	THROTTLE_MAX_USERS: int = Field(default=100_000, description="Пользователей, для которых одновременно хранятся счётчики")
+
+	# Webhook (TELEGRAM_MODE=webhook)
+	WEBHOOK_BASE_URL: str | None = Field(
+		default=None, description="Публичный адрес бота; если задан, вебхук регистрируется в Telegram при запуске")
+	WEBHOOK_PATH: str = Field(default="/webhook", description="Путь, на который Telegram присылает обновления")
+	WEBHOOK_HOST: str = Field(default="0.0.0.0", description="Адрес, на котором слушает HTTP-сервер")
+	WEBHOOK_PORT: int = Field(default=8080, description="Порт HTTP-сервера")
+	WEBHOOK_SECRET: str | None = Field(
+		default=None, description="Секрет из заголовка X-Telegram-Bot-Api-Secret-Token (без него проверка отключена)")
+	WEBHOOK_MAX_BODY_SIZE: int = Field(default=1024 * 1024, description="Максимальный размер тела запроса, байт")
+
+	# Рассылка
+	BROADCAST_RATE: float = Field(default=25, description="Не более сообщений в секунду (лимит Telegram ~30)")
+	BROADCAST_CHAT_INTERVAL: float = Field(default=1.0, description="Минимальный интервал между сообщениями в один чат, сек")
+	BROADCAST_BATCH_SIZE: int = Field(default=100, description="Сообщений, выбираемых из очереди за раз")
+	BROADCAST_POLL_INTERVAL: float = Field(default=10, description="Период проверки очереди без уведомлений, сек")
+	BROADCAST_MAX_ATTEMPTS: int = Field(default=5, description="Попыток отправки одного сообщения")
+
+	# Напоминания об окончании подписки
+	EXPIRY_REMIND_DAYS: int = Field(default=3, description="За сколько дней до окончания подписки напоминать")
+	EXPIRY_GRACE_DAYS: int = Field(default=3, description="Сколько дней после окончания ещё напоминать")
+	EXPIRY_SCAN_INTERVAL: float = Field(default=3600, description="Период проверки подписок, сек")
+	EXPIRY_BATCH_SIZE: int = Field(default=500, description="Пользователей, обрабатываемых за одну транзакцию")
+
+	# Метрики (команда /metrics доступна всегда)
+	METRICS_FILE: str | None = Field(default=None, description="Файл метрик в формате Prometheus (пусто - не писать)")
+	METRICS_FILE_INTERVAL: float = Field(default=15, description="Период обновления файла метрик, сек")
+	METRICS_HOST: str = Field(default="127.0.0.1", description="Адрес HTTP-эндпоинта /metrics")
+	METRICS_PORT: int | None = Field(default=None, description="Порт HTTP-эндпоинта /metrics (пусто - отключён)")
+
+	# Экспорт (команда /export) и импорт (загрузка CSV-документа) в CSV
+	EXPORT_BATCH_SIZE: int = Field(default=1000, description="Строк, читаемых из курсора за раз")
+	EXPORT_SPOOL_SIZE: int = Field(default=4 * 1024 * 1024, description="Размер CSV в памяти, после которого он сбрасывается во временный файл, байт")
+	IMPORT_CHUNK_SIZE: int = Field(default=2000, description="Строк импорта, записываемых одной транзакцией")
+	IMPORT_PROGRESS_INTERVAL: float = Field(default=3, description="Минимальный интервал обновления сообщения о ходе импорта, сек")
+	IMPORT_MAX_ERRORS: int = Field(default=1000, description="Сколько ошибок импорта попадает в отчёт")
 
 	model_config = SettingsConfigDict(env_file=".env")
 
@@ -24,4 +98,26 @@ class Settings(BaseSettings):
 	def get_db_url(self):
 		return f"sqlite+aiosqlite:///{self.DB_PATH}"
 
-settings = Settings()
\ No newline at end of file
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+	"""Читает настройки из окружения при первом вызове и настраивает по ним логирование"""
+	global _settings
+	if _settings is None:
+		_settings = Settings()
+		setup_logging(_settings)
+	return _settings
+
+
+class LazySettings:
+	"""Прокси для Settings: импорт модуля не читает окружение, настройки создаются при первом обращении"""
+
+	def __getattr__(self, name):
+		return getattr(get_settings(), name)
+
+	def __setattr__(self, name, value):
+		setattr(get_settings(), name, value)
+
+
+settings: Settings = LazySettings()  # type: ignore[assignment]
@@ -1,8 +1,17 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, date
 from enum import Enum
 
 
+# =====================================================================================================================
+# ============================================= Общие =================================================================
+# =====================================================================================================================
+
+class BulkResultDTO(BaseModel):
+	inserted_ids: list[int] = Field(default_factory=list)
+	errors: dict[int, str] = Field(default_factory=dict)  # Номер строки во входных данных -> текст ошибки
+
+
 # =====================================================================================================================
 # ============================================ Пользователи ===========================================================
 # =====================================================================================================================
@@ -24,18 +33,46 @@ class UserAddDTO(BaseModel):
 
 	@property
 	def status(self):
-		if self.blocked:
-			return UserStatus.BLOCKED
-		elif self.billing_end_date >= date.today():
-			return UserStatus.ACTIVE
-		else:
-			return UserStatus.EXPIRED
+		return user_status(self.blocked, self.billing_end_date)
+
+
+def user_status(blocked: bool, billing_end_date: date) -> UserStatus:
+	if blocked:
+		return UserStatus.BLOCKED
+	elif billing_end_date >= date.today():
+		return UserStatus.ACTIVE
+	else:
+		return UserStatus.EXPIRED
 
 
 class UserDTO(UserAddDTO):
 	pass
 
 
+class UserRow:
+	"""Строка списка пользователей (быстрый путь чтения): значения столбцов без ORM-объекта и валидации.
+	Порядок __slots__ совпадает с порядком столбцов в запросе"""
+	__slots__ = ("id", "name", "billing_start_date", "billing_end_date", "blocked")
+
+	def __init__(self, id: int, name: str, billing_start_date: date, billing_end_date: date, blocked: bool):
+		self.id = id
+		self.name = name
+		self.billing_start_date = billing_start_date
+		self.billing_end_date = billing_end_date
+		self.blocked = blocked
+
+	@property
+	def status(self) -> UserStatus:
+		return user_status(self.blocked, self.billing_end_date)
+
+
+class UserStatsDTO(BaseModel):
+	total: int = 0
+	active: int = 0
+	expired: int = 0
+	blocked: int = 0
+
+
 class UserUpdateDTO(BaseModel):
 	id: int | None = None
 	name: str | None = None
@@ -63,6 +100,28 @@ class TransactionDTO(TransactionAddDTO):
 	id: int
 
 
+class TransactionWithUserDTO(TransactionDTO):
+	user_name: str | None = None
+
+
+class TransactionRow:
+	"""Строка списка транзакций с именем пользователя (быстрый путь чтения, см. UserRow)"""
+	__slots__ = ("id", "user_id", "amount", "created_at", "updated_at", "user_name")
+
+	def __init__(self, id: int, user_id: int, amount: int, created_at: date, updated_at: date, user_name: str | None):
+		self.id = id
+		self.user_id = user_id
+		self.amount = amount
+		self.created_at = created_at
+		self.updated_at = updated_at
+		self.user_name = user_name
+
+
+class TransactionStatsDTO(BaseModel):
+	count: int = 0
+	amount: int = 0
+
+
 class TransactionUpdateDTO(BaseModel):
 	user_id: int | None = None
 	amount: int | None = None
@@ -72,6 +131,33 @@ class TransactionUpdateDTO(BaseModel):
 	model_config = ConfigDict(from_attributes=True)
 
 
+# =====================================================================================================================
+# ============================================== Баланс ===============================================================
+# =====================================================================================================================
+
+
+class BalanceAddDTO(BaseModel):
+	id: int
+	total_paid: int = 0
+	tx_count: int = 0
+	last_payment_at: date | None = None
+
+	model_config = ConfigDict(from_attributes=True)
+
+
+class BalanceDTO(BalanceAddDTO):
+	pass
+
+
+class BalanceUpdateDTO(BaseModel):
+	id: int | None = None
+	total_paid: int | None = None
+	tx_count: int | None = None
+	last_payment_at: date | None = None
+
+	model_config = ConfigDict(from_attributes=True)
+
+
 # =====================================================================================================================
 # ============================================ Сообщения ============================================================
 # =====================================================================================================================
@@ -87,8 +173,8 @@ class MessageStatus(Enum):
 
 class MessageAddDTO(BaseModel):
 	recipient: int
-	text: int
-	status: Enum
+	text: str
+	status: MessageStatus = MessageStatus.PENDING
 	created_at: datetime
 	updated_at: datetime
 
@@ -101,8 +187,8 @@ class MessageDTO(MessageAddDTO):
 
 class MessageUpdateDTO(BaseModel):
 	recipient: int | None = None
-	text: int | None = None
-	status: Enum | None = None
+	text: str | None = None
+	status: MessageStatus | None = None
 	created_at: datetime | None = None
 	updated_at: datetime | None = None
 
@@ -129,4 +215,29 @@ class RegistrationUpdateDTO(BaseModel):
 	id: int | None = None
 	name: str | None = None
 
-	model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+	model_config = ConfigDict(from_attributes=True)
+
+# =====================================================================================================================
+# ============================================ Состояния FSM ==========================================================
+# =====================================================================================================================
+
+
+class FSMStateAddDTO(BaseModel):
+	id: str  # Ключ хранилища aiogram (бот, чат, пользователь, destiny)
+	state: str | None = None
+	data: dict = Field(default_factory=dict)
+	updated_at: datetime
+
+	model_config = ConfigDict(from_attributes=True)
+
+
+class FSMStateDTO(FSMStateAddDTO):
+	pass
+
+
+class FSMStateUpdateDTO(BaseModel):
+	state: str | None = None
+	data: dict | None = None
+	updated_at: datetime | None = None
+
+	model_config = ConfigDict(from_attributes=True)
@@ -1,41 +1,68 @@
 import sys
+from typing import TYPE_CHECKING
+
 from loguru import logger
 
-LOG_LEVEL = "DEBUG"
-LOG_PATH = "logs/app.log"
-LOG_ROTATION = "1 MB"
-LOG_RETENTION = "10 days"
+if TYPE_CHECKING:
+	from src.core.config import Settings
+
+CONSOLE_FORMAT = (
+	"<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+	"<level>{level: <8}</level> | "
+	"<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+	"<level>{message}</level>"
+)
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}"
+
+
+def setup_logging(config: "Settings | None" = None):
+	"""Настройка системы логирования.
 
-def setup_logging():
-	"""Настройка системы логирования"""
+	До загрузки настроек (config=None) пишет в stdout с уровнем INFO. С настройками - уровень,
+	приёмники и ротация берутся из Settings. При LOG_ENQUEUE=True записи передаются в фоновый поток
+	через очередь, и запись на диск, ротация и сжатие не блокируют цикл событий.
+	Отладочные сообщения пишутся с аргументами (log.debug("... {}", value)) - при выключенном уровне
+	DEBUG они не форматируются"""
 
-	# Удаляем стандартный обработчик
+	# Удаляем ранее добавленные обработчики (в т.ч. стандартный)
 	logger.remove()
 
+	if config is None:
+		logger.add(sys.stdout, level="INFO", format=CONSOLE_FORMAT, colorize=True)
+		return logger
+
 	# Консольный вывод
-	logger.add(
-		sys.stdout,
-		level=LOG_LEVEL,
-		format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-		       "<level>{level: <8}</level> | "
-		       "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
-		       "<level>{message}</level>",
-		colorize=True
-	)
+	if config.LOG_CONSOLE:
+		logger.add(sys.stdout, level=config.LOG_LEVEL, format=CONSOLE_FORMAT, colorize=True,
+		           enqueue=config.LOG_ENQUEUE)
 
 	# Файловый вывод
-	logger.add(
-		LOG_PATH,
-		level=LOG_LEVEL,
-		format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
-		rotation=LOG_ROTATION,
-		retention=LOG_RETENTION,
-		compression="zip"
-	)
-
-	logger.info(f"Логирование инициализировано. Уровень: {LOG_LEVEL}")
+	if config.LOG_PATH:
+		logger.add(
+			config.LOG_PATH,
+			level=config.LOG_LEVEL,
+			format=FILE_FORMAT,
+			rotation=config.LOG_ROTATION,
+			retention=config.LOG_RETENTION,
+			compression=config.LOG_COMPRESSION,
+			enqueue=config.LOG_ENQUEUE
+		)
+
+	# Структурированный вывод (одна JSON-запись на строку) для сборщиков логов
+	if config.LOG_JSON_PATH:
+		logger.add(
+			config.LOG_JSON_PATH,
+			level=config.LOG_LEVEL,
+			serialize=True,
+			rotation=config.LOG_ROTATION,
+			retention=config.LOG_RETENTION,
+			compression=config.LOG_COMPRESSION,
+			enqueue=config.LOG_ENQUEUE
+		)
+
+	logger.info(f"Логирование инициализировано. Уровень: {config.LOG_LEVEL}")
 	return logger
 
 
 # Глобальный экземпляр логгера
-log = setup_logging()
\ No newline at end of file
+log = setup_logging()
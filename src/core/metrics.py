@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable
+
+# Границы корзин гистограммы задержек, сек
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+	def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)  # Последняя корзина - всё, что больше buckets[-1]
+		self.total = 0.0
+		self.count = 0
+
+	def observe(self, value: float):
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.total += value
+		self.count += 1
+
+	def quantile(self, q: float) -> float:
+		"""Оценка квантиля по верхней границе корзины (для последней корзины - по максимальной границе)"""
+		if not self.count:
+			return 0.0
+		rank = q * self.count
+		seen = 0
+		for bound, bucket_count in zip(self.buckets, self.counts):
+			seen += bucket_count
+			if seen >= rank:
+				return bound
+		return self.buckets[-1]
+
+
+class HandlerMetrics:
+	def __init__(self):
+		self.updates = 0
+		self.errors = 0
+		self.latency = Histogram()
+		self.db_statements = 0
+		self.db_seconds = 0.0
+
+
+class MetricsRegistry:
+	"""Метрики обработки обновлений в разрезе хэндлеров. Хранятся в памяти процесса"""
+
+	def __init__(self):
+		self.handlers: dict[str, HandlerMetrics] = {}
+		self.throttled: Counter[str] = Counter()  # Отброшенные ограничением частоты, по типу события
+		# Кэши в памяти: имя -> функция, возвращающая {"size", "hits", "misses", "evictions"}
+		self.caches: dict[str, Callable[[], dict[str, int]]] = {}
+
+	def register_cache(self, name: str, stats: Callable[[], dict[str, int]]):
+		self.caches[name] = stats
+
+	def observe_update(self, handler: str, seconds: float, error: bool, db_statements: int, db_seconds: float):
+		metrics = self.handlers.get(handler)
+		if metrics is None:
+			metrics = self.handlers[handler] = HandlerMetrics()
+		metrics.updates += 1
+		metrics.errors += error
+		metrics.latency.observe(seconds)
+		metrics.db_statements += db_statements
+		metrics.db_seconds += db_seconds
+
+	def observe_throttled(self, event_type: str):
+		self.throttled[event_type] += 1
+
+	def reset(self):
+		self.handlers.clear()
+		self.throttled.clear()
+
+	def render_text(self) -> str:
+		"""Краткая сводка для команды /metrics, самые медленные хэндлеры сверху"""
+		lines = []
+		ordered = sorted(self.handlers.items(), key=lambda item: item[1].latency.total, reverse=True)
+		for name, m in ordered:
+			lines.append(
+				f"{name}: {m.updates} upd, {m.errors} err, "
+				f"avg {m.latency.total / m.updates * 1000:.1f} ms, "
+				f"p50≤{m.latency.quantile(0.5) * 1000:g} ms, p99≤{m.latency.quantile(0.99) * 1000:g} ms, "
+				f"SQL {m.db_statements / m.updates:.1f}/upd, {m.db_seconds / m.updates * 1000:.1f} ms/upd"
+			)
+		for name, stats in self.caches.items():
+			c = stats()
+			lookups = c["hits"] + c["misses"]
+			hit_rate = c["hits"] / lookups * 100 if lookups else 0.0
+			lines.append(
+				f"cache {name}: size {c['size']}, hits {c['hits']}, misses {c['misses']}, "
+				f"evictions {c['evictions']}, hit rate {hit_rate:.1f}%"
+			)
+		if self.throttled:
+			lines.append("throttled: " + ", ".join(f"{event} {count}" for event, count in self.throttled.items()))
+		return "\n".join(lines)
+
+	def render_prometheus(self) -> str:
+		"""Текстовый формат экспозиции Prometheus"""
+		out = [
+			"# HELP bot_updates_total Обработанные обновления",
+			"# TYPE bot_updates_total counter",
+			*(f'bot_updates_total{{handler="{name}"}} {m.updates}' for name, m in self.handlers.items()),
+			"# HELP bot_update_errors_total Обновления, завершившиеся ошибкой",
+			"# TYPE bot_update_errors_total counter",
+			*(f'bot_update_errors_total{{handler="{name}"}} {m.errors}' for name, m in self.handlers.items()),
+			"# HELP bot_db_statements_total SQL-запросы, выполненные при обработке обновлений",
+			"# TYPE bot_db_statements_total counter",
+			*(f'bot_db_statements_total{{handler="{name}"}} {m.db_statements}' for name, m in self.handlers.items()),
+			"# HELP bot_db_seconds_total Время выполнения SQL-запросов",
+			"# TYPE bot_db_seconds_total counter",
+			*(f'bot_db_seconds_total{{handler="{name}"}} {m.db_seconds:.6f}' for name, m in self.handlers.items()),
+			"# HELP bot_throttled_updates_total Обновления, отброшенные ограничением частоты",
+			"# TYPE bot_throttled_updates_total counter",
+			*(f'bot_throttled_updates_total{{event="{event}"}} {count}' for event, count in self.throttled.items()),
+		]
+		caches = {name: stats() for name, stats in self.caches.items()}
+		for metric, key, kind, description in (
+			("bot_cache_hits_total", "hits", "counter", "Попадания в кэш"),
+			("bot_cache_misses_total", "misses", "counter", "Промахи кэша"),
+			("bot_cache_evictions_total", "evictions", "counter", "Вытеснения из кэша по размеру"),
+			("bot_cache_size", "size", "gauge", "Записей в кэше"),
+		):
+			out.append(f"# HELP {metric} {description}")
+			out.append(f"# TYPE {metric} {kind}")
+			out.extend(f'{metric}{{cache="{name}"}} {c[key]}' for name, c in caches.items())
+		out += [
+			"# HELP bot_handler_duration_seconds Время обработки обновления",
+			"# TYPE bot_handler_duration_seconds histogram",
+		]
+		for name, m in self.handlers.items():
+			cumulative = 0
+			for bound, bucket_count in zip(m.latency.buckets, m.latency.counts):
+				cumulative += bucket_count
+				out.append(f'bot_handler_duration_seconds_bucket{{handler="{name}",le="{bound}"}} {cumulative}')
+			out.append(f'bot_handler_duration_seconds_bucket{{handler="{name}",le="+Inf"}} {m.latency.count}')
+			out.append(f'bot_handler_duration_seconds_sum{{handler="{name}"}} {m.latency.total:.6f}')
+			out.append(f'bot_handler_duration_seconds_count{{handler="{name}"}} {m.latency.count}')
+		return "\n".join(out) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable
+
+
+_MISSING = object()
+
+
+class TTLCache:
+	"""Ограниченный по размеру LRU-кэш с временем жизни записей. Хранит и отрицательные результаты (None)"""
+
+	def __init__(self, maxsize: int, ttl: float):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		# Растёт при каждом сбросе: значение, прочитанное из базы до сброса, в кэш не попадает
+		self.generation = 0
+
+	def get(self, key: Hashable) -> tuple[bool, Any]:
+		"""Возвращает (найдено, значение)"""
+		item = self._data.get(key, _MISSING)
+		if item is _MISSING:
+			self.misses += 1
+			return False, None
+
+		expires_at, value = item
+		if expires_at < monotonic():
+			del self._data[key]
+			self.misses += 1
+			return False, None
+
+		self._data.move_to_end(key)
+		self.hits += 1
+		return True, value
+
+	def set(self, key: Hashable, value: Any, generation: int | None = None):
+		"""generation - значение self.generation до чтения value из источника (для read-through)"""
+		if self.maxsize <= 0 or (generation is not None and generation != self.generation):
+			return
+		self._data[key] = (monotonic() + self.ttl, value)
+		self._data.move_to_end(key)
+		while len(self._data) > self.maxsize:
+			self._data.popitem(last=False)
+			self.evictions += 1
+
+	def invalidate(self, key: Hashable):
+		self.generation += 1
+		self._data.pop(key, None)
+
+	def clear(self):
+		self.generation += 1
+		self._data.clear()
+
+	def stats(self) -> dict[str, int]:
+		return {
+			"size": len(self._data),
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+		}
@@ -1,37 +1,197 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 
 from src.core.logger import log
-from src.core.config import settings
+from src.core.config import Settings, get_settings
 
 from src.db.orm import Base
+from src.db.migrations import run_migrations, get_schema_version, SCHEMA_VERSION
+from src.db.profiling import install_query_hooks
+
+
+def get_pragmas(config: Settings) -> dict[str, str | int]:
+	return {
+		# journal_mode первым: от него зависит смысл synchronous
+		"journal_mode": config.DB_JOURNAL_MODE,
+		"synchronous": config.DB_SYNCHRONOUS,
+		"mmap_size": config.DB_MMAP_SIZE,
+		"cache_size": config.DB_CACHE_SIZE,
+		"temp_store": config.DB_TEMP_STORE,
+		"busy_timeout": config.DB_BUSY_TIMEOUT,
+		"foreign_keys": "ON" if config.DB_FOREIGN_KEYS else "OFF",
+	}
+
+
+def build_engine(config: Settings) -> AsyncEngine:
+	new_engine = create_async_engine(config.get_db_url)
+	pragmas = get_pragmas(config)
+
+	# PRAGMA действуют на уровне соединения, поэтому применяются к каждому новому соединению пула
+	@event.listens_for(new_engine.sync_engine, "connect")
+	def apply_pragmas(dbapi_connection, connection_record):
+		cursor = dbapi_connection.cursor()
+		try:
+			for name, value in pragmas.items():
+				cursor.execute(f"PRAGMA {name}={value}")
+		finally:
+			cursor.close()
+		# Драйвер sqlite3 сам управляет BEGIN/COMMIT и ломает SAVEPOINT, поэтому отключаем его логику
+		# и открываем транзакцию явно в обработчике "begin" (рецепт из документации SQLAlchemy)
+		dbapi_connection.isolation_level = None
+
+	@event.listens_for(new_engine.sync_engine, "begin")
+	def emit_begin(conn):
+		conn.info["has_writes"] = False
+		conn.exec_driver_sql("BEGIN")
+
+	# Была ли в текущей транзакции успешная запись - см. _run_before_commit
+	@event.listens_for(new_engine.sync_engine, "after_cursor_execute")
+	def track_writes(conn, cursor, statement, parameters, context, executemany):
+		if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+			conn.info["has_writes"] = True
+
+	install_query_hooks(new_engine.sync_engine, config.DB_SLOW_QUERY_MS / 1000, config.DB_SLOW_QUERY_EXPLAIN)
+
+	log.debug("Параметры SQLite: {}", pragmas)
+	return new_engine
+
+
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+def get_engine() -> AsyncEngine:
+	"""Движок создаётся при первом обращении, а не при импорте модуля"""
+	global _engine, _session_factory
+	if _engine is None:
+		_engine = build_engine(get_settings())
+		_session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+	return _engine
+
 
+def async_session() -> AsyncSession:
+	get_engine()
+	return _session_factory()
 
-engine = create_async_engine(settings.get_db_url)
-async_session = async_sessionmaker(engine, expire_on_commit=False)
+# Сессия текущей единицы работы (одно обновление Telegram или один вызов репозитория вне его)
+current_session: ContextVar[AsyncSession | None] = ContextVar("current_session", default=None)
 
 
-async def init_db():
-	log.debug(f"Инициализация базы данных: '{settings.DB_PATH}'")
+async def init_db(engine: AsyncEngine | None = None):
+	"""Создаёт схему и применяет миграции. По умолчанию - в базе из настроек"""
+	engine = engine or get_engine()
+	log.debug("Инициализация базы данных: '{}'", engine.url.database)
 	try:
 		async with engine.begin() as conn:
+			# Схема актуальна - create_all с проверкой каждой таблицы не нужен.
+			# Поэтому новые таблицы добавляются вместе с миграцией
+			version = await conn.run_sync(get_schema_version)
+			if version >= SCHEMA_VERSION:
+				log.debug("Схема базы данных актуальна: версия {}", version)
+				return
 			# await conn.run_sync(Base.metadata.drop_all)
 			await conn.run_sync(Base.metadata.create_all)
+			await conn.run_sync(run_migrations)
 		log.debug("OK")
 	except Exception as e:
 		log.error(f"Ошибка: {e}")
 
 
+@asynccontextmanager
+async def unit_of_work():
+	"""Одна сессия на весь блок. Вложенные вызовы переиспользуют внешнюю сессию.
+	Транзакция одна, если внутри блока не вызывался commit_early"""
+	session = current_session.get()
+	if session is not None:
+		yield session
+		return
+
+	async with async_session() as new_session:
+		token = current_session.set(new_session)
+		try:
+			yield new_session
+			await _run_before_commit(new_session)
+			await new_session.commit()
+		except Exception:
+			await new_session.rollback()  # Откатываем сессию при ошибке
+			raise  # Поднимаем исключение дальше
+		finally:
+			current_session.reset(token)
+			_run_after_transaction(new_session)
+
+
+async def commit_early():
+	"""Фиксирует транзакцию текущей единицы работы, не закрывая её: следующие запросы блока откроют новую.
+	Вызывается перед долгим ожиданием (запросом к Bot API), чтобы транзакция и блокировка записи SQLite
+	не удерживались на время сети. Вне единицы работы и внутри вызова репозитория ничего не делает"""
+	session = current_session.get()
+	if session is None or session.in_nested_transaction():
+		return
+	await _run_before_commit(session)
+	if session.in_transaction():
+		await session.commit()
+	_run_after_transaction(session)
+
+
+def before_commit(callback: Callable[[], Awaitable[None]]):
+	"""Выполняет callback в транзакции текущей единицы работы перед каждым её коммитом, в том числе
+	досрочным. Используется для отложенных записей (состояния FSM), которые должны попасть в ту же транзакцию"""
+	session = current_session.get()
+	if session is None:
+		raise RuntimeError("before_commit вызван вне единицы работы")
+	session.info.setdefault("before_commit", []).append(callback)
+
+
+async def _run_before_commit(session: AsyncSession):
+	callbacks = session.info.get("before_commit")
+	if not callbacks:
+		return
+	# Отложенная запись в транзакции, где до сих пор было только чтение, повышала бы её до записи.
+	# Если снимок чтения устарел (после него закоммитил другой писатель), SQLite отвечает
+	# "database is locked" сразу, без ожидания busy_timeout. Поэтому такая транзакция сначала
+	# завершается, и запись начинает новую
+	if session.in_transaction() and not (await session.connection()).info.get("has_writes"):
+		await session.commit()
+	for callback in callbacks:
+		await callback()
+
+
+def _run_after_transaction(session: AsyncSession):
+	for callback in session.info.pop("after_transaction", []):
+		callback()
+
+
+def after_transaction(callback: Callable[[], None]):
+	"""Выполняет callback после завершения (коммита или отката) текущей транзакции единицы работы,
+	либо сразу, если её нет. Используется для сброса кэшей, чтобы они не пережили транзакцию"""
+	session = current_session.get()
+	if session is None:
+		callback()
+		return
+	session.info.setdefault("after_transaction", []).append(callback)
+
+
 def connection(method):
+	@wraps(method)
 	async def wrapper(*args, **kwargs):
-		async with async_session() as new_session:
+		async with unit_of_work() as session:
+			# Каждый вызов выполняется в своей точке сохранения: ошибка, перехваченная внутри метода
+			# репозитория, откатывает только его изменения, а не всю единицу работы
+			savepoint = await session.begin_nested()
 			try:
-				# Явно не открываем транзакции, так как они уже есть в контексте
-				return await method(*args, session=new_session, **kwargs)
-
-			except Exception as e:
-				await new_session.rollback()  # Откатываем сессию при ошибке
-				raise e  # Поднимаем исключение дальше
-			finally:
-				await new_session.close()
+				result = await method(*args, session=session, **kwargs)
+			except Exception:
+				await savepoint.rollback()
+				raise
+			if savepoint.is_active:
+				await savepoint.commit()
+			else:
+				await savepoint.rollback()
+			return result
 
-	return wrapper
\ No newline at end of file
+	return wrapper
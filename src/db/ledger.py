@@ -0,0 +1,78 @@
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import select, update, delete, func, literal
+from sqlalchemy.dialects.sqlite import insert
+
+from src.db.orm import BalanceORM, TransactionORM
+
+
+# =====================================================================================================================
+# Запросы для поддержки таблицы balances. Общие для BillingRepository (асинхронная сессия) и миграций
+# (синхронное соединение), поэтому здесь только построение выражений, без выполнения
+# =====================================================================================================================
+
+def apply_payment(user_id: int, amount: int, created_at: date):
+	query = insert(BalanceORM).values(id=user_id, total_paid=amount, tx_count=1, last_payment_at=created_at)
+	return query.on_conflict_do_update(
+		index_elements=[BalanceORM.id],
+		set_={
+			"total_paid": BalanceORM.total_paid + query.excluded.total_paid,
+			"tx_count": BalanceORM.tx_count + 1,
+			# Двухаргументный max() в SQLite - скалярная функция, NULL заменяем новой датой
+			"last_payment_at": func.max(func.coalesce(BalanceORM.last_payment_at, query.excluded.last_payment_at),
+			                            query.excluded.last_payment_at),
+		}
+	)
+
+
+def revert_payment(user_id: int, amount: int):
+	# Дата последнего платежа берётся из оставшихся транзакций (индекс ix_transactions_user_id_created_at)
+	last_payment_at = (
+		select(func.max(TransactionORM.created_at))
+		.where(TransactionORM.user_id == user_id)
+		.scalar_subquery()
+	)
+	return (
+		update(BalanceORM)
+		.where(BalanceORM.id == user_id)
+		.values(
+			total_paid=BalanceORM.total_paid - amount,
+			tx_count=BalanceORM.tx_count - 1,
+			last_payment_at=last_payment_at,
+		)
+	)
+
+
+def recompute(user_ids: Iterable[int] | None = None):
+	"""INSERT ... SELECT с группировкой по user_id. Без user_ids - пересчёт всех пользователей за один проход"""
+	totals = select(
+		TransactionORM.user_id,
+		func.sum(TransactionORM.amount),
+		func.count(),
+		func.max(TransactionORM.created_at),
+	)
+	if user_ids is not None:
+		totals = totals.where(TransactionORM.user_id.in_(list(user_ids)))
+	else:
+		# WHERE обязателен: без него SQLite не отличит ON CONFLICT от JOIN ... ON у INSERT ... SELECT
+		totals = totals.where(literal(True))
+	totals = totals.group_by(TransactionORM.user_id)
+
+	query = insert(BalanceORM).from_select(["id", "total_paid", "tx_count", "last_payment_at"], totals)
+	return query.on_conflict_do_update(
+		index_elements=[BalanceORM.id],
+		set_={
+			"total_paid": query.excluded.total_paid,
+			"tx_count": query.excluded.tx_count,
+			"last_payment_at": query.excluded.last_payment_at,
+		}
+	)
+
+
+def clear(user_ids: Iterable[int] | None = None):
+	# Строки пользователей, у которых не осталось транзакций, recompute() не обновит - их удаляем заранее
+	query = delete(BalanceORM)
+	if user_ids is not None:
+		query = query.where(BalanceORM.id.in_(list(user_ids)))
+	return query
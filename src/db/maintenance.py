@@ -0,0 +1,31 @@
+# Служебные команды для обслуживания базы данных.
+# Запуск: python -m src.db.maintenance <команда>
+
+import argparse
+from asyncio import run
+
+from src.core.logger import log
+from src.db.database import init_db
+from src.db.repositories import billing_repo
+
+
+async def rebuild_balances():
+	await init_db()
+	count = await billing_repo.rebuild_balances()
+	log.info(f"Таблица balances пересчитана: {count} пользователей")
+
+
+COMMANDS = {
+	"rebuild-balances": rebuild_balances,
+}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Обслуживание базы данных")
+	parser.add_argument("command", choices=COMMANDS.keys())
+	args = parser.parse_args()
+	run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+	main()
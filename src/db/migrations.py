@@ -0,0 +1,128 @@
+from typing import Callable, Iterable
+
+from sqlalchemy import inspect, text, select, Connection
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+
+from src.core.logger import log
+from src.db import ledger
+from src.db.orm import Base, UserORM, MessageORM, FSMStateORM, SchemaVersionORM, normalize_name
+
+
+# =====================================================================================================================
+# ============================================== Миграции =============================================================
+# =====================================================================================================================
+# create_all создаёт только недостающие таблицы (вместе с их индексами), но не добавляет столбцы и индексы
+# в уже существующие. Всё, что меняет существующие таблицы, оформляется миграцией. Миграции должны быть
+# идемпотентными: на свежей базе create_all уже создал всё нужное, и они лишь фиксируют номер версии.
+
+def migrate_user_name_key(conn: Connection):
+	columns = {column["name"] for column in inspect(conn).get_columns(UserORM.__tablename__)}
+	if "name_key" in columns:
+		return
+
+	log.info("Добавление столбца name_key в таблицу 'users'")
+	conn.execute(text("ALTER TABLE users ADD COLUMN name_key VARCHAR(25)"))
+
+	seen = set()
+	for user_id, name in conn.execute(text("SELECT id, name FROM users ORDER BY id")).all():
+		name_key = normalize_name(name)
+		if name_key in seen:
+			log.warning(f"Имя '{name}' пользователя {user_id} не уникально, ключ не заполнен")
+			continue
+		seen.add(name_key)
+		conn.execute(text("UPDATE users SET name_key = :name_key WHERE id = :id"), {"name_key": name_key, "id": user_id})
+
+
+def create_indexes(conn: Connection, names: Iterable[str]):
+	# Индекс строится прямо в существующей таблице (CREATE INDEX), пересоздавать базу не нужно.
+	# Каждая миграция создаёт только свои индексы: индекс из текущих метаданных может ссылаться
+	# на столбец, который добавит более поздняя миграция
+	names = set(names)
+	for table in Base.metadata.sorted_tables:
+		indexes = [index for index in table.indexes if index.name in names]
+		if not indexes:
+			continue
+		existing = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+		for index in indexes:
+			if index.name not in existing:
+				log.info(f"Создание индекса '{index.name}' в таблице '{table.name}'")
+				index.create(conn)
+
+
+def create_secondary_indexes(conn: Connection):
+	create_indexes(conn, (
+		"ix_users_name_key", "ix_users_billing_start_date", "ix_users_billing_end_date",
+		"ix_transactions_user_id_created_at", "ix_transactions_created_at",
+		"ix_messages_recipient",
+		"ix_registration_requested_at",
+	))
+
+
+def migrate_message_status(conn: Connection):
+	columns = {column["name"] for column in inspect(conn).get_columns(MessageORM.__tablename__)}
+	if "status" not in columns:
+		# Старые записи остаются со status = NULL и в очередь рассылки не попадают
+		log.info("Добавление столбца status в таблицу 'messages'")
+		conn.execute(text("ALTER TABLE messages ADD COLUMN status VARCHAR(14)"))
+	create_indexes(conn, ("ix_messages_status_id",))
+
+
+def migrate_user_expiry_notified_for(conn: Connection):
+	columns = {column["name"] for column in inspect(conn).get_columns(UserORM.__tablename__)}
+	if "expiry_notified_for" not in columns:
+		log.info("Добавление столбца expiry_notified_for в таблицу 'users'")
+		conn.execute(text("ALTER TABLE users ADD COLUMN expiry_notified_for DATE"))
+
+
+def create_fsm_states(conn: Connection):
+	# Таблица появилась без миграции (её создавал create_all), а теперь create_all при актуальной схеме не вызывается
+	Base.metadata.create_all(conn, tables=[FSMStateORM.__table__])
+
+
+def rebuild_balances(conn: Connection):
+	conn.execute(ledger.clear())
+	conn.execute(ledger.recompute())
+
+
+# Номер версии -> (описание, функция). Новые миграции добавляются в конец списка
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+	(1, "Столбец users.name_key", migrate_user_name_key),
+	(2, "Вторичные индексы", create_secondary_indexes),
+	(3, "Заполнение таблицы balances", rebuild_balances),
+	(4, "Столбец messages.status", migrate_message_status),
+	(5, "Столбец users.expiry_notified_for", migrate_user_expiry_notified_for),
+	(6, "Таблица fsm_states", create_fsm_states),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: Connection) -> int:
+	# Прямой запрос вместо инспектора: при каждом запуске это единственное обращение к схеме
+	try:
+		version = conn.execute(select(SchemaVersionORM.version)).scalar()
+	except OperationalError:
+		return 0  # Таблицы ещё нет - новая или очень старая база
+	return version or 0
+
+
+def set_schema_version(conn: Connection, version: int):
+	query = insert(SchemaVersionORM).values(id=1, version=version)
+	query = query.on_conflict_do_update(index_elements=[SchemaVersionORM.id], set_={"version": version})
+	conn.execute(query)
+
+
+def run_migrations(conn: Connection):
+	current = get_schema_version(conn)
+	if current >= SCHEMA_VERSION:
+		log.debug("Схема базы данных актуальна: версия {}", current)
+		return
+
+	for version, description, migrate in MIGRATIONS:
+		if version <= current:
+			continue
+		log.info(f"Миграция базы данных до версии {version}: {description}")
+		migrate(conn)
+
+	set_schema_version(conn, SCHEMA_VERSION)
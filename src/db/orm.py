@@ -1,7 +1,15 @@
-from sqlalchemy import BigInteger, String, ForeignKey
-from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column
+from sqlalchemy import BigInteger, String, ForeignKey, Index, JSON
+from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column, validates
 from datetime import datetime, date
 
+from src.core.dto import MessageStatus
+
+
+def normalize_name(name: str) -> str:
+	# Ключ для регистронезависимого сравнения имён. casefold() в отличие от NOCASE в SQLite
+	# корректно работает и для кириллицы
+	return name.strip().casefold()
+
 
 class Base(DeclarativeBase):
 
@@ -23,9 +31,23 @@ class UserORM(Base):
 
 	id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
 	name: Mapped[str] = mapped_column(String(25))
+	name_key: Mapped[str | None] = mapped_column(String(25))
 	billing_start_date: Mapped[date] = mapped_column(default=date.today)
 	billing_end_date: Mapped[date] = mapped_column(default=date.today)
 	blocked: Mapped[bool] = mapped_column(default=False)
+	# billing_end_date, о котором пользователь уже предупреждён (отметка для напоминаний об окончании)
+	expiry_notified_for: Mapped[date | None] = mapped_column()
+
+	__table_args__ = (
+		Index("ix_users_name_key", "name_key", unique=True),
+		Index("ix_users_billing_start_date", "billing_start_date"),
+		Index("ix_users_billing_end_date", "billing_end_date"),
+	)
+
+	@validates("name")
+	def _set_name_key(self, key, value):
+		self.name_key = normalize_name(value) if value is not None else None
+		return value
 
 
 class TransactionORM(Base):
@@ -37,20 +59,64 @@ class TransactionORM(Base):
 	created_at: Mapped[date] = mapped_column(default=datetime.now)
 	updated_at: Mapped[date] = mapped_column(default=datetime.now)
 
+	__table_args__ = (
+		# Покрывает и выборки по user_id, и историю пользователя в порядке времени
+		Index("ix_transactions_user_id_created_at", "user_id", "created_at"),
+		Index("ix_transactions_created_at", "created_at"),
+	)
+
+
+class BalanceORM(Base):
+	__tablename__ = "balances"
+
+	# Итоги по транзакциям пользователя; поддерживаются BillingRepository, пересчитываются src.db.ledger
+	id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), primary_key=True, autoincrement=False)
+	total_paid: Mapped[int] = mapped_column(default=0)
+	tx_count: Mapped[int] = mapped_column(default=0)
+	last_payment_at: Mapped[date | None] = mapped_column()
+
 
 class MessageORM(Base):
 	__tablename__ = "messages"
 
 	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 	recipient: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
-	text: Mapped[str] = mapped_column(String(250))
+	text: Mapped[str] = mapped_column(String(4096))
+	status: Mapped[MessageStatus | None] = mapped_column(default=MessageStatus.PENDING)
 	created_at: Mapped[date] = mapped_column(default=datetime.now)
 	updated_at: Mapped[date] = mapped_column(default=datetime.now)
 
+	__table_args__ = (
+		Index("ix_messages_recipient", "recipient"),
+		# Очередь рассылки выбирает PENDING по возрастанию ID
+		Index("ix_messages_status_id", "status", "id"),
+	)
+
 
 class RegistrationORM(Base):
 	__tablename__ = "registration"
 
 	id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
 	name: Mapped[str] = mapped_column(String(25))
-	requested_at: Mapped[datetime] = mapped_column(default=datetime.now)
\ No newline at end of file
+	requested_at: Mapped[datetime] = mapped_column(default=datetime.now)
+
+	__table_args__ = (
+		Index("ix_registration_requested_at", "requested_at"),
+	)
+
+
+class FSMStateORM(Base):
+	__tablename__ = "fsm_states"
+
+	id: Mapped[str] = mapped_column(String(255), primary_key=True)
+	state: Mapped[str | None] = mapped_column(String(255))
+	data: Mapped[dict] = mapped_column(JSON, default=dict)
+	updated_at: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
+
+
+class SchemaVersionORM(Base):
+	__tablename__ = "schema_version"
+
+	id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False, default=1)
+	version: Mapped[int] = mapped_column()
+	updated_at: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.core.logger import log
+
+# Сколько разных медленных запросов запоминать, чтобы не повторять для них EXPLAIN
+EXPLAINED_LIMIT = 1000
+# Запросы, для которых EXPLAIN QUERY PLAN имеет смысл (BEGIN, SAVEPOINT, PRAGMA и т.п. пропускаются)
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class QueryStats:
+	"""Число SQL-запросов и суммарное время их выполнения в пределах одного обновления"""
+	__slots__ = ("statements", "seconds")
+
+	def __init__(self):
+		self.statements = 0
+		self.seconds = 0.0
+
+
+# Счётчик текущего обновления; события SQLAlchemy выполняются в том же контексте, что и вызвавший их код
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+	stats = QueryStats()
+	token = current_query_stats.set(stats)
+	try:
+		yield stats
+	finally:
+		current_query_stats.reset(token)
+
+
+def redact_parameters(parameters, executemany: bool) -> str:
+	# В лог попадают только типы значений: параметры содержат имена пользователей и суммы
+	if executemany:
+		return f"<{len(parameters)} наборов параметров>"
+	if isinstance(parameters, dict):
+		return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + "}"
+	return "(" + ", ".join(f"<{type(value).__name__}>" for value in parameters or ()) + ")"
+
+
+def explain_query_plan(conn, statement: str, parameters, executemany: bool) -> str:
+	# Через курсор драйвера напрямую: такой запрос не проходит через события движка и не учитывается в метриках
+	cursor = conn.connection.cursor()
+	try:
+		cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters[0] if executemany else parameters)
+		return "; ".join(row[-1] for row in cursor.fetchall())
+	finally:
+		cursor.close()
+
+
+def install_query_hooks(sync_engine: Engine, slow_threshold: float = 0, explain: bool = False):
+	"""Замер времени каждого запроса через события before/after_cursor_execute.
+	Запросы дольше slow_threshold секунд пишутся в лог с обезличенными параметрами, а при первом
+	появлении такого запроса - и с планом выполнения (видно SCAN без индекса)"""
+	explained: set[str] = set()
+
+	@event.listens_for(sync_engine, "before_cursor_execute")
+	def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("query_started_at", []).append(perf_counter())
+
+	@event.listens_for(sync_engine, "after_cursor_execute")
+	def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+		elapsed = perf_counter() - conn.info["query_started_at"].pop()
+		stats = current_query_stats.get()
+		if stats is not None:
+			stats.statements += 1
+			stats.seconds += elapsed
+
+		if not slow_threshold or elapsed < slow_threshold:
+			return
+
+		log.warning("Медленный запрос ({:.1f} мс): {} | параметры: {}",
+		            elapsed * 1000, statement, redact_parameters(parameters, executemany))
+
+		if not explain or statement in explained or len(explained) >= EXPLAINED_LIMIT:
+			return
+		explained.add(statement)
+		if not statement.lstrip().upper().startswith(EXPLAINABLE):
+			return
+		try:
+			log.warning("План запроса: {}", explain_query_plan(conn, statement, parameters, executemany))
+		except Exception as e:
+			log.error(f"Не удалось получить план запроса: {e}")
+
+	@event.listens_for(sync_engine, "handle_error")
+	def handle_error(context):
+		# after_cursor_execute при ошибке не вызывается - убираем метку начала запроса
+		started = context.connection.info.get("query_started_at") if context.connection is not None else None
+		if started:
+			started.pop()
@@ -1,22 +1,40 @@
-from typing import TypeVar, Generic, Type, List
+import asyncio
+from datetime import date, datetime
+from functools import cached_property
+from itertools import islice
+from typing import TypeVar, Generic, Type, List, Iterable, AsyncIterator, Sequence
 from pydantic import BaseModel
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, func, and_, or_, not_, exists, insert, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
 from src.core.logger import log
 
-from src.db.database import connection
-from src.core.dto import (UserAddDTO, UserDTO, UserUpdateDTO, TransactionAddDTO, TransactionDTO, TransactionUpdateDTO,
-                          RegistrationAddDTO, RegistrationDTO, RegistrationUpdateDTO, MessageAddDTO, MessageDTO,
-                          MessageUpdateDTO)
-from src.db.orm import Base, UserORM, TransactionORM, RegistrationORM, MessageORM
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.db.cache import TTLCache
+from src.db.status_index import StatusIndex
+from src.db.database import connection, after_transaction, unit_of_work, async_session, current_session
+from src.core.dto import (UserAddDTO, UserDTO, UserUpdateDTO, UserStatsDTO, TransactionAddDTO, TransactionDTO,
+                          TransactionUpdateDTO, TransactionWithUserDTO, TransactionStatsDTO, RegistrationAddDTO,
+                          RegistrationDTO, RegistrationUpdateDTO, MessageAddDTO, MessageDTO, MessageUpdateDTO,
+                          BulkResultDTO, BalanceAddDTO, BalanceDTO, BalanceUpdateDTO, MessageStatus, FSMStateAddDTO,
+                          FSMStateDTO, FSMStateUpdateDTO, UserRow, TransactionRow)
+from src.db import ledger
+from src.db.orm import (Base, UserORM, TransactionORM, RegistrationORM, MessageORM, BalanceORM, FSMStateORM,
+                        normalize_name)
 
 AddDTO = TypeVar('AddDTO', bound=BaseModel)
 DTO = TypeVar('DTO', bound=BaseModel)
 DTOUpdate = TypeVar('DTOUpdate', bound=BaseModel)
 ORM = TypeVar('ORM', bound=Base)
 
+# Максимальное число параметров в одном IN (...), чтобы не упереться в лимит переменных SQLite
+IN_CHUNK_SIZE = 500
+# Размер пачки по умолчанию для add_many/upsert_many
+BULK_CHUNK_SIZE = 500
+
 
 class AbstractRepository(Generic[AddDTO, DTO, ORM, DTOUpdate]):
 	def __init__(self, add_dto_model: Type[DTO], dto_model: Type[DTO], update_dto_model: Type[DTOUpdate], orm_model: Type[ORM]):
@@ -24,17 +42,21 @@ class AbstractRepository(Generic[AddDTO, DTO, ORM, DTOUpdate]):
 		self.dto_model = dto_model
 		self.update_dto_model = update_dto_model
 		self.orm_model = orm_model
+		self._count: int | None = None  # Кэш для count(), сбрасывается при добавлении/удалении и после коммита
+
+	# Класс строки для быстрого пути чтения (get_page_rows, stream_rows); поля = __slots__
+	row_model: type | None = None
 
 
 	@connection
 	async def add(self, dto: AddDTO, session: AsyncSession) -> int | None:
-		log.debug(f"Добавление записи: '{dto}' в таблицу '{self.orm_model.__tablename__}'")
+		log.debug("Добавление записи: '{}' в таблицу '{}'", dto, self.orm_model.__tablename__)
 		try:
 			orm_instance = self.orm_model(**dto.model_dump())
 			session.add(orm_instance)
-			await session.flush()  # Получаем ID без коммита
-			await session.commit()
-			log.debug(f"OK, добавлен ID: {orm_instance.id}")
+			await session.flush()  # Получаем ID; коммит выполняет единица работы (unit_of_work)
+			self._invalidate_count()
+			log.debug("OK, добавлен ID: {}", orm_instance.id)
 			return orm_instance.id
 		except IntegrityError:
 			log.error(f"Ошибка: запись с таким ключом уже существует")
@@ -43,15 +65,87 @@ class AbstractRepository(Generic[AddDTO, DTO, ORM, DTOUpdate]):
 			log.error(f"Ошибка: {e}")
 			return None
 
+	def _orm_values(self, dto: AddDTO) -> dict:
+		# Значения столбцов берутся из ORM-объекта, чтобы отработали @validates (например, users.name_key)
+		orm_values = vars(self.orm_model(**dto.model_dump()))
+		columns = self.orm_model.__table__.columns
+		return {column.key: orm_values[column.key] for column in columns if column.key in orm_values}
+
+	def _insert_statement(self, upsert: bool, columns: Iterable[str]):
+		table = self.orm_model.__table__
+		if not upsert:
+			return insert(table)
+		statement = sqlite_insert(table)
+		return statement.on_conflict_do_update(
+			index_elements=[table.c.id],
+			set_={key: statement.excluded[key] for key in columns if key != "id"}
+		)
+
+	async def _bulk_write(self, dtos: Iterable[AddDTO], chunk_size: int, upsert: bool,
+	                      session: AsyncSession) -> BulkResultDTO:
+		table = self.orm_model.__table__
+		result = BulkResultDTO()
+		dtos = iter(enumerate(dtos))
+
+		while chunk := list(islice(dtos, chunk_size)):
+			rows = []
+			for row_number, dto in chunk:
+				try:
+					rows.append((row_number, self._orm_values(dto)))
+				except Exception as e:
+					result.errors[row_number] = str(e)
+			if not rows:
+				continue
+
+			log.debug("Запись пачки из {} строк в таблицу '{}' (upsert={})", len(rows), table.name, upsert)
+			statement = self._insert_statement(upsert, rows[0][1].keys())
+			statement = statement.returning(table.c.id, sort_by_parameter_order=True)
+
+			# Сначала вся пачка одним executemany в своей точке сохранения
+			savepoint = await session.begin_nested()
+			try:
+				inserted = await session.execute(statement, [values for _, values in rows])
+				result.inserted_ids.extend(inserted.scalars().all())
+				await savepoint.commit()
+				continue
+			except IntegrityError:
+				await savepoint.rollback()
+
+			# Пачка упала на ограничении - повторяем построчно, чтобы найти конфликтующие строки
+			for row_number, values in rows:
+				savepoint = await session.begin_nested()
+				try:
+					inserted = await session.execute(statement, values)
+					result.inserted_ids.append(inserted.scalar_one())
+					await savepoint.commit()
+				except IntegrityError as e:
+					await savepoint.rollback()
+					result.errors[row_number] = str(e.orig)
+
+		self._invalidate_count()
+		log.debug("OK, записано: {}, ошибок: {}", len(result.inserted_ids), len(result.errors))
+		return result
+
+	@connection
+	async def add_many(self, dtos: Iterable[AddDTO], chunk_size: int = BULK_CHUNK_SIZE,
+	                   session: AsyncSession = None) -> BulkResultDTO:
+		return await self._bulk_write(dtos, chunk_size, upsert=False, session=session)
+
+	@connection
+	async def upsert_many(self, dtos: Iterable[AddDTO], chunk_size: int = BULK_CHUNK_SIZE,
+	                      session: AsyncSession = None) -> BulkResultDTO:
+		# INSERT ... ON CONFLICT(id) DO UPDATE: существующие по ID записи обновляются
+		return await self._bulk_write(dtos, chunk_size, upsert=True, session=session)
+
 	@connection
 	async def update(self, record_id: int, update_dto: DTOUpdate, session: AsyncSession) -> bool:
-		log.debug(f"Обновление записи с ID={record_id}: в таблице '{self.orm_model.__tablename__}'")
+		log.debug("Обновление записи с ID={}: в таблице '{}'", record_id, self.orm_model.__tablename__)
 		try:
 			orm_object = await session.get(self.orm_model, record_id)
 			update_data = update_dto.model_dump(exclude_unset=True)
 			for key, value in update_data.items():
 				setattr(orm_object, key, value)
-			await session.commit()
+			await session.flush()
 			await session.refresh(orm_object)
 			log.debug("OK")
 			return True
@@ -65,10 +159,10 @@ class AbstractRepository(Generic[AddDTO, DTO, ORM, DTOUpdate]):
 	@connection
 	async def delete(self, record_id: int, session: AsyncSession) -> bool:
 		try:
-			log.debug(f"Удаление записи c ID={record_id} из таблицы: '{self.orm_model.__tablename__}'")
+			log.debug("Удаление записи c ID={} из таблицы: '{}'", record_id, self.orm_model.__tablename__)
 			query = delete(self.orm_model).where(self.orm_model.id == record_id)
 			result = await session.execute(query)
-			await session.commit()
+			self._invalidate_count()
 			log.debug("OK")
 			return result.rowcount > 0
 		except Exception as e:
@@ -77,7 +171,7 @@ class AbstractRepository(Generic[AddDTO, DTO, ORM, DTOUpdate]):
 
 	@connection
 	async def get_all(self, session: AsyncSession) -> List[DTO] | None:
-		log.debug(f"Получение всех записей из таблицы: '{self.orm_model.__tablename__}'")
+		log.debug("Получение всех записей из таблицы: '{}'", self.orm_model.__tablename__)
 		query = select(self.orm_model)
 		result = await session.execute(query)
 		orm_objects = result.scalars().all()
@@ -87,27 +181,449 @@ class AbstractRepository(Generic[AddDTO, DTO, ORM, DTOUpdate]):
 
 	@connection
 	async def get_by_id(self, record_id: int, session: AsyncSession) -> DTO | None:
-		log.debug(f"Получение записи с ID='{record_id} из таблицы '{self.orm_model.__tablename__}'")
+		log.debug("Получение записи с ID='{} из таблицы '{}'", record_id, self.orm_model.__tablename__)
 		orm_object = await session.get(self.orm_model, record_id)
 		if not orm_object:
 			return None
 		dto_object = self.dto_model.model_validate(orm_object)
 		return dto_object
 
+	@staticmethod
+	def _page_query(query, id_column, after_id: int | None, before_id: int | None, limit: int):
+		# Keyset-пагинация: страница начинается сразу за известным ID, OFFSET не используется.
+		# При переходе назад выбираем в обратном порядке, вызывающий код разворачивает результат
+		if before_id is not None:
+			return query.where(id_column < before_id).order_by(id_column.desc()).limit(limit)
+		if after_id is not None:
+			query = query.where(id_column > after_id)
+		return query.order_by(id_column).limit(limit)
+
+	@connection
+	async def get_page(self, after_id: int | None = None, limit: int = 20, before_id: int | None = None,
+	                   session: AsyncSession = None) -> List[DTO]:
+		log.debug("Получение страницы из таблицы '{}': after_id={}, before_id={}, limit={}",
+		          self.orm_model.__tablename__, after_id, before_id, limit)
+		query = self._page_query(select(self.orm_model), self.orm_model.id, after_id, before_id, limit)
+		result = await session.execute(query)
+		orm_objects = result.scalars().all()
+		if before_id is not None:
+			orm_objects = list(reversed(orm_objects))
+		return [self.dto_model.model_validate(obj) for obj in orm_objects]
+
+	def _rows_query(self):
+		# Только нужные столбцы: без сборки ORM-объектов и identity map
+		return select(*(getattr(self.orm_model, field) for field in self.row_model.__slots__))
+
+	@connection
+	async def get_page_rows(self, after_id: int | None = None, limit: int = 20, before_id: int | None = None,
+	                        session: AsyncSession = None) -> list:
+		"""Как get_page, но возвращает лёгкие строки row_model вместо DTO - для экранов-списков"""
+		log.debug("Получение строк из таблицы '{}': after_id={}, before_id={}, limit={}",
+		          self.orm_model.__tablename__, after_id, before_id, limit)
+		query = self._page_query(self._rows_query(), self.orm_model.id, after_id, before_id, limit)
+		result = await session.execute(query)
+		rows = [self.row_model(*row) for row in result]
+		if before_id is not None:
+			rows.reverse()
+		return rows
+
+	async def stream_rows(self, batch_size: int = 1000) -> AsyncIterator[Sequence[tuple]]:
+		"""Все строки _rows_query() по возрастанию ID пачками по batch_size, через курсор на стороне
+		драйвера (yield_per): в памяти одновременно находится только одна пачка. Читает в отдельной сессии,
+		чтобы долгий курсор не держал транзакцию вызывающего кода"""
+		log.debug("Потоковое чтение таблицы '{}' пачками по {}", self.orm_model.__tablename__, batch_size)
+		query = self._rows_query().order_by(self.orm_model.id).execution_options(yield_per=batch_size)
+		async with async_session() as session:
+			result = await session.stream(query)
+			async for partition in result.partitions():
+				yield partition
+
+	def _reset_count(self):
+		self._count = None
+
+	def _invalidate_count(self):
+		# Сбрасываем сразу и ещё раз после коммита: count() до коммита (из другой сессии) вернул бы
+		# в кэш старое значение, которое иначе жило бы до следующего добавления/удаления
+		self._reset_count()
+		after_transaction(self._reset_count)
+
+	async def count(self) -> int:
+		if self._count is None:
+			self._count = await self._count_query()
+		return self._count
+
+	@connection
+	async def _count_query(self, session: AsyncSession) -> int:
+		log.debug("Подсчёт записей в таблице '{}'", self.orm_model.__tablename__)
+		result = await session.execute(select(func.count()).select_from(self.orm_model))
+		return result.scalar()
+
+	@connection
+	async def get_many_by_ids(self, record_ids: Iterable[int], session: AsyncSession) -> List[DTO]:
+		ids = list(dict.fromkeys(record_ids))  # Убираем дубликаты, сохраняя порядок
+		log.debug("Получение {} записей по ID из таблицы '{}'", len(ids), self.orm_model.__tablename__)
+		dto_objects = []
+		for start in range(0, len(ids), IN_CHUNK_SIZE):
+			query = select(self.orm_model).where(self.orm_model.id.in_(ids[start:start + IN_CHUNK_SIZE]))
+			result = await session.execute(query)
+			dto_objects.extend(self.dto_model.model_validate(obj) for obj in result.scalars().all())
+		return dto_objects
+
 
 class UserRepository(AbstractRepository[UserAddDTO, UserDTO, UserUpdateDTO, UserORM]):
+	row_model = UserRow
+
 	def __init__(self):
 		super().__init__(UserAddDTO, UserDTO, UserUpdateDTO, UserORM)
+		# Статусы всех пользователей в памяти: экран статистики не читает таблицу users
+		self.status_index = StatusIndex()
+		self._status_index_lock = asyncio.Lock()
+
+	@cached_property
+	def cache(self) -> TTLCache:
+		# Read-through кэш для get_by_id: /start и любое сообщение пользователя запрашивают его профиль.
+		# Создаётся при первом обращении, чтобы импорт репозиториев не читал настройки
+		cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+		metrics.register_cache("users", cache.stats)
+		return cache
+
+	async def get_by_id(self, record_id: int) -> UserDTO | None:
+		found, user = self.cache.get(record_id)
+		if found:
+			return user
+		# Если за время чтения запись изменили (сброс кэша), прочитанное значение уже устарело.
+		# Чтение в уже открытой транзакции видит её снимок, сделанный, возможно, до чужого коммита
+		# и сброса кэша, - такое значение в кэш не кладётся
+		session = current_session.get()
+		if session is not None and session.in_transaction():
+			return await super().get_by_id(record_id)
+		generation = self.cache.generation
+		user = await super().get_by_id(record_id)
+		self.cache.set(record_id, user, generation)
+		return user
+
+	def _invalidate(self, record_id: int):
+		# Сбрасываем сразу и ещё раз после коммита/отката: иначе параллельное чтение до коммита
+		# вернуло бы в кэш старое значение, а чтение внутри откаченной транзакции - несуществующее.
+		# Вызывается внутри единицы работы записи, иначе after_transaction сработал бы до неё
+		self.cache.invalidate(record_id)
+		self.status_index.mark_dirty((record_id,))
+		after_transaction(lambda: self.cache.invalidate(record_id))
+		after_transaction(lambda: self.status_index.mark_dirty((record_id,)))
+
+	async def add(self, dto: UserAddDTO) -> int | None:
+		async with unit_of_work():
+			self._invalidate(dto.id)
+			return await super().add(dto)
+
+	async def update(self, record_id: int, update_dto: UserUpdateDTO) -> bool:
+		async with unit_of_work():
+			self._invalidate(record_id)
+			if update_dto.id is not None:
+				self._invalidate(update_dto.id)
+			return await super().update(record_id, update_dto)
+
+	async def delete(self, record_id: int) -> bool:
+		async with unit_of_work():
+			self._invalidate(record_id)
+			return await super().delete(record_id)
+
+	def _invalidate_all(self):
+		self.cache.clear()
+		self.status_index.mark_stale()
+		after_transaction(self.cache.clear)
+		after_transaction(self.status_index.mark_stale)
+
+	async def add_many(self, dtos: Iterable[UserAddDTO], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResultDTO:
+		async with unit_of_work():
+			self._invalidate_all()
+			return await super().add_many(dtos, chunk_size)
+
+	async def upsert_many(self, dtos: Iterable[UserAddDTO], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResultDTO:
+		async with unit_of_work():
+			self._invalidate_all()
+			return await super().upsert_many(dtos, chunk_size)
+
+	@connection
+	async def exists_by_name(self, name: str, session: AsyncSession) -> bool:
+		# Поиск по уникальному индексу ix_users_name_key, без загрузки таблицы
+		log.debug("Проверка наличия пользователя с именем '{}'", name)
+		query = select(exists().where(UserORM.name_key == normalize_name(name)))
+		result = await session.execute(query)
+		return result.scalar()
+
+	@connection
+	async def get_expiring(self, date_from: date, date_to: date, after: tuple[date, int] | None = None,
+	                       limit: int = 500, session: AsyncSession = None) -> List[UserDTO]:
+		# Диапазон по ix_users_billing_end_date, keyset по (billing_end_date, id). Пропускаются
+		# заблокированные и уже предупреждённые о текущей дате окончания
+		query = select(UserORM).where(
+			UserORM.billing_end_date.between(date_from, date_to),
+			not_(UserORM.blocked),
+			or_(UserORM.expiry_notified_for.is_(None), UserORM.expiry_notified_for != UserORM.billing_end_date),
+		)
+		if after is not None:
+			after_date, after_id = after
+			query = query.where(or_(
+				UserORM.billing_end_date > after_date,
+				and_(UserORM.billing_end_date == after_date, UserORM.id > after_id)
+			))
+		query = query.order_by(UserORM.billing_end_date, UserORM.id).limit(limit)
+		result = await session.execute(query)
+		return [self.dto_model.model_validate(obj) for obj in result.scalars().all()]
+
+	@connection
+	async def mark_expiry_notified(self, user_ids: List[int], session: AsyncSession):
+		for start in range(0, len(user_ids), IN_CHUNK_SIZE):
+			query = (
+				update(UserORM)
+				.where(UserORM.id.in_(user_ids[start:start + IN_CHUNK_SIZE]))
+				.values(expiry_notified_for=UserORM.billing_end_date)
+			)
+			await session.execute(query)
+
+	@connection
+	async def _sync_status_index(self, session: AsyncSession) -> StatusIndex:
+		"""Перечитывает из базы изменённых пользователей, а после массовых операций - всю таблицу"""
+		index = self.status_index
+		async with self._status_index_lock:
+			if not index.loaded:
+				log.debug("Загрузка индекса статусов пользователей")
+				generation = index.begin_load()
+				query = (
+					select(UserORM.id, UserORM.billing_end_date, UserORM.blocked)
+					.order_by(UserORM.billing_end_date, UserORM.id)
+				)
+				index.load(await session.execute(query), generation)
+				return index
+
+			dirty = list(index.take_dirty())
+			for start in range(0, len(dirty), IN_CHUNK_SIZE):
+				chunk = dirty[start:start + IN_CHUNK_SIZE]
+				query = select(UserORM.id, UserORM.billing_end_date, UserORM.blocked).where(UserORM.id.in_(chunk))
+				for user_id in chunk:
+					index.remove(user_id)
+				for user_id, end_date, blocked in await session.execute(query):
+					index.put(user_id, end_date, blocked)
+		return index
+
+	async def load_status_index(self):
+		self.status_index.mark_stale()
+		index = await self._sync_status_index()
+		log.info("Индекс статусов пользователей загружен: {} записей", len(index))
+
+	async def get_status_stats(self, on_date: date | None = None) -> UserStatsDTO:
+		index = await self._sync_status_index()
+		return index.stats(on_date or date.today())
+
+	async def get_expired_ids(self, on_date: date | None = None, offset: int = 0,
+	                          limit: int | None = None) -> List[int]:
+		"""ID незаблокированных пользователей, чья подписка истекла к on_date (по умолчанию - сегодня),
+		от недавно истёкших к давним"""
+		index = await self._sync_status_index()
+		return index.expired_ids(on_date or date.today(), offset, limit)
 
 
 class BillingRepository(AbstractRepository[TransactionAddDTO, TransactionDTO, TransactionUpdateDTO, TransactionORM]):
+	row_model = TransactionRow
+
 	def __init__(self):
 		super().__init__(TransactionAddDTO, TransactionDTO, TransactionUpdateDTO, TransactionORM)
 
+	# Все изменения транзакций сразу отражаются в таблице balances в той же транзакции БД
+
+	@connection
+	async def add(self, dto: TransactionAddDTO, session: AsyncSession) -> int | None:
+		tx_id = await super().add(dto)
+		if tx_id is not None:
+			await session.execute(ledger.apply_payment(dto.user_id, dto.amount, dto.created_at))
+		return tx_id
+
+	@connection
+	async def update(self, record_id: int, update_dto: TransactionUpdateDTO, session: AsyncSession) -> bool:
+		tx = await session.get(TransactionORM, record_id)
+		old_user_id = tx.user_id if tx else None
+		success = await super().update(record_id, update_dto)
+		if success:
+			await self._recompute_balances({old_user_id, update_dto.user_id} - {None})
+		return success
+
+	@connection
+	async def delete(self, record_id: int, session: AsyncSession) -> bool:
+		tx = await session.get(TransactionORM, record_id)
+		if tx:
+			user_id, amount = tx.user_id, tx.amount
+		success = await super().delete(record_id)
+		if success and tx:
+			await session.execute(ledger.revert_payment(user_id, amount))
+		return success
+
+	async def _bulk_with_balances(self, write, dtos: Iterable[TransactionAddDTO], chunk_size: int,
+	                              user_ids: set[int] | None = None) -> BulkResultDTO:
+		user_ids = set(user_ids or ())
+
+		def collect_user_ids():
+			for dto in dtos:
+				user_ids.add(dto.user_id)
+				yield dto
+
+		# Пачки и пересчёт балансов - в одной единице работы
+		async with unit_of_work():
+			result = await write(collect_user_ids(), chunk_size)
+			await self._recompute_balances(user_ids)
+		return result
+
+	async def add_many(self, dtos: Iterable[TransactionAddDTO], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResultDTO:
+		return await self._bulk_with_balances(super().add_many, dtos, chunk_size)
+
+	async def upsert_many(self, dtos: Iterable[TransactionDTO], chunk_size: int = BULK_CHUNK_SIZE) -> BulkResultDTO:
+		# Существующая транзакция может перейти к другому пользователю - пересчитывается и баланс прежнего
+		dtos = list(dtos)
+		async with unit_of_work():
+			previous_user_ids = await self._user_ids_of([dto.id for dto in dtos])
+			return await self._bulk_with_balances(super().upsert_many, dtos, chunk_size, previous_user_ids)
+
+	@connection
+	async def _user_ids_of(self, tx_ids: List[int], session: AsyncSession) -> set[int]:
+		user_ids = set()
+		for start in range(0, len(tx_ids), IN_CHUNK_SIZE):
+			query = select(TransactionORM.user_id).where(TransactionORM.id.in_(tx_ids[start:start + IN_CHUNK_SIZE]))
+			user_ids.update((await session.execute(query)).scalars())
+		return user_ids
+
+	@connection
+	async def _recompute_balances(self, user_ids: Iterable[int], session: AsyncSession):
+		user_ids = list(user_ids)
+		log.debug("Пересчёт баланса {} пользователей", len(user_ids))
+		for start in range(0, len(user_ids), IN_CHUNK_SIZE):
+			chunk = user_ids[start:start + IN_CHUNK_SIZE]
+			await session.execute(ledger.clear(chunk))
+			await session.execute(ledger.recompute(chunk))
+
+	@connection
+	async def rebuild_balances(self, session: AsyncSession) -> int:
+		# Полный пересчёт за один проход по transactions (GROUP BY по индексу user_id)
+		log.info("Пересчёт таблицы balances по всем транзакциям")
+		await session.execute(ledger.clear())
+		await session.execute(ledger.recompute())
+		result = await session.execute(select(func.count()).select_from(BalanceORM))
+		return result.scalar()
+
+	@connection
+	async def get_stats(self, session: AsyncSession) -> TransactionStatsDTO:
+		# Итоги читаются из balances (строка на пользователя), а не агрегируются по всей истории транзакций
+		log.debug("Подсчёт количества и суммы транзакций")
+		query = select(
+			func.coalesce(func.sum(BalanceORM.tx_count), 0),
+			func.coalesce(func.sum(BalanceORM.total_paid), 0)
+		)
+		result = await session.execute(query)
+		count, amount = result.one()
+		return TransactionStatsDTO(count=count, amount=amount)
+
+	@staticmethod
+	def _with_user_query():
+		# LEFT JOIN: транзакции удалённых пользователей тоже должны попадать в выборку
+		return select(TransactionORM, UserORM.name).outerjoin(UserORM, UserORM.id == TransactionORM.user_id)
+
+	def _rows_query(self):
+		return select(
+			TransactionORM.id, TransactionORM.user_id, TransactionORM.amount, TransactionORM.created_at,
+			TransactionORM.updated_at, UserORM.name
+		).outerjoin(UserORM, UserORM.id == TransactionORM.user_id)
+
+	@staticmethod
+	def _to_dto_with_user(orm_object: TransactionORM, user_name: str | None) -> TransactionWithUserDTO:
+		dto_object = TransactionWithUserDTO.model_validate(orm_object)
+		return dto_object.model_copy(update={"user_name": user_name})
+
+	@connection
+	async def get_page_with_user_name(self, after_id: int | None = None, limit: int = 20, before_id: int | None = None,
+	                                  session: AsyncSession = None) -> List[TransactionWithUserDTO]:
+		log.debug("Получение страницы из таблицы '{}' с именами пользователей: after_id={}, before_id={}, limit={}",
+		          self.orm_model.__tablename__, after_id, before_id, limit)
+		query = self._page_query(self._with_user_query(), TransactionORM.id, after_id, before_id, limit)
+		result = await session.execute(query)
+		rows = result.all()
+		if before_id is not None:
+			rows = list(reversed(rows))
+		return [self._to_dto_with_user(tx, name) for tx, name in rows]
+
+	@connection
+	async def get_by_id_with_user_name(self, record_id: int, session: AsyncSession) -> TransactionWithUserDTO | None:
+		log.debug("Получение записи с ID={} из таблицы '{}' с именем пользователя", record_id, self.orm_model.__tablename__)
+		query = self._with_user_query().where(TransactionORM.id == record_id)
+		result = await session.execute(query)
+		row = result.first()
+		if not row:
+			return None
+		tx, name = row
+		return self._to_dto_with_user(tx, name)
+
+
+class BalanceRepository(AbstractRepository[BalanceAddDTO, BalanceDTO, BalanceUpdateDTO, BalanceORM]):
+	def __init__(self):
+		super().__init__(BalanceAddDTO, BalanceDTO, BalanceUpdateDTO, BalanceORM)
+
 
 class MessageRepository(AbstractRepository[MessageAddDTO, MessageDTO, MessageUpdateDTO, MessageORM]):
 	def __init__(self):
-		super().__init__(TransactionAddDTO, TransactionDTO, TransactionUpdateDTO, TransactionORM)
+		super().__init__(MessageAddDTO, MessageDTO, MessageUpdateDTO, MessageORM)
+
+	@connection
+	async def enqueue_broadcast(self, text: str, session: AsyncSession) -> int:
+		# INSERT ... SELECT: очередь для всех незаблокированных пользователей без загрузки их в память
+		log.debug("Постановка рассылки в очередь")
+		now = datetime.now()
+		recipients = select(
+			UserORM.id,
+			literal(text, MessageORM.text.type),
+			literal(MessageStatus.PENDING, MessageORM.status.type),
+			literal(now, MessageORM.created_at.type),
+			literal(now, MessageORM.updated_at.type),
+		).where(not_(UserORM.blocked))
+		query = insert(MessageORM).from_select(["recipient", "text", "status", "created_at", "updated_at"], recipients)
+		result = await session.execute(query)
+		self._invalidate_count()
+		log.debug("OK, в очереди: {}", result.rowcount)
+		return result.rowcount
+
+	@connection
+	async def get_pending(self, limit: int, session: AsyncSession) -> List[MessageDTO]:
+		query = (
+			select(MessageORM)
+			.where(MessageORM.status == MessageStatus.PENDING)
+			.order_by(MessageORM.id)
+			.limit(limit)
+		)
+		result = await session.execute(query)
+		return [self.dto_model.model_validate(obj) for obj in result.scalars().all()]
+
+	@connection
+	async def set_statuses(self, statuses: dict[int, MessageStatus], session: AsyncSession):
+		# Одно UPDATE на каждый встретившийся статус, а не на каждое сообщение
+		now = datetime.now()
+		by_status: dict[MessageStatus, list[int]] = {}
+		for message_id, status in statuses.items():
+			by_status.setdefault(status, []).append(message_id)
+		for status, message_ids in by_status.items():
+			for start in range(0, len(message_ids), IN_CHUNK_SIZE):
+				query = (
+					update(MessageORM)
+					.where(MessageORM.id.in_(message_ids[start:start + IN_CHUNK_SIZE]))
+					.values(status=status, updated_at=now)
+				)
+				await session.execute(query)
+
+	@connection
+	async def get_status_counts(self, session: AsyncSession) -> dict[MessageStatus, int]:
+		query = (
+			select(MessageORM.status, func.count())
+			.where(MessageORM.status.is_not(None))
+			.group_by(MessageORM.status)
+		)
+		result = await session.execute(query)
+		return {status: count for status, count in result.all()}
 
 
 class RegistrationRepo(AbstractRepository[RegistrationAddDTO, RegistrationDTO, RegistrationUpdateDTO, RegistrationORM]):
@@ -115,8 +631,29 @@ class RegistrationRepo(AbstractRepository[RegistrationAddDTO, RegistrationDTO, R
 		super().__init__(RegistrationAddDTO, RegistrationDTO, RegistrationUpdateDTO, RegistrationORM)
 
 
+class FSMStateRepository(AbstractRepository[FSMStateAddDTO, FSMStateDTO, FSMStateUpdateDTO, FSMStateORM]):
+	def __init__(self):
+		super().__init__(FSMStateAddDTO, FSMStateDTO, FSMStateUpdateDTO, FSMStateORM)
+
+	@connection
+	async def save_many(self, records: List[FSMStateAddDTO], session: AsyncSession):
+		# Пустые записи (нет ни состояния, ни данных) удаляются, чтобы таблица не росла от завершённых диалогов
+		filled = [record for record in records if record.state is not None or record.data]
+		empty_ids = [record.id for record in records if record.state is None and not record.data]
+		if filled:
+			# Одним INSERT ... ON CONFLICT без точек сохранения upsert_many: запись идёт перед коммитом
+			# транзакции обновления, и каждый лишний запрос удлиняет удержание блокировки записи
+			values = [self._orm_values(record) for record in filled]
+			await session.execute(self._insert_statement(True, values[0].keys()), values)
+		for start in range(0, len(empty_ids), IN_CHUNK_SIZE):
+			query = delete(FSMStateORM).where(FSMStateORM.id.in_(empty_ids[start:start + IN_CHUNK_SIZE]))
+			await session.execute(query)
+		self._invalidate_count()
+
 
 user_repo = UserRepository()
 billing_repo = BillingRepository()
+balance_repo = BalanceRepository()
 messages_repo = MessageRepository()
 registration_repo = RegistrationRepo()
+fsm_state_repo = FSMStateRepository()
@@ -0,0 +1,111 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Iterable
+
+from src.core.dto import UserStatsDTO
+
+
+class StatusIndex:
+	"""Индекс статусов пользователей в памяти.
+
+	Незаблокированные пользователи хранятся в двух параллельных массивах, отсортированных по паре
+	(порядковый номер даты окончания подписки, ID), заблокированные - отдельным множеством ID.
+	Словарь ID -> дата окончания позволяет найти позицию пользователя бинарным поиском при изменении.
+	Тогда на любую дату X: истёкшие - префикс массива до bisect_left(X), активные - остаток,
+	и подсчёт стоит O(log n) без обращения к SQLite. Логика статусов совпадает с UserAddDTO.status.
+
+	Индекс не знает о транзакциях: репозиторий помечает изменённые ID (mark_dirty) или весь индекс
+	(mark_stale), а перед чтением перечитывает их из базы"""
+
+	def __init__(self):
+		self._end_dates = array("l")  # date.toordinal(), по возрастанию
+		self._ids = array("q")  # по возрастанию внутри одной даты
+		self._end_by_id: dict[int, int] = {}
+		self._blocked: set[int] = set()
+		self._dirty: set[int] = set()
+		self._generation = 0  # Растёт при mark_stale: загрузка, начатая до него, индекс не актуализирует
+		self.loaded = False
+
+	def __len__(self) -> int:
+		return len(self._ids) + len(self._blocked)
+
+	def begin_load(self) -> int:
+		"""Вызывается до чтения строк для load(). Изменения, отмеченные после него, не теряются"""
+		self._dirty.clear()
+		return self._generation
+
+	def load(self, rows: Iterable[tuple[int, date, bool]], generation: int):
+		"""Полная загрузка из строк (id, billing_end_date, blocked), упорядоченных по (billing_end_date, id).
+		Если за время чтения индекс снова устарел (коммит массовой записи), он остаётся неактуальным"""
+		self._end_dates = array("l")
+		self._ids = array("q")
+		self._end_by_id = {}
+		self._blocked = set()
+		for user_id, end_date, blocked in rows:
+			if blocked:
+				self._blocked.add(user_id)
+			else:
+				ordinal = end_date.toordinal()
+				self._end_dates.append(ordinal)
+				self._ids.append(user_id)
+				self._end_by_id[user_id] = ordinal
+		self.loaded = generation == self._generation
+
+	def _position(self, user_id: int, ordinal: int) -> int:
+		# Позиция пары (ordinal, user_id): сначала диапазон даты, внутри него - ID
+		low = bisect_left(self._end_dates, ordinal)
+		high = bisect_right(self._end_dates, ordinal, low)
+		return bisect_left(self._ids, user_id, low, high)
+
+	def remove(self, user_id: int):
+		if user_id in self._blocked:
+			self._blocked.discard(user_id)
+			return
+		ordinal = self._end_by_id.pop(user_id, None)
+		if ordinal is None:
+			return
+		position = self._position(user_id, ordinal)
+		del self._end_dates[position]
+		del self._ids[position]
+
+	def put(self, user_id: int, end_date: date, blocked: bool):
+		self.remove(user_id)
+		if blocked:
+			self._blocked.add(user_id)
+			return
+		ordinal = end_date.toordinal()
+		position = self._position(user_id, ordinal)
+		self._end_dates.insert(position, ordinal)
+		self._ids.insert(position, user_id)
+		self._end_by_id[user_id] = ordinal
+
+	def mark_dirty(self, user_ids: Iterable[int]):
+		self._dirty.update(user_ids)
+
+	def mark_stale(self):
+		self.loaded = False
+		self._generation += 1
+
+	def take_dirty(self) -> set[int]:
+		dirty, self._dirty = self._dirty, set()
+		return dirty
+
+	def _expired_count(self, on_date: date) -> int:
+		return bisect_left(self._end_dates, on_date.toordinal())
+
+	def stats(self, on_date: date) -> UserStatsDTO:
+		expired = self._expired_count(on_date)
+		return UserStatsDTO(
+			total=len(self),
+			active=len(self._ids) - expired,
+			expired=expired,
+			blocked=len(self._blocked),
+		)
+
+	def expired_ids(self, on_date: date, offset: int = 0, limit: int | None = None) -> list[int]:
+		"""ID незаблокированных пользователей с истёкшей подпиской, от недавно истёкших к давним:
+		срез [offset, offset + limit) префикса массива без обхода остальных записей"""
+		end = max(self._expired_count(on_date) - offset, 0)
+		start = 0 if limit is None else max(end - limit, 0)
+		return self._ids[start:end].tolist()[::-1]
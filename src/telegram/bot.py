@@ -1,32 +1,135 @@
+import asyncio
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.enums import ParseMode
+from aiohttp import web
 
 from src.core.config import settings
 from src.core.logger import log
-from src.telegram.handlers import user_router, admin_router, user_control_router, billing_control_router
+from src.db.repositories import user_repo
+from src.telegram.broadcast import BroadcastWorker
+from src.telegram.handlers import (user_router, admin_router, user_control_router, billing_control_router,
+                                   broadcast_router)
+from src.telegram.metrics_exporter import MetricsServer, write_metrics_file
+from src.telegram.middlewares import (setup_db_middlewares, MetricsMiddleware, HandlerNameMiddleware,
+                                      ThrottlingMiddleware)
+from src.telegram.reminders import notify_expiring_subscriptions
+from src.telegram.scheduler import Scheduler
+from src.telegram.storage import SQLiteStorage
+from src.telegram.webhook import build_webhook_app
 
 
 class TelegramBot:
 	def __init__(self):
 		log.debug("Инициализация Telegram-бота")
 		self.bot = Bot(token=settings.TELEGRAM_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-		self.dp = Dispatcher(storage=MemoryStorage())
+		if settings.FSM_STORAGE == "sqlite":
+			# За webhook может работать несколько процессов: кэш одного не узнает об изменении состояния
+			# в другом, поэтому в этом режиме состояния всегда читаются из базы
+			cache_size = 0 if settings.TELEGRAM_MODE == "webhook" else settings.FSM_CACHE_SIZE
+			self.storage = SQLiteStorage(cache_size, settings.FSM_CACHE_TTL)
+		else:
+			self.storage = MemoryStorage()
+		self.dp = Dispatcher(storage=self.storage)
 		self.admin_id = settings.TELEGRAM_ADMIN_ID
+		self.broadcast_worker = BroadcastWorker(self.bot)
+		self.scheduler = Scheduler()
+		self.metrics_server = None
+		if settings.METRICS_PORT:
+			self.metrics_server = MetricsServer(settings.METRICS_HOST, settings.METRICS_PORT)
+
+		# Доступен в хэндлерах как аргумент broadcast_worker
+		self.dp["broadcast_worker"] = self.broadcast_worker
 
 		self._register_handlers()
+		self._register_middlewares()
+		self._register_lifecycle()
+
+	def _register_middlewares(self):
+
+		# Ограничение частоты - первым: отброшенные обновления не попадают в метрики хэндлеров
+		self.dp.update.outer_middleware(ThrottlingMiddleware())
+		self.dp.update.outer_middleware(MetricsMiddleware())
+		handler_name_middleware = HandlerNameMiddleware()
+		for router in self.dp.sub_routers:
+			router.message.middleware(handler_name_middleware)
+			router.callback_query.middleware(handler_name_middleware)
+
+		setup_db_middlewares(self.dp, self.bot)
+
+	def use_session(self, session: BaseSession):
+		"""Подменяет сетевую сессию бота (бенчмарки, тесты), сохраняя middleware запросов"""
+		for middleware in self.bot.session.middleware:
+			session.middleware(middleware)
+		self.bot.session = session
 
 	def _register_handlers(self):
 
 		self.dp.include_router(admin_router)
 		self.dp.include_router(user_control_router)
 		self.dp.include_router(billing_control_router)
+		self.dp.include_router(broadcast_router)
 		self.dp.include_router(user_router)
 
+	def _register_lifecycle(self):
+
+		self.dp.startup.register(self._on_startup)
+		self.dp.shutdown.register(self._on_shutdown)
+
+		self.scheduler.add_job(
+			"expiry_reminders",
+			lambda: notify_expiring_subscriptions(self.broadcast_worker),
+			settings.EXPIRY_SCAN_INTERVAL
+		)
+		if settings.METRICS_FILE:
+			self.scheduler.add_job("metrics_file", write_metrics_file, settings.METRICS_FILE_INTERVAL)
+
+	async def _on_startup(self):
+		await user_repo.load_status_index()
+		self.broadcast_worker.start()
+		self.scheduler.start()
+		if self.metrics_server:
+			await self.metrics_server.start()
+
+	async def _on_shutdown(self):
+		if self.metrics_server:
+			await self.metrics_server.stop()
+		await self.scheduler.stop()
+		await self.broadcast_worker.stop()
+
+	async def start(self):
+		if settings.TELEGRAM_MODE == "webhook":
+			await self.start_webhook()
+		else:
+			await self.start_polling()
+
 	async def start_polling(self):
 		log.info("Запуск Telegram-бота в режиме polling...")
+		# getUpdates не работает, пока установлен вебхук (например, после запуска в режиме webhook)
+		await self.bot.delete_webhook()
 		await self.dp.start_polling(self.bot)
 
+	async def start_webhook(self):
+		log.info(f"Запуск Telegram-бота в режиме webhook на {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}...")
+		runner = web.AppRunner(build_webhook_app(self.dp, self.bot))
+		await runner.setup()
+		try:
+			await web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT).start()
+
+			# Без публичного адреса сервер принимает обновления, но в Telegram не регистрируется (локальная отладка)
+			if settings.WEBHOOK_BASE_URL:
+				url = settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH
+				await self.bot.set_webhook(
+					url=url,
+					secret_token=settings.WEBHOOK_SECRET,
+					allowed_updates=self.dp.resolve_used_update_types()
+				)
+				log.info(f"Вебхук зарегистрирован: {url}")
+
+			await asyncio.Event().wait()
+		finally:
+			await runner.cleanup()
 
-telegram_bot = TelegramBot()
@@ -0,0 +1,132 @@
+import asyncio
+from contextlib import suppress
+from time import monotonic
+
+from aiogram import Bot
+from aiogram.exceptions import (TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest, TelegramNetworkError,
+                                TelegramServerError)
+
+from src.core.config import settings
+from src.core.dto import MessageDTO, MessageStatus
+from src.core.logger import log
+from src.db.repositories import messages_repo
+
+
+class RateLimiter:
+	"""Равномерно распределяет вызовы: не чаще rate в секунду. pause() сдвигает все следующие вызовы"""
+
+	def __init__(self, rate: float):
+		self.interval = 1 / rate
+		self._next = 0.0
+
+	async def acquire(self):
+		now = monotonic()
+		slot = max(now, self._next)
+		self._next = slot + self.interval
+		if slot > now:
+			await asyncio.sleep(slot - now)
+
+	def pause(self, seconds: float):
+		self._next = max(self._next, monotonic() + seconds)
+
+
+class BroadcastWorker:
+	"""Фоновая отправка сообщений из таблицы messages со статусом PENDING.
+
+	Очередь хранится в БД, поэтому переживает перезапуск. Отправка идёт пачками с глобальным лимитом
+	и лимитом на чат, итоговый статус каждого сообщения записывается после пачки."""
+
+	def __init__(self, bot: Bot):
+		self.bot = bot
+		self.limiter = RateLimiter(settings.BROADCAST_RATE)
+		self._chat_next: dict[int, float] = {}  # Время, раньше которого в чат писать нельзя
+		self._wakeup = asyncio.Event()
+		self._task: asyncio.Task | None = None
+
+	def start(self):
+		if self._task is None:
+			log.info("Запуск обработчика очереди рассылки")
+			self._task = asyncio.create_task(self._run(), name="broadcast-worker")
+
+	async def stop(self):
+		if self._task is not None:
+			self._task.cancel()
+			with suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
+
+	def wake(self):
+		# Вызывается после постановки сообщений в очередь, чтобы не ждать периодической проверки
+		self._wakeup.set()
+
+	async def _run(self):
+		while True:
+			self._wakeup.clear()
+			try:
+				batch = await messages_repo.get_pending(settings.BROADCAST_BATCH_SIZE)
+			except Exception as e:
+				log.error(f"Ошибка чтения очереди рассылки: {e}")
+				batch = []
+
+			if not batch:
+				with suppress(asyncio.TimeoutError):
+					await asyncio.wait_for(self._wakeup.wait(), settings.BROADCAST_POLL_INTERVAL)
+				continue
+
+			log.debug("Отправка пачки из {} сообщений", len(batch))
+			# _deliver не выбрасывает исключений: любая ошибка отправки становится статусом сообщения
+			statuses = await asyncio.gather(*(self._deliver(message) for message in batch))
+			await self._save_statuses({message.id: status for message, status in zip(batch, statuses)})
+			self._forget_idle_chats()
+
+	async def _save_statuses(self, statuses: dict[int, MessageStatus]):
+		# Пока статусы не записаны, сообщения остаются PENDING и будут отправлены повторно,
+		# поэтому запись повторяется до успеха (например, пока база занята другим процессом)
+		delay = 1.0
+		while True:
+			try:
+				await messages_repo.set_statuses(statuses)
+				return
+			except Exception as e:
+				log.error(f"Ошибка записи статусов рассылки, повтор через {delay:g} с: {e}")
+				await asyncio.sleep(delay)
+				delay = min(delay * 2, 30)
+
+	async def _wait_chat_turn(self, chat_id: int):
+		now = monotonic()
+		slot = max(now, self._chat_next.get(chat_id, 0.0))
+		self._chat_next[chat_id] = slot + settings.BROADCAST_CHAT_INTERVAL
+		if slot > now:
+			await asyncio.sleep(slot - now)
+
+	def _forget_idle_chats(self):
+		now = monotonic()
+		self._chat_next = {chat_id: slot for chat_id, slot in self._chat_next.items() if slot > now}
+
+	async def _deliver(self, message: MessageDTO) -> MessageStatus:
+		for attempt in range(1, settings.BROADCAST_MAX_ATTEMPTS + 1):
+			await self._wait_chat_turn(message.recipient)
+			await self.limiter.acquire()
+			try:
+				await self.bot.send_message(chat_id=message.recipient, text=message.text)
+				return MessageStatus.SENT
+			except TelegramRetryAfter as e:
+				log.warning(f"Превышен лимит Telegram, пауза {e.retry_after} сек")
+				self.limiter.pause(e.retry_after)
+			except TelegramForbiddenError:
+				return MessageStatus.BOT_BLOCKED
+			except TelegramBadRequest as e:
+				if "chat not found" in e.message.lower():
+					return MessageStatus.CHAT_NOT_EXIST
+				log.error(f"Ошибка отправки сообщения {message.id}: {e}")
+				return MessageStatus.ERROR
+			except (TelegramNetworkError, TelegramServerError) as e:
+				backoff = min(2 ** attempt, 30)
+				log.warning(f"Ошибка сети при отправке сообщения {message.id}, повтор через {backoff} сек: {e}")
+				await asyncio.sleep(backoff)
+			except Exception as e:
+				log.error(f"Ошибка отправки сообщения {message.id}: {e}")
+				return MessageStatus.ERROR
+
+		log.error(f"Сообщение {message.id} не отправлено за {settings.BROADCAST_MAX_ATTEMPTS} попыток")
+		return MessageStatus.ERROR
@@ -0,0 +1,53 @@
+import csv
+import io
+from tempfile import SpooledTemporaryFile
+from typing import AsyncGenerator
+
+from aiogram import Bot
+from aiogram.types.input_file import InputFile, DEFAULT_CHUNK_SIZE
+
+from src.core.config import settings
+from src.core.logger import log
+from src.db.repositories import AbstractRepository
+
+
+class SpooledInputFile(InputFile):
+	"""Отправка SpooledTemporaryFile без копирования в bytes: файл читается кусками при загрузке"""
+
+	def __init__(self, file: SpooledTemporaryFile, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+		super().__init__(filename=filename, chunk_size=chunk_size)
+		self.file = file
+
+	async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+		self.file.seek(0)
+		while chunk := self.file.read(self.chunk_size):
+			yield chunk
+
+
+async def export_csv(repo: AbstractRepository) -> tuple[SpooledTemporaryFile, int]:
+	"""Выгружает строки репозитория (столбцы row_model) в CSV. Возвращает файл и число строк.
+
+	Строки читаются потоком пачками по EXPORT_BATCH_SIZE, каждая пачка кодируется в небольшой буфер
+	и дописывается в SpooledTemporaryFile: до EXPORT_SPOOL_SIZE он в памяти, дальше - на диске.
+	Между пачками цикл событий свободен (чтение из курсора асинхронное). Файл закрывает вызывающий"""
+	file = SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_SIZE, mode="w+b")
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+	rows = 0
+	try:
+		# BOM - чтобы Excel открыл кириллицу в UTF-8
+		file.write("\ufeff".encode())
+		writer.writerow(repo.row_model.__slots__)
+		async for batch in repo.stream_rows(settings.EXPORT_BATCH_SIZE):
+			writer.writerows(batch)
+			rows += len(batch)
+			file.write(buffer.getvalue().encode())
+			buffer.seek(0)
+			buffer.truncate()
+		file.write(buffer.getvalue().encode())
+	except Exception:
+		file.close()
+		raise
+
+	log.debug("Экспорт таблицы '{}': {} строк, {} байт", repo.orm_model.__tablename__, rows, file.tell())
+	return file, rows
@@ -4,5 +4,6 @@ from .user import router as user_router
 from .admin import router as admin_router
 from .user_control import router as user_control_router
 from .billing_control import router as billing_control_router
+from .broadcast import router as broadcast_router
 
-__all__ = ["user_router", "admin_router", "user_control_router", "billing_control_router"]
\ No newline at end of file
+__all__ = ["user_router", "admin_router", "user_control_router", "billing_control_router", "broadcast_router"]
\ No newline at end of file
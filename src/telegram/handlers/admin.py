@@ -1,21 +1,44 @@
+import asyncio
+import contextvars
+import csv
+from datetime import date
+from tempfile import SpooledTemporaryFile
+
 from aiogram import Router, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
+from html import escape
 
 from src.core.config import settings
-from src.core.dto import UserStatus
 from src.core.logger import log
+from src.core.metrics import metrics
 from src.db.repositories import user_repo, billing_repo
 from src.telegram.interface import ACTION_CANCELED, ACCESS_DENIED, ADMIN_PANEL_TITLE, USER_CONTROL_TITLE, \
-	BILLING_CONTROL_TITLE, STATS_TEMPLATE
+	BILLING_CONTROL_TITLE, STATS_TEMPLATE, METRICS_TITLE, METRICS_EMPTY, EXPORT_USAGE, EXPORT_STARTED, EXPORT_CAPTION, \
+	EXPORT_BUSY, IMPORT_STARTED, IMPORT_PROGRESS, IMPORT_DONE, IMPORT_FAILED, IMPORT_TOO_LARGE, IMPORT_BUSY, \
+	IMPORT_ERRORS_CAPTION
 
+from src.telegram.export import export_csv, SpooledInputFile
+from src.telegram.importer import CSVImport
 from src.telegram.keyboards import (admin_panel_keyboard, user_control_keyboard, billing_control_keyboard,
                                     to_admin_panel_keyboard)
 
 
 router = Router(name="admin_handler")
 
+# Экспортируемые таблицы (/export <имя>)
+EXPORT_REPOS = {"users": user_repo, "transactions": billing_repo}
+# Одновременно выполняется один экспорт: ограничивает нагрузку на БД и место во временных файлах
+export_lock = asyncio.Lock()
+# Импорт выполняется фоновой задачей, тоже по одному; ссылки на задачи держим до их завершения
+import_lock = asyncio.Lock()
+import_tasks: set[asyncio.Task] = set()
+# Бот может скачать через getFile не больше 20 МБ
+IMPORT_MAX_FILE_SIZE = 20 * 1024 * 1024
+# Лимит длины сообщения Telegram, символов
+MESSAGE_MAX_LENGTH = 4096
+
 # Проверка на админа
 def is_admin(obj: Message | CallbackQuery) -> bool:
 	return obj.from_user.id == settings.TELEGRAM_ADMIN_ID
@@ -73,35 +96,123 @@ async def cb_billing_control(callback: CallbackQuery):
 async def cb_system_stats(callback: CallbackQuery):
 	log.debug("Вывод системной статистики")
 
-	users_total, active, expired, blocked = 0, 0, 0, 0
+	# Статусы пользователей берутся из индекса в памяти, транзакции - из агрегатов SQLite
+	user_stats = await user_repo.get_status_stats()
+	tx_stats = await billing_repo.get_stats()
 
-	users = await user_repo.get_all()
-	if users:
-		users_total = len(users)
-		for user in users:
-			match user.status:
-				case UserStatus.BLOCKED:
-					blocked += 1
-				case UserStatus.ACTIVE:
-					active +=1
-				case UserStatus.EXPIRED:
-					expired +=1
+	stats = STATS_TEMPLATE.format(
+		users_total_count=user_stats.total,
+		users_active=user_stats.active,
+		users_expired=user_stats.expired,
+		users_blocked=user_stats.blocked,
+		tx_total_count=tx_stats.count,
+		tx_total_amount=tx_stats.amount
+	)
 
-	tx_total_count, tx_total_amount = 0, 0
+	await callback.answer()
+	await callback.message.edit_text(stats, reply_markup=to_admin_panel_keyboard())
 
-	transactions = await billing_repo.get_all()
-	if transactions:
-		tx_total_count = len(transactions)
-		tx_total_amount = sum([tx.amount for tx in transactions])
 
-	stats = STATS_TEMPLATE.format(
-		users_total_count=users_total,
-		users_active=active,
-		users_expired=expired,
-		users_blocked=blocked,
-		tx_total_count=tx_total_count,
-		tx_total_amount=tx_total_amount
+# Вывод метрик обработки обновлений
+@router.message(Command("metrics"))
+async def cmd_metrics(message: Message):
+	log.debug("Вывод метрик")
+
+	if not is_admin(message):
+		await message.answer(ACCESS_DENIED)
+		return
+
+	report = metrics.render_text()
+	if not report:
+		await message.answer(METRICS_EMPTY)
+		return
+
+	# Длина проверяется после экранирования (сущности &lt; и т.п. длиннее символов). Отчёт, который
+	# не помещается в сообщение, отправляется файлом целиком: строки кэшей и ограничения частоты - в конце
+	text = f"{METRICS_TITLE}\n<pre>{escape(report)}</pre>"
+	if len(text) <= MESSAGE_MAX_LENGTH:
+		await message.answer(text)
+		return
+	await message.answer_document(
+		BufferedInputFile(report.encode(), filename=f"metrics_{date.today().isoformat()}.txt"),
+		caption=METRICS_TITLE
 	)
 
-	await callback.answer()
-	await callback.message.edit_text(stats, reply_markup=to_admin_panel_keyboard())
\ No newline at end of file
+
+# Выгрузка таблицы в CSV документом
+@router.message(Command("export"))
+async def cmd_export(message: Message, command: CommandObject):
+	log.debug("Экспорт: {}", command.args)
+
+	if not is_admin(message):
+		await message.answer(ACCESS_DENIED)
+		return
+
+	table = (command.args or "").strip().lower()
+	repo = EXPORT_REPOS.get(table)
+	if repo is None:
+		await message.answer(EXPORT_USAGE)
+		return
+
+	if export_lock.locked():
+		await message.answer(EXPORT_BUSY)
+		return
+
+	async with export_lock:
+		await message.answer(EXPORT_STARTED)
+		file, rows = await export_csv(repo)
+		with file:
+			document = SpooledInputFile(file, filename=f"{table}_{date.today().isoformat()}.csv")
+			await message.answer_document(document, caption=EXPORT_CAPTION.format(table=table, rows=rows))
+
+
+# Импорт CSV-документа (формат как у /export)
+@router.message(F.document, is_admin)
+async def doc_import(message: Message):
+	log.debug("Импорт документа: {}", message.document.file_name)
+
+	if import_lock.locked():
+		await message.answer(IMPORT_BUSY)
+		return
+
+	if (message.document.file_size or 0) > IMPORT_MAX_FILE_SIZE:
+		await message.answer(IMPORT_TOO_LARGE)
+		return
+
+	progress = await message.answer(IMPORT_STARTED.format(file_name=escape(message.document.file_name or "")))
+	# Фоновая задача в пустом контексте: без сессии обновления каждая пачка коммитится своей транзакцией,
+	# а обработка обновления не ждёт окончания импорта
+	task = asyncio.create_task(run_import(message, progress), context=contextvars.Context())
+	import_tasks.add(task)
+	task.add_done_callback(import_tasks.discard)
+
+
+async def run_import(message: Message, progress: Message):
+	async def report_progress(job: CSVImport):
+		await progress.edit_text(IMPORT_PROGRESS.format(
+			table=job.table, rows=job.rows, inserted=job.inserted, errors=job.error_count
+		))
+
+	async with import_lock:
+		job = CSVImport(SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_SIZE), on_progress=report_progress)
+		try:
+			with job.file:
+				await message.bot.download(message.document, destination=job.file)
+				await job.run()
+		except (ValueError, UnicodeDecodeError, csv.Error) as e:
+			log.warning("Импорт прерван: {}", e)
+			await progress.edit_text(IMPORT_FAILED.format(error=escape(str(e))))
+			return
+		except Exception as e:
+			log.exception("Ошибка импорта: {}", e)
+			await progress.edit_text(IMPORT_FAILED.format(error=escape(str(e))))
+			return
+
+		await progress.edit_text(IMPORT_DONE.format(
+			table=job.table, rows=job.rows, inserted=job.inserted, errors=job.error_count
+		))
+		if job.errors:
+			await message.answer_document(
+				BufferedInputFile(job.error_report(), filename=f"import_errors_{date.today().isoformat()}.csv"),
+				caption=IMPORT_ERRORS_CAPTION.format(shown=len(job.errors), total=job.error_count)
+			)
@@ -5,8 +5,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from src.core.config import settings
 from src.core.logger import log
-from src.core.dto import UserDTO, UserStatus, TransactionAddDTO, TransactionDTO
+from src.core.dto import TransactionAddDTO, TransactionWithUserDTO
 from src.db.repositories import user_repo, billing_repo
 from src.telegram.interface import TX_LIST_EMPTY, TX_LIST_HEADER, TX_ROW_TEMPLATE, ENTER_USER_ID, USER_ID_NOT_NUMBER, \
 	USER_NOT_FOUND, ENTER_AMOUNT, AMOUNT_INVALID, AMOUNT_INVALID_RULE, TX_ADDED_SUCCESS, TX_ADDED_ERROR, FEATURE_IN_DEV, \
@@ -14,7 +15,8 @@ from src.telegram.interface import TX_LIST_EMPTY, TX_LIST_HEADER, TX_ROW_TEMPLAT
 	TX_DELETED_ERROR, TX_PROFILE_TEMPLATE, SEP, DELETE_BUTTON, BACK_BUTTON
 
 from src.telegram.keyboards import (admin_cancel_keyboard, admin_confirmation_keyboard,
-                                    to_billing_control_keyboard, tx_profile_keyboard)
+                                    to_billing_control_keyboard, tx_profile_keyboard, pagination_keyboard,
+                                    parse_page_callback)
 
 
 router = Router(name="billing_control_handler")
@@ -26,34 +28,53 @@ class BillingControlStates(StatesGroup):
 	confirm_tx_delete = State()
 
 
-# Вывод списка транзакций
+# Вывод списка транзакций (постранично)
 @router.callback_query(F.data == "tx_list")
+@router.callback_query(F.data.startswith("tx_list_"))
 async def show_tx_list(callback: CallbackQuery):
-	log.debug("Вывод списка транзакций")
+	log.debug("Вывод списка транзакций: {}", callback.data)
+
+	after_id, before_id = parse_page_callback(callback.data)
+	page_size = settings.LIST_PAGE_SIZE
+
+	# Имена пользователей подтягиваются одним JOIN-запросом вместе с транзакциями; строки читаются
+	# без ORM-объектов и DTO. Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
+	transactions = await billing_repo.get_page_rows(after_id=after_id, before_id=before_id, limit=page_size + 1)
+	if not transactions and (after_id is not None or before_id is not None):
+		# Страница опустела (записи удалены) - возвращаемся к началу списка
+		after_id, before_id = None, None
+		transactions = await billing_repo.get_page_rows(limit=page_size + 1)
 
-	transactions = await billing_repo.get_all()
 	if not transactions:
 		await callback.answer()
 		await callback.message.edit_text(TX_LIST_EMPTY, reply_markup=to_billing_control_keyboard())
 		return
 
-	tx_list = TX_LIST_HEADER
+	if before_id is not None:
+		has_prev, has_next = len(transactions) > page_size, True
+		transactions = transactions[-page_size:]
+	else:
+		has_prev, has_next = after_id is not None, len(transactions) > page_size
+		transactions = transactions[:page_size]
+
+	tx_list = TX_LIST_HEADER.format(total=await billing_repo.count())
 
 	for tx in transactions:
-		user = await user_repo.get_by_id(tx.user_id)
-		name = user.name if user else tx.user_id
+		name = tx.user_name or tx.user_id
 		tx_list += TX_ROW_TEMPLATE.format(tx_id=tx.id, amount=tx.amount, name=name)
 
+	keyboard = pagination_keyboard("tx_list", transactions[0].id, transactions[-1].id, has_prev, has_next,
+	                               back="billing_control")
+
 	await callback.answer()
-	await callback.message.edit_text(tx_list, reply_markup=to_billing_control_keyboard())
+	await callback.message.edit_text(tx_list, reply_markup=keyboard)
 
 
 # Вывод профиля транзакции
-async def show_tx_info(message: Message, state: FSMContext, tx: TransactionDTO):
+async def show_tx_info(message: Message, state: FSMContext, tx: TransactionWithUserDTO):
 	log.debug("Вывод информации о транзакции")
 
-	user = await user_repo.get_by_id(tx.user_id)
-	name = user.name if user else tx.user_id
+	name = tx.user_name or tx.user_id
 
 	tx_profile = TX_PROFILE_TEMPLATE.format(
 		tx_id=tx.id,
@@ -94,8 +115,8 @@ async def check_tx_id(message: Message, state: FSMContext):
 		await message.answer(TX_ID_NOT_POSITIVE, reply_markup=admin_cancel_keyboard())
 		return
 
-	# Получение транзакции из базы данных
-	tx = await billing_repo.get_by_id(tx_id)
+	# Получение транзакции вместе с именем пользователя
+	tx = await billing_repo.get_by_id_with_user_name(tx_id)
 	if not tx:
 		await state.clear()
 		await message.answer(TX_NOT_FOUND.format(tx_id=tx_id), reply_markup=to_billing_control_keyboard())
@@ -215,11 +236,10 @@ async def tx_edit(callback: CallbackQuery, state: FSMContext):
 async def tx_delete_ask_confirm(callback: CallbackQuery, state: FSMContext):
 	data = await state.get_data()
 	tx_id = data["tx_id"]
-	log.debug(f"Запрос подтверждения на удаление транзакции {tx_id}")
+	log.debug("Запрос подтверждения на удаление транзакции {}", tx_id)
 
-	tx = await billing_repo.get_by_id(tx_id)
-	user = await user_repo.get_by_id(tx.user_id)
-	name = user.name if user else tx.user_id
+	tx = await billing_repo.get_by_id_with_user_name(tx_id)
+	name = tx.user_name or tx.user_id
 
 	tx_delete_msg = TX_DELETE_CONFIRM.format(
 		tx_id=tx_id,
@@ -0,0 +1,69 @@
+from aiogram import Router, F
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Message, CallbackQuery
+
+from src.core.logger import log
+from src.db.database import after_transaction
+from src.db.repositories import messages_repo
+from src.telegram.broadcast import BroadcastWorker
+from src.telegram.handlers.admin import is_admin
+from src.telegram.interface import ACCESS_DENIED, ENTER_BROADCAST_TEXT, BROADCAST_TEXT_TOO_LONG, BROADCAST_CONFIRM, \
+	BROADCAST_QUEUED, BROADCAST_EMPTY, SEP
+
+from src.telegram.keyboards import admin_cancel_keyboard, admin_confirmation_keyboard, to_admin_panel_keyboard
+
+
+router = Router(name="broadcast_handler")
+
+class BroadcastStates(StatesGroup):
+	enter_text = State()
+	confirm = State()
+
+
+# Рассылка. Запрос текста
+@router.callback_query(F.data == "broadcast")
+async def ask_broadcast_text(callback: CallbackQuery, state: FSMContext):
+	log.debug("Запрос текста рассылки")
+
+	if not is_admin(callback):
+		await callback.answer(ACCESS_DENIED)
+		return
+
+	await callback.answer()
+	await callback.message.edit_text(ENTER_BROADCAST_TEXT, reply_markup=admin_cancel_keyboard())
+	await state.set_state(BroadcastStates.enter_text)
+
+
+# Рассылка. Проверка текста и запрос подтверждения
+@router.message(BroadcastStates.enter_text, F.text)
+async def check_broadcast_text(message: Message, state: FSMContext):
+	log.debug("Проверка текста рассылки")
+
+	# html_text сохраняет форматирование и экранирует спецсимволы для ParseMode.HTML
+	text = message.html_text
+	if len(text) > 4096:
+		await message.answer(BROADCAST_TEXT_TOO_LONG, reply_markup=admin_cancel_keyboard())
+		return
+
+	await state.update_data(text=text)
+	await message.answer(BROADCAST_CONFIRM.format(text=text, sep=SEP), reply_markup=admin_confirmation_keyboard())
+	await state.set_state(BroadcastStates.confirm)
+
+
+# Рассылка. Подтверждение получено, постановка в очередь
+@router.callback_query(BroadcastStates.confirm, F.data == "admin_ok")
+async def broadcast_approved(callback: CallbackQuery, state: FSMContext, broadcast_worker: BroadcastWorker):
+	log.debug("Подтверждение рассылки получено")
+
+	data = await state.get_data()
+	count = await messages_repo.enqueue_broadcast(data["text"])
+	log.info(f"Рассылка поставлена в очередь: {count} сообщений")
+
+	# Будим обработчик очереди только после коммита, иначе он не увидит новые сообщения
+	after_transaction(broadcast_worker.wake)
+
+	await callback.answer()
+	msg = BROADCAST_QUEUED.format(count=count) if count else BROADCAST_EMPTY
+	await callback.message.edit_text(msg, reply_markup=to_admin_panel_keyboard())
+	await state.clear()
@@ -36,7 +36,7 @@ async def cmd_start(message: Message, state: FSMContext):
 
 # Вывод приветственного сообщения
 async def welcome_message(message: Message):
-	log.debug(f"Вывод приветственного сообщения пользователю {message.from_user.id}")
+	log.debug("Вывод приветственного сообщения пользователю {}", message.from_user.id)
 
 
 	user = await user_repo.get_by_id(message.from_user.id)
@@ -62,7 +62,7 @@ async def welcome_message(message: Message):
 # Отмена текущего действия
 @router.callback_query(F.data == "user_cancel")
 async def cb_cancel(callback: CallbackQuery, state: FSMContext):
-	log.debug(f"Пользователь {callback.from_user.id} отменил действие")
+	log.debug("Пользователь {} отменил действие", callback.from_user.id)
 
 	await callback.answer()
 	await state.clear()
@@ -72,7 +72,7 @@ async def cb_cancel(callback: CallbackQuery, state: FSMContext):
 # Запрос имени
 @router.callback_query(F.data == "register")
 async def ask_name(callback: CallbackQuery, state: FSMContext):
-	log.debug(f"Запрос имени у пользователя {callback.from_user.id}")
+	log.debug("Запрос имени у пользователя {}", callback.from_user.id)
 
 	await callback.answer()
 	await callback.message.edit_text(ENTER_NAME, reply_markup=user_cancel_keyboard())
@@ -82,7 +82,7 @@ async def ask_name(callback: CallbackQuery, state: FSMContext):
 # Проверка имени
 @router.message(RegisterStates.waiting_name)
 async def check_name(message: Message, state: FSMContext):
-	log.debug(f"Проверка ввода имени пользователя {message.from_user.id}")
+	log.debug("Проверка ввода имени пользователя {}", message.from_user.id)
 
 	name = message.text.strip()
 
@@ -92,8 +92,7 @@ async def check_name(message: Message, state: FSMContext):
 		return
 
 	# Проверка уникальности имени
-	all_users = await user_repo.get_all()
-	if all_users and any(u.name.lower() == name.lower() for u in all_users):
+	if await user_repo.exists_by_name(name):
 		await message.answer(NAME_NOT_UNIQUE)
 		return
 
@@ -109,7 +108,7 @@ async def check_name(message: Message, state: FSMContext):
 # Отправка запроса администратору
 @router.callback_query(RegisterStates.waiting_confirm, F.data == "user_ok")
 async def cb_confirm_registration(callback: CallbackQuery, state: FSMContext):
-	log.debug(f"Подтверждение регистрации пользователя {callback.from_user.id} получено. Отправка запроса администратору")
+	log.debug("Подтверждение регистрации пользователя {} получено. Отправка запроса администратору", callback.from_user.id)
 
 	# Чтение данных из буфера
 	data = await state.get_data()
@@ -140,7 +139,7 @@ async def cb_confirm_registration(callback: CallbackQuery, state: FSMContext):
 			text=REG_ADMIN_CONFIRM,
 			reply_markup=keyboard
 		)
-		log.debug(f"Запрос на регистрацию от {name} ({user_id}) отправлен администратору")
+		log.debug("Запрос на регистрацию от {} ({}) отправлен администратору", name, user_id)
 		await callback.message.edit_text(REG_REQUEST_SENT)
 	except Exception as e:
 		log.error(f"Ошибка отправки админу: {e}")
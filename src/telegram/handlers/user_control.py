@@ -5,17 +5,20 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from src.core.config import settings
 from src.core.logger import log
 from src.core.dto import UserAddDTO, UserDTO, UserStatus
-from src.db.repositories import user_repo, registration_repo
+from src.db.repositories import user_repo, registration_repo, balance_repo
 from src.telegram.interface import USER_LIST_HEADER, USER_LIST_ROW, USER_LIST_STATUS_ACTIVE, USER_LIST_STATUS_INACTIVE, \
 	ENTER_USER_ID, USER_ID_NOT_NUMBER, USER_EXISTS, USER_NOT_FOUND, USER_PROFILE_TEMPLATE, ENTER_NAME, NAME_EMPTY, \
 	NAME_TOO_LONG, USER_ADDED_SUCCESS, USER_ADDED_ERROR, USER_DELETE_CONFIRM, USER_DELETED_SUCCESS, USER_DELETED_ERROR, \
 	FEATURE_IN_DEV, SEP, EDIT_BUTTON, DELETE_BUTTON, BACK_BUTTON, REG_SUCCESS_USER, REG_SUCCESS_ADMIN, \
-	REG_REJECTED_USER, REG_REJECTED_ADMIN, USER_LIST_EMPTY
+	REG_REJECTED_USER, REG_REJECTED_ADMIN, USER_LIST_EMPTY, NAME_NOT_UNIQUE, USER_BALANCE_TEMPLATE, \
+	EXPIRED_LIST_EMPTY, EXPIRED_LIST_HEADER, EXPIRED_LIST_ROW
 
 from src.telegram.keyboards import (admin_cancel_keyboard, admin_confirmation_keyboard,
-                                    to_user_control_keyboard, user_profile_keyboard)
+                                    to_user_control_keyboard, user_profile_keyboard, pagination_keyboard,
+                                    parse_page_callback)
 
 
 router = Router(name="user_control_handler")
@@ -27,18 +30,36 @@ class UserControlStates(StatesGroup):
 	confirm_registration = State()
 
 
-# Вывод списка пользователей
+# Вывод списка пользователей (постранично)
 @router.callback_query(F.data == "user_list")
+@router.callback_query(F.data.startswith("user_list_"))
 async def cb_user_list(callback: CallbackQuery):
-	log.debug("Вывод списка пользователей")
+	log.debug("Вывод списка пользователей: {}", callback.data)
+
+	after_id, before_id = parse_page_callback(callback.data)
+	page_size = settings.LIST_PAGE_SIZE
+
+	# Строки читаются без ORM-объектов и DTO (только отображаемые столбцы).
+	# Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
+	users = await user_repo.get_page_rows(after_id=after_id, before_id=before_id, limit=page_size + 1)
+	if not users and (after_id is not None or before_id is not None):
+		# Страница опустела (записи удалены) - возвращаемся к началу списка
+		after_id, before_id = None, None
+		users = await user_repo.get_page_rows(limit=page_size + 1)
 
-	users = await user_repo.get_all()
 	if not users:
 		await callback.answer()
 		await callback.message.edit_text(USER_LIST_EMPTY, reply_markup=to_user_control_keyboard())
 		return
 
-	msg = USER_LIST_HEADER
+	if before_id is not None:
+		has_prev, has_next = len(users) > page_size, True
+		users = users[-page_size:]
+	else:
+		has_prev, has_next = after_id is not None, len(users) > page_size
+		users = users[:page_size]
+
+	msg = USER_LIST_HEADER.format(total=await user_repo.count())
 	for user in users:
 		status = USER_LIST_STATUS_ACTIVE if user.status == UserStatus.ACTIVE else USER_LIST_STATUS_INACTIVE
 		msg += USER_LIST_ROW.format(
@@ -47,13 +68,51 @@ async def cb_user_list(callback: CallbackQuery):
 			user_id=user.id
 		)
 
+	keyboard = pagination_keyboard("user_list", users[0].id, users[-1].id, has_prev, has_next, back="user_control")
+
 	await callback.answer()
-	await callback.message.edit_text(msg, reply_markup=to_user_control_keyboard())
+	await callback.message.edit_text(msg, reply_markup=keyboard)
+
+
+# Вывод пользователей с истёкшей подпиской (постранично)
+@router.callback_query(F.data == "user_expired")
+@router.callback_query(F.data.startswith("user_expired_"))
+async def cb_user_expired(callback: CallbackQuery):
+	log.debug("Вывод истёкших подписок: {}", callback.data)
+
+	# Курсор кнопок навигации - позиция в списке истёкших, а не ID
+	after, before = parse_page_callback(callback.data)
+	page_size = settings.LIST_PAGE_SIZE
+	offset = after if after is not None else max((before or 0) - page_size, 0)
+
+	# Список и число истёкших - из индекса статусов в памяти, из базы читаются только строки страницы
+	total = (await user_repo.get_status_stats()).expired
+	if offset >= total:
+		offset = 0
+	user_ids = await user_repo.get_expired_ids(offset=offset, limit=page_size)
+	if not user_ids:
+		await callback.answer()
+		await callback.message.edit_text(EXPIRED_LIST_EMPTY, reply_markup=to_user_control_keyboard())
+		return
+
+	users = {user.id: user for user in await user_repo.get_many_by_ids(user_ids)}
+	msg = EXPIRED_LIST_HEADER.format(total=total)
+	for user_id in user_ids:
+		user = users.get(user_id)
+		if user is not None:
+			msg += EXPIRED_LIST_ROW.format(name=user.name, user_id=user.id,
+			                               end_date=user.billing_end_date.strftime("%d.%m.%Y"))
+
+	keyboard = pagination_keyboard("user_expired", offset, offset + len(user_ids), offset > 0,
+	                               offset + len(user_ids) < total, back="user_control")
+
+	await callback.answer()
+	await callback.message.edit_text(msg, reply_markup=keyboard)
 
 
 # Вывод профиля пользователя
 async def show_user_info(message: Message, state: FSMContext, user: UserDTO):
-	log.debug(f"Вывод профиля пользователя {user.name} ({user.id})")
+	log.debug("Вывод профиля пользователя {} ({})", user.name, user.id)
 
 	user_profile = USER_PROFILE_TEMPLATE.format(
 		user_id=user.id,
@@ -64,6 +123,14 @@ async def show_user_info(message: Message, state: FSMContext, user: UserDTO):
 		sep=SEP
 	)
 
+	# Итоги платежей - одна строка из balances вместо агрегации по транзакциям
+	balance = await balance_repo.get_by_id(user.id)
+	user_profile += USER_BALANCE_TEMPLATE.format(
+		total_paid=balance.total_paid if balance else 0,
+		tx_count=balance.tx_count if balance else 0,
+		last_payment=balance.last_payment_at if balance and balance.last_payment_at else "-"
+	)
+
 	await message.answer(user_profile, reply_markup=user_profile_keyboard())
 	await state.update_data(user_id=user.id) # для передачи ID в хэндлеры CRUD-операций
 
@@ -136,8 +203,13 @@ async def check_name(message: Message, state: FSMContext):
 	name = message.text.strip()
 	if not name:
 		await message.answer(NAME_EMPTY, reply_markup=admin_cancel_keyboard())
+		return
 	if len(name) > 25:
 		await message.answer(NAME_TOO_LONG, reply_markup=admin_cancel_keyboard())
+		return
+	if await user_repo.exists_by_name(name):
+		await message.answer(NAME_NOT_UNIQUE, reply_markup=admin_cancel_keyboard())
+		return
 
 	# Чтение данных
 	data = await state.get_data()
@@ -168,7 +240,7 @@ async def check_name(message: Message, state: FSMContext):
 async def ask_confirmation(callback: CallbackQuery, state: FSMContext):
 	data = await state.get_data()
 	user_id = data["user_id"]
-	log.debug(f"Запрос подтверждения на удаление пользователя {user_id}")
+	log.debug("Запрос подтверждения на удаление пользователя {}", user_id)
 
 	# Формирование запроса
 	user = await user_repo.get_by_id(user_id)
@@ -210,7 +282,7 @@ async def confirmation_approved(callback: CallbackQuery, state: FSMContext):
 async def user_edit(callback: CallbackQuery, state: FSMContext):
 	data = await state.get_data()
 	user_id = data["user_id"]
-	log.debug(f"Редактирование пользователя {user_id}")
+	log.debug("Редактирование пользователя {}", user_id)
 
 	await callback.answer(FEATURE_IN_DEV)
 
@@ -243,7 +315,7 @@ async def user_unblock(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data.startswith("registration_approve_"))
 async def approve_registration(callback: CallbackQuery):
 	user_id = int(callback.data.split("_")[-1])
-	log.debug(f"Админ одобрил регистрацию пользователя {user_id}")
+	log.debug("Админ одобрил регистрацию пользователя {}", user_id)
 
 	registration_dto = await registration_repo.get_by_id(user_id)
 	if not registration_dto:
@@ -279,7 +351,7 @@ async def approve_registration(callback: CallbackQuery):
 @router.callback_query(F.data.startswith("registration_reject_"))
 async def reject_registration(callback: CallbackQuery):
 	user_id = int(callback.data.split("_")[-1])
-	log.debug(f"Админ отклонил регистрацию пользователя {user_id}")
+	log.debug("Админ отклонил регистрацию пользователя {}", user_id)
 
 	await callback.answer()
 	await callback.bot.send_message(chat_id=user_id, text=REG_REJECTED_USER)
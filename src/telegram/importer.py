@@ -0,0 +1,107 @@
+import csv
+import io
+from datetime import datetime
+from time import monotonic
+from typing import BinaryIO, Awaitable, Callable
+
+from pydantic import BaseModel, ValidationError
+
+from src.core.config import settings
+from src.core.dto import UserAddDTO, TransactionAddDTO, TransactionDTO
+from src.core.logger import log
+from src.db.repositories import AbstractRepository, user_repo, billing_repo
+
+
+class CSVImport:
+	"""Построчный импорт CSV в users или transactions.
+
+	Таблица определяется по заголовку: формат совпадает с /export, лишние столбцы (user_name
+	транзакций) игнорируются. Транзакции со столбцом id (выгрузка /export) пишутся через upsert_many:
+	существующие по ID обновляются, отсутствующие добавляются с тем же ID, поэтому повторный импорт
+	выгрузки не задваивает платежи и балансы. Без столбца id транзакции добавляются как новые.
+	Файл читается потоком, строки проверяются DTO и пишутся пачками по IMPORT_CHUNK_SIZE - вне внешней
+	единицы работы каждая пачка коммитится своей транзакцией.
+	Ошибки копятся с номером строки файла (не больше IMPORT_MAX_ERRORS)"""
+
+	def __init__(self, file: BinaryIO, on_progress: Callable[["CSVImport"], Awaitable[None]] | None = None):
+		self.file = file
+		self.on_progress = on_progress
+		self.table: str | None = None
+		self.rows = 0
+		self.inserted = 0  # Записано строк (добавлено или обновлено по ID)
+		self.error_count = 0
+		self.errors: list[tuple[int, str]] = []  # (номер строки, текст ошибки)
+
+	def _detect(self, header: list[str]) -> tuple[str, AbstractRepository, type[BaseModel]] | None:
+		if {"user_id", "amount"} <= set(header):
+			return "transactions", billing_repo, TransactionDTO if "id" in header else TransactionAddDTO
+		if {"id", "name"} <= set(header):
+			return "users", user_repo, UserAddDTO
+		return None
+
+	def _error(self, line: int, text: str):
+		self.error_count += 1
+		if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+			self.errors.append((line, text))
+
+	@staticmethod
+	def _format_validation_error(error: ValidationError) -> str:
+		return "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+
+	async def _flush(self, repo: AbstractRepository, dtos: list[BaseModel], lines: list[int]):
+		if isinstance(dtos[0], TransactionDTO):
+			result = await repo.upsert_many(dtos, chunk_size=len(dtos))
+		else:
+			result = await repo.add_many(dtos, chunk_size=len(dtos))
+		self.inserted += len(result.inserted_ids)
+		for index, text in result.errors.items():
+			self._error(lines[index], text)
+
+	async def run(self):
+		reader = csv.reader(io.TextIOWrapper(self.file, encoding="utf-8-sig", newline=""))
+		header = [column.strip().lower() for column in next(reader, [])]
+		detected = self._detect(header)
+		if detected is None:
+			raise ValueError(f"не удалось определить таблицу по заголовку: {', '.join(header)}")
+		self.table, repo, dto_model = detected
+		log.info("Импорт CSV в таблицу '{}'", self.table)
+
+		# Даты транзакций необязательны - по умолчанию время импорта
+		now = datetime.now()
+		defaults = {"created_at": now, "updated_at": now} if self.table == "transactions" else {}
+
+		dtos, lines = [], []
+		reported_at = monotonic()
+		for row in reader:
+			if not any(row):
+				continue
+			self.rows += 1
+			if len(row) != len(header):
+				self._error(reader.line_num, f"Ожидалось столбцов: {len(header)}, получено: {len(row)}")
+				continue
+			values = defaults | {key: value for key, value in zip(header, row) if value != ""}
+			try:
+				dtos.append(dto_model.model_validate(values))
+				lines.append(reader.line_num)
+			except ValidationError as e:
+				self._error(reader.line_num, self._format_validation_error(e))
+
+			if len(dtos) >= settings.IMPORT_CHUNK_SIZE:
+				await self._flush(repo, dtos, lines)
+				dtos, lines = [], []
+				if self.on_progress and monotonic() - reported_at >= settings.IMPORT_PROGRESS_INTERVAL:
+					await self.on_progress(self)
+					reported_at = monotonic()
+
+		if dtos:
+			await self._flush(repo, dtos, lines)
+		log.info("Импорт CSV в '{}' завершён: строк {}, добавлено {}, ошибок {}",
+		         self.table, self.rows, self.inserted, self.error_count)
+
+	def error_report(self) -> bytes:
+		"""Ошибки в CSV (line,error) для отправки документом"""
+		buffer = io.StringIO()
+		writer = csv.writer(buffer)
+		writer.writerow(("line", "error"))
+		writer.writerows(sorted(self.errors))
+		return ("\ufeff" + buffer.getvalue()).encode()
@@ -23,6 +23,8 @@ ADD_BUTTON: Final = "➕ Изменить"
 EDIT_BUTTON: Final = "✏️ Изменить"
 DELETE_BUTTON: Final = "❌ Удалить"
 BACK_BUTTON: Final = "🔙 Назад"
+PREV_PAGE_BUTTON: Final = "⬅️"
+NEXT_PAGE_BUTTON: Final = "➡️"
 
 
 # =====================================================================================================================
@@ -44,11 +46,16 @@ USER_NOT_FOUND: Final = "⚠️ Пользователь с указанным I
 
 # === Список пользователей ===
 USER_LIST_EMPTY: Final = "Нет пользователей."
-USER_LIST_HEADER: Final = "Список пользователей:\n\n"
+USER_LIST_HEADER: Final = "Список пользователей ({total}):\n\n"
 USER_LIST_STATUS_ACTIVE: Final = "✅"
 USER_LIST_STATUS_INACTIVE: Final = "❌"
 USER_LIST_ROW: Final = "{status} {name} ({user_id})\n"
 
+# === Истёкшие подписки ===
+EXPIRED_LIST_EMPTY: Final = "Нет пользователей с истёкшей подпиской."
+EXPIRED_LIST_HEADER: Final = "Истёкшие подписки ({total}), от недавних к давним:\n\n"
+EXPIRED_LIST_ROW: Final = "❌ {name} ({user_id}) - до {end_date}\n"
+
 # === Профиль пользователя ===
 USER_PROFILE_TEMPLATE: Final = (
     "<b>{name}</b> ({user_id})\n"
@@ -58,6 +65,11 @@ USER_PROFILE_TEMPLATE: Final = (
     "Конец: {end_date}\n"
 )
 
+USER_BALANCE_TEMPLATE: Final = (
+    "Оплачено: {total_paid} ({tx_count} платежей)\n"
+    "Последний платёж: {last_payment}\n"
+)
+
 # === Статусы ===
 USER_ADDED_SUCCESS: Final = "✅ Пользователь успешно добавлен."
 USER_ADDED_ERROR: Final = "❌ Ошибка при добавлении пользователя."
@@ -84,7 +96,7 @@ REG_REJECTED_USER: Final = "❌ Администратор отклонил ва
 
 # === Список транзакций ===
 TX_LIST_EMPTY: Final = "Нет транзакций."
-TX_LIST_HEADER: Final = "📋 Список транзакций:\n\n"
+TX_LIST_HEADER: Final = "📋 Список транзакций ({total}):\n\n"
 TX_ROW_TEMPLATE: Final = "🆔 {tx_id:03d}  💰{amount: 5d}  👤 {name}\n"
 
 # === Профиль пользователя ===
@@ -116,6 +128,21 @@ TX_DELETED_SUCCESS: Final = "✅ Транзакция успешно удале
 TX_DELETED_ERROR: Final = "❌ Ошибка при удалении транзакции."
 
 
+# =====================================================================================================================
+# ================================================ Рассылка ===========================================================
+# =====================================================================================================================
+
+ENTER_BROADCAST_TEXT: Final = "Введите текст рассылки:"
+BROADCAST_TEXT_TOO_LONG: Final = "⚠️ Текст должен быть не длиннее 4096 символов. Введите текст рассылки:"
+BROADCAST_CONFIRM: Final = "{text}\n\n{sep}\n📢 Отправить рассылку всем активным пользователям?"
+BROADCAST_QUEUED: Final = "✅ Рассылка поставлена в очередь: {count} сообщений."
+BROADCAST_EMPTY: Final = "⚠️ Нет пользователей для рассылки."
+
+# === Напоминания об окончании подписки ===
+EXPIRY_SOON: Final = "⌛ Подписка заканчивается {end_date}. Не забудьте её продлить."
+EXPIRY_PASSED: Final = "❌ Подписка закончилась {end_date}. Продлите её, чтобы продолжить пользоваться VPN."
+
+
 # =====================================================================================================================
 # =============================================== Статистика ==========================================================
 # =====================================================================================================================
@@ -128,4 +155,26 @@ STATS_TEMPLATE: Final = (
     "❌ Заблокированных: {users_blocked}\n\n"
 	"📋 Всего транзакций: {tx_total_count}\n"
 	"💰 Сумма транзакций: {tx_total_amount}"
-)
\ No newline at end of file
+)
+
+# Метрики
+METRICS_TITLE: Final = "📈 Метрики обработки обновлений:"
+METRICS_EMPTY: Final = "Обновления ещё не обрабатывались."
+
+# Экспорт
+EXPORT_USAGE: Final = "Использование: /export users или /export transactions"
+EXPORT_STARTED: Final = "⏳ Формирую файл..."
+EXPORT_CAPTION: Final = "📄 Экспорт: {table}, строк: {rows}"
+EXPORT_BUSY: Final = "Экспорт уже выполняется, дождитесь его окончания."
+
+# Импорт
+IMPORT_STARTED: Final = "⏳ Импорт файла {file_name}..."
+IMPORT_PROGRESS: Final = "⏳ Импорт в {table}: обработано строк {rows}, записано {inserted}, ошибок {errors}"
+IMPORT_DONE: Final = "✅ Импорт в {table} завершён: строк {rows}, записано {inserted}, ошибок {errors}"
+IMPORT_FAILED: Final = "❌ Импорт прерван: {error}"
+IMPORT_TOO_LARGE: Final = "❌ Файл больше 20 МБ - бот не может его скачать. Разбейте его на части."
+IMPORT_BUSY: Final = "Импорт уже выполняется, дождитесь его окончания."
+IMPORT_ERRORS_CAPTION: Final = "📄 Ошибки импорта (показано {shown} из {total})"
+
+# Ограничение частоты
+THROTTLED_CALLBACK: Final = "⏳ Слишком часто, подождите немного."
@@ -1,5 +1,6 @@
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from src.telegram.interface import ADD_BUTTON, EDIT_BUTTON, DELETE_BUTTON, BACK_BUTTON
+from src.telegram.interface import (ADD_BUTTON, EDIT_BUTTON, DELETE_BUTTON, BACK_BUTTON, PREV_PAGE_BUTTON,
+                                   NEXT_PAGE_BUTTON)
 
 
 # === Клавиатуры пользователя ===
@@ -79,6 +80,30 @@ def to_billing_control_keyboard():
 		]
 	)
 
+def pagination_keyboard(prefix: str, first_id: int, last_id: int, has_prev: bool, has_next: bool, back: str):
+	# callback_data: {prefix}_prev_{ID первой строки} / {prefix}_next_{ID последней строки}
+	navigation = []
+	if has_prev:
+		navigation.append(InlineKeyboardButton(text=PREV_PAGE_BUTTON, callback_data=f"{prefix}_prev_{first_id}"))
+	if has_next:
+		navigation.append(InlineKeyboardButton(text=NEXT_PAGE_BUTTON, callback_data=f"{prefix}_next_{last_id}"))
+
+	inline_keyboard = [navigation] if navigation else []
+	inline_keyboard.append([InlineKeyboardButton(text="Назад", callback_data=back)])
+	return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
+
+def parse_page_callback(data: str) -> tuple[int | None, int | None]:
+	# Возвращает (after_id, before_id) для repository.get_page.
+	# Повреждённые данные и кнопки старого формата открывают первую страницу
+	parts = data.split("_")
+	if len(parts) < 2 or parts[-2] not in ("prev", "next"):
+		return None, None
+	try:
+		cursor = int(parts[-1])
+	except ValueError:
+		return None, None
+	return (None, cursor) if parts[-2] == "prev" else (cursor, None)
+
 def admin_confirmation_keyboard():
 	return InlineKeyboardMarkup(
 		inline_keyboard=[
@@ -98,6 +123,9 @@ def admin_panel_keyboard():
 			[
 				InlineKeyboardButton(text="💰 Биллинг", callback_data="billing_control")
 			],
+			[
+				InlineKeyboardButton(text="📢 Рассылка", callback_data="broadcast")
+			],
 			[
 				InlineKeyboardButton(text="📊 Статистика", callback_data="system_stats")
 			]
@@ -110,6 +138,9 @@ def user_control_keyboard():
 			[
 				InlineKeyboardButton(text="📋 Список пользователей", callback_data="user_list"),
 			],
+			[
+				InlineKeyboardButton(text="⌛ Истёкшие подписки", callback_data="user_expired"),
+			],
 			[
 				InlineKeyboardButton(text="🔍️ Показать профиль", callback_data="user_show")
 			],
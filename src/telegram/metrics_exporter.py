@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+from src.core.config import settings
+from src.core.logger import log
+from src.core.metrics import metrics
+
+
+def _write_file(path: str, text: str):
+	# Через временный файл и os.replace: сборщик (например, textfile collector node_exporter) не увидит половину файла
+	tmp_path = f"{path}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as file:
+		file.write(text)
+	os.replace(tmp_path, path)
+
+
+async def write_metrics_file():
+	await asyncio.to_thread(_write_file, settings.METRICS_FILE, metrics.render_prometheus())
+
+
+class MetricsServer:
+	"""HTTP-эндпоинт GET /metrics в формате Prometheus"""
+
+	def __init__(self, host: str, port: int):
+		self.host = host
+		self.port = port
+		self._runner: web.AppRunner | None = None
+
+	@staticmethod
+	async def _handle(request: web.Request) -> web.Response:
+		return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+	async def start(self):
+		app = web.Application()
+		app.router.add_get("/metrics", self._handle)
+		self._runner = web.AppRunner(app, access_log=None)
+		await self._runner.setup()
+		await web.TCPSite(self._runner, self.host, self.port).start()
+		log.info(f"Метрики доступны на http://{self.host}:{self.port}/metrics")
+
+	async def stop(self):
+		if self._runner is not None:
+			await self._runner.cleanup()
+			self._runner = None
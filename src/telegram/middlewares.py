@@ -0,0 +1,158 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from src.core.config import settings
+from src.core.logger import log
+from src.core.metrics import metrics
+from src.db.database import unit_of_work, commit_early
+from src.db.profiling import track_queries
+from src.telegram.interface import THROTTLED_CALLBACK
+from src.telegram.storage import SQLiteStorage
+from src.telegram.throttling import TokenBuckets
+
+
+class DbSessionMiddleware(BaseMiddleware):
+	"""Открывает одну сессию БД на обновление. Все вызовы репозиториев внутри хэндлера используют её,
+	коммит выполняется после успешной обработки (при ошибке - откат). Перед каждым запросом к Bot API
+	транзакция фиксируется досрочно (CommitBeforeRequestMiddleware), поэтому при ошибке откатываются
+	только изменения, сделанные после последнего запроса"""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any]
+	) -> Any:
+		async with unit_of_work() as session:
+			data["session"] = session
+			return await handler(event, data)
+
+
+class CommitBeforeRequestMiddleware(BaseRequestMiddleware):
+	"""Middleware запросов к Bot API: фиксирует транзакцию обновления до сетевого ожидания.
+	Иначе транзакция, а после первой записи и блокировка записи SQLite, удерживались бы на время
+	ответа Telegram, и записи всех обновлений выстраивались бы в очередь за сетью"""
+
+	async def __call__(
+		self,
+		make_request: NextRequestMiddlewareType[TelegramType],
+		bot: Bot,
+		method: TelegramMethod[TelegramType]
+	) -> Response[TelegramType]:
+		await commit_early()
+		return await make_request(bot, method)
+
+
+class FSMCoalesceMiddleware(BaseMiddleware):
+	"""Собирает изменения состояния FSM за обработку обновления и записывает их в БД одним разом.
+	Регистрируется после DbSessionMiddleware: запись идёт в транзакции обновления перед её коммитом,
+	поэтому не ждёт блокировку записи отдельно и при ошибке откатывается вместе с хэндлером"""
+
+	def __init__(self, storage: SQLiteStorage):
+		self.storage = storage
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any]
+	) -> Any:
+		async with self.storage.coalesce():
+			return await handler(event, data)
+
+
+def setup_db_middlewares(dp: Dispatcher, bot: Bot):
+	"""Единица работы на обновление, запись состояний FSM в её транзакции (хранилище SQLiteStorage)
+	и досрочный коммит перед запросами к Bot API. Порядок важен: FSMCoalesceMiddleware - внутри
+	DbSessionMiddleware"""
+	dp.update.middleware(DbSessionMiddleware())
+	if isinstance(dp.storage, SQLiteStorage):
+		dp.update.middleware(FSMCoalesceMiddleware(dp.storage))
+	bot.session.middleware(CommitBeforeRequestMiddleware())
+
+
+# Имя хэндлера, обработавшего текущее обновление. Список, чтобы внутренний middleware мог изменить значение
+_handler_name: ContextVar[list[str] | None] = ContextVar("handler_name", default=None)
+
+
+class MetricsMiddleware(BaseMiddleware):
+	"""Внешний middleware обновлений: время обработки, ошибки, число и время SQL-запросов по хэндлерам.
+	Имя хэндлера сообщает HandlerNameMiddleware, обновления без хэндлера учитываются как unhandled"""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any]
+	) -> Any:
+		name = ["unhandled"]
+		token = _handler_name.set(name)
+		error = False
+		started = perf_counter()
+		with track_queries() as queries:
+			try:
+				return await handler(event, data)
+			except Exception:
+				error = True
+				raise
+			finally:
+				metrics.observe_update(name[0], perf_counter() - started, error, queries.statements, queries.seconds)
+				_handler_name.reset(token)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+	"""Внутренний middleware роутеров: передаёт в MetricsMiddleware имя выбранного хэндлера"""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any]
+	) -> Any:
+		name = _handler_name.get()
+		if name is not None:
+			name[0] = data["handler"].callback.__name__
+		return await handler(event, data)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+	"""Внешний middleware обновлений: ограничивает частоту сообщений и нажатий кнопок от одного
+	пользователя (token bucket, бюджеты раздельные). Лишние обновления отбрасываются до сессии БД
+	и хэндлеров. Сообщения - без ответа, а на нажатие кнопки отвечаем коротким уведомлением:
+	без answerCallbackQuery клиент показывает загрузку до тайм-аута Telegram. Администратор не ограничивается"""
+
+	def __init__(self):
+		self.limiters: dict[str, TokenBuckets] = {}
+		budgets = {
+			"message": (settings.THROTTLE_MESSAGE_RATE, settings.THROTTLE_MESSAGE_BURST),
+			"callback_query": (settings.THROTTLE_CALLBACK_RATE, settings.THROTTLE_CALLBACK_BURST),
+		}
+		for event_type, (rate, burst) in budgets.items():
+			if rate > 0:
+				self.limiters[event_type] = TokenBuckets(rate, burst, settings.THROTTLE_MAX_USERS)
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: Update,
+		data: Dict[str, Any]
+	) -> Any:
+		limiter = self.limiters.get(event.event_type)
+		user = data.get("event_from_user")
+		if limiter is None or user is None or user.id == settings.TELEGRAM_ADMIN_ID:
+			return await handler(event, data)
+
+		if not limiter.allow(user.id):
+			metrics.observe_throttled(event.event_type)
+			log.debug("Обновление {} от {} отброшено ограничением частоты", event.event_type, user.id)
+			if event.callback_query is not None:
+				await event.callback_query.answer(THROTTLED_CALLBACK)
+			return None
+		return await handler(event, data)
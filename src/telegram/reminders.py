@@ -0,0 +1,49 @@
+from datetime import date, datetime, timedelta
+
+from src.core.config import settings
+from src.core.dto import MessageAddDTO
+from src.core.logger import log
+from src.db.database import unit_of_work, after_transaction
+from src.db.repositories import user_repo, messages_repo
+from src.telegram.broadcast import BroadcastWorker
+from src.telegram.interface import EXPIRY_SOON, EXPIRY_PASSED
+
+
+async def notify_expiring_subscriptions(broadcast_worker: BroadcastWorker):
+	"""Ставит в очередь рассылки напоминания пользователям, у которых подписка скоро закончится
+	или только что закончилась. Каждый пользователь предупреждается один раз на каждую дату окончания"""
+	today = date.today()
+	date_from = today - timedelta(days=settings.EXPIRY_GRACE_DAYS)
+	date_to = today + timedelta(days=settings.EXPIRY_REMIND_DAYS)
+	log.debug("Поиск подписок, заканчивающихся с {} по {}", date_from, date_to)
+
+	queued = 0
+	after = None
+	while True:
+		# Пачка напоминаний и отметка об отправке - в одной транзакции, чтобы не было ни дублей, ни пропусков
+		async with unit_of_work():
+			users = await user_repo.get_expiring(date_from, date_to, after=after, limit=settings.EXPIRY_BATCH_SIZE)
+			if not users:
+				break
+
+			now = datetime.now()
+			messages = [
+				MessageAddDTO(
+					recipient=user.id,
+					text=(EXPIRY_SOON if user.billing_end_date >= today else EXPIRY_PASSED).format(
+						end_date=user.billing_end_date.strftime("%d.%m.%Y")
+					),
+					created_at=now,
+					updated_at=now
+				)
+				for user in users
+			]
+			await messages_repo.add_many(messages)
+			await user_repo.mark_expiry_notified([user.id for user in users])
+			after_transaction(broadcast_worker.wake)
+
+		queued += len(users)
+		after = (users[-1].billing_end_date, users[-1].id)
+
+	if queued:
+		log.info(f"Поставлено в очередь напоминаний об окончании подписки: {queued}")
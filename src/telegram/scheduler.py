@@ -0,0 +1,43 @@
+import asyncio
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+from src.core.logger import log
+
+
+class Scheduler:
+	"""Простой планировщик периодических задач внутри процесса бота.
+
+	Каждая задача выполняется в своей asyncio-задаче: сразу после запуска и затем раз в interval секунд.
+	Ошибка в задаче логируется и не останавливает следующие запуски."""
+
+	def __init__(self):
+		self._jobs: list[tuple[str, Callable[[], Awaitable[None]], float]] = []
+		self._tasks: list[asyncio.Task] = []
+
+	def add_job(self, name: str, job: Callable[[], Awaitable[None]], interval: float):
+		self._jobs.append((name, job, interval))
+
+	def start(self):
+		if self._tasks:
+			return
+		for name, job, interval in self._jobs:
+			log.info(f"Запуск периодической задачи '{name}' (каждые {interval} сек)")
+			self._tasks.append(asyncio.create_task(self._loop(name, job, interval), name=f"job-{name}"))
+
+	async def stop(self):
+		for task in self._tasks:
+			task.cancel()
+		for task in self._tasks:
+			with suppress(asyncio.CancelledError):
+				await task
+		self._tasks.clear()
+
+	@staticmethod
+	async def _loop(name: str, job: Callable[[], Awaitable[None]], interval: float):
+		while True:
+			try:
+				await job()
+			except Exception as e:
+				log.error(f"Ошибка в периодической задаче '{name}': {e}")
+			await asyncio.sleep(interval)
@@ -0,0 +1,116 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType, KeyBuilder, DefaultKeyBuilder
+
+from src.core.dto import FSMStateAddDTO
+from src.core.logger import log
+from src.core.metrics import metrics
+from src.db.cache import TTLCache
+from src.db.database import unit_of_work, before_commit
+from src.db.repositories import fsm_state_repo
+
+# Запись хранилища: (состояние, данные)
+Record = tuple[str | None, dict[str, Any]]
+
+# Изменения, накопленные за обработку текущего обновления (None - вне coalesce(), пишем сразу)
+_pending: ContextVar[dict[str, Record] | None] = ContextVar("fsm_pending", default=None)
+
+
+class SQLiteStorage(BaseStorage):
+	"""Хранилище FSM в таблице fsm_states базы бота: незавершённые диалоги переживают перезапуск.
+
+	Чтение идёт через ограниченный кэш в памяти. Внутри coalesce() все set_state/set_data/update_data
+	одного обновления только меняют кэш, а в БД записываются одной операцией в транзакции обновления
+	перед её коммитом (в том числе досрочным - перед запросом к Bot API).
+	Кэш не сбрасывается между процессами, поэтому он допустим только при одном процессе бота
+	(при cache_size=0 состояния всегда читаются из базы, изменения внутри обновления - из coalesce())"""
+
+	def __init__(self, cache_size: int, cache_ttl: float, key_builder: KeyBuilder | None = None):
+		self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+		self.cache = TTLCache(cache_size, cache_ttl)
+		metrics.register_cache("fsm_states", self.cache.stats)
+
+	@asynccontextmanager
+	async def coalesce(self):
+		pending: dict[str, Record] = {}
+		written: set[str] = set()
+
+		async def flush():
+			if pending:
+				records = pending.copy()
+				pending.clear()
+				written.update(records)
+				await self._write(records)
+
+		token = _pending.set(pending)
+		try:
+			# Внутри единицы работы обновления (DbSessionMiddleware) - её же транзакция
+			async with unit_of_work():
+				before_commit(flush)
+				yield
+		except BaseException:
+			# Изменения могли не сохраниться - кэш не должен их помнить
+			for key in written | pending.keys():
+				self.cache.invalidate(key)
+			raise
+		finally:
+			_pending.reset(token)
+
+	async def _load(self, key: str) -> Record:
+		pending = _pending.get()
+		if pending is not None and key in pending:
+			return pending[key]
+
+		found, record = self.cache.get(key)
+		if found:
+			return record
+
+		dto = await fsm_state_repo.get_by_id(key)
+		record = (dto.state, dto.data) if dto else (None, {})
+		self.cache.set(key, record)
+		return record
+
+	async def _put(self, key: str, record: Record, current: Record):
+		# state.clear() нового пользователя и повторная установка того же состояния ничего не пишут
+		if record == current:
+			return
+		self.cache.set(key, record)
+		pending = _pending.get()
+		if pending is not None:
+			pending[key] = record
+		else:
+			await self._write({key: record})
+
+	@staticmethod
+	async def _write(records: dict[str, Record]):
+		log.debug("Сохранение состояний FSM: {}", len(records))
+		now = datetime.now()
+		await fsm_state_repo.save_many([
+			FSMStateAddDTO(id=key, state=state, data=data, updated_at=now)
+			for key, (state, data) in records.items()
+		])
+
+	async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+		storage_key = self.key_builder.build(key)
+		current = await self._load(storage_key)
+		await self._put(storage_key, (state.state if isinstance(state, State) else state, current[1]), current)
+
+	async def get_state(self, key: StorageKey) -> str | None:
+		state, _ = await self._load(self.key_builder.build(key))
+		return state
+
+	async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+		storage_key = self.key_builder.build(key)
+		current = await self._load(storage_key)
+		await self._put(storage_key, (current[0], dict(data)), current)
+
+	async def get_data(self, key: StorageKey) -> dict[str, Any]:
+		_, data = await self._load(self.key_builder.build(key))
+		return data.copy()
+
+	async def close(self) -> None:
+		self.cache.clear()
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Hashable
+
+
+class TokenBuckets:
+	"""Token bucket на каждый ключ (ID пользователя): до burst событий подряд, дальше - rate в секунду.
+
+	Корзины хранятся в порядке последнего обращения. Корзина, простоявшая burst / rate секунд, снова
+	полна и ничем не отличается от отсутствующей, поэтому такие записи удаляются с начала очереди
+	при каждом обращении. Число записей дополнительно ограничено maxsize: при переполнении удаляется
+	самая давняя (её владелец получает полную корзину - ошибка в сторону пропуска, а не блокировки)"""
+
+	def __init__(self, rate: float, burst: int, maxsize: int):
+		self.rate = rate
+		self.burst = burst
+		self.maxsize = maxsize
+		self.idle = burst / rate
+		self._buckets: OrderedDict[Hashable, list[float]] = OrderedDict()  # ключ -> [токены, время]
+		self.evictions = 0
+
+	def __len__(self) -> int:
+		return len(self._buckets)
+
+	def _evict(self, now: float):
+		buckets = self._buckets
+		while buckets:
+			_, updated_at = next(iter(buckets.values()))
+			if now - updated_at < self.idle and len(buckets) < self.maxsize:
+				break
+			buckets.popitem(last=False)
+			self.evictions += 1
+
+	def allow(self, key: Hashable) -> bool:
+		"""Списывает токен. False - бюджет ключа исчерпан"""
+		now = monotonic()
+		self._evict(now)
+		bucket = self._buckets.get(key)
+		if bucket is None:
+			bucket = self._buckets[key] = [float(self.burst), now]
+		else:
+			bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+			bucket[1] = now
+			self._buckets.move_to_end(key)
+
+		if bucket[0] < 1:
+			return False
+		bucket[0] -= 1
+		return True
@@ -0,0 +1,29 @@
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from src.core.config import settings
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+	"""Собирает aiohttp-приложение, принимающее обновления от Telegram.
+
+	Обновление подтверждается ответом 200 сразу после чтения тела, а обрабатывается в фоновой задаче,
+	поэтому Telegram не ждёт хэндлеры. Запросы без верного секрета отклоняются (401),
+	тело больше WEBHOOK_MAX_BODY_SIZE - отклоняется aiohttp (413).
+
+	Локально можно проверить, отправив сохранённое обновление:
+		curl -X POST -H 'Content-Type: application/json' \\
+		     -H 'X-Telegram-Bot-Api-Secret-Token: <WEBHOOK_SECRET>' \\
+		     --data @update.json http://127.0.0.1:8080/webhook
+	"""
+	app = web.Application(client_max_size=settings.WEBHOOK_MAX_BODY_SIZE)
+	SimpleRequestHandler(
+		dispatcher=dp,
+		bot=bot,
+		handle_in_background=True,
+		secret_token=settings.WEBHOOK_SECRET
+	).register(app, path=settings.WEBHOOK_PATH)
+	# Запуск и остановка приложения вызывают dp.startup / dp.shutdown, как и при polling
+	setup_application(app, dp, bot=bot)
+	return app
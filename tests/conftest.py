@@ -0,0 +1,16 @@
+# tests/conftest.py
+#
+# Настройки читаются из окружения при первом обращении, поэтому задаются до импорта модулей проекта.
+# Все тесты процесса работают с одной временной базой: движок создаётся один раз.
+
+import os
+import tempfile
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix="vpn-test-"), "test.db")
+os.environ["DB_PATH"] = DB_FILE
+os.environ.setdefault("APP_NAME", "test")
+os.environ.setdefault("APP_VERSION", "0")
+os.environ.setdefault("TELEGRAM_TOKEN", "0:test")
+os.environ.setdefault("TELEGRAM_ADMIN_ID", "0")
+os.environ["LOG_CONSOLE"] = "false"
+os.environ["LOG_PATH"] = ""
@@ -0,0 +1,47 @@
+# tests/test_admin_metrics.py
+#
+# /metrics: отчёт экранируется до проверки длины, а не помещающийся в сообщение Telegram
+# отправляется файлом целиком.
+
+import asyncio
+
+from aiogram import Bot
+
+from benchmarks.fake_bot import FakeSession, message_update
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.telegram.handlers.admin import cmd_metrics, MESSAGE_MAX_LENGTH
+
+
+class RecordingSession(FakeSession):
+	def __init__(self):
+		super().__init__()
+		self.methods = []
+
+	async def make_request(self, bot, method, timeout=None):
+		self.methods.append(method)
+		return await super().make_request(bot, method, timeout)
+
+
+def send_metrics() -> list:
+	session = RecordingSession()
+	bot = Bot(token="42:test", session=session)
+	message = message_update(1, settings.TELEGRAM_ADMIN_ID, "/metrics").message.as_(bot)
+	asyncio.run(cmd_metrics(message))
+	return session.methods
+
+
+def test_metrics_report_is_escaped_and_sent_whole():
+	# Имена вроде <lambda> при экранировании становятся длиннее
+	metrics.observe_update("<lambda>", 0.01, False, 1, 0.001)
+	(short,) = send_metrics()
+	assert type(short).__name__ == "SendMessage"
+	assert "&lt;lambda&gt;" in short.text and len(short.text) <= MESSAGE_MAX_LENGTH
+
+	for number in range(60):
+		metrics.observe_update(f"<handler_{number}>", 0.01, False, 1, 0.001)
+	(long,) = send_metrics()
+	assert type(long).__name__ == "SendDocument"
+	report = long.document.data.decode()
+	assert report == metrics.render_text()
+	assert "<handler_59>" in report
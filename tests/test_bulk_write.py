@@ -0,0 +1,77 @@
+# tests/test_bulk_write.py
+#
+# add_many/upsert_many: пачка с конфликтующей строкой повторяется построчно (остальные строки
+# записываются, конфликт попадает в errors), upsert обновляет существующие записи по ID.
+
+import asyncio
+
+import pytest
+
+from src.core.dto import RegistrationAddDTO
+from src.db.database import init_db, unit_of_work
+from src.db.repositories import registration_repo
+
+# Не пересекаются с ID из других тестов
+FIRST_ID = 50_000_000
+
+
+def registrations(first_id: int, count: int, name: str = "bulk") -> list[RegistrationAddDTO]:
+	return [RegistrationAddDTO(id=record_id, name=f"{name}{record_id}") for record_id in range(first_id, first_id + count)]
+
+
+async def names(first_id: int, count: int) -> dict[int, str | None]:
+	found = await registration_repo.get_many_by_ids(range(first_id, first_id + count))
+	return {record.id: record.name for record in found}
+
+
+def test_add_many_reports_conflicting_row_and_keeps_the_rest():
+	first_id = FIRST_ID
+	conflict_id = first_id + 7
+
+	async def scenario():
+		await init_db()
+		await registration_repo.add(RegistrationAddDTO(id=conflict_id, name="existing"))
+		# 12 строк пачками по 5: конфликт во второй пачке, первая и третья пишутся целиком
+		result = await registration_repo.add_many(registrations(first_id, 12), chunk_size=5)
+		return result, await names(first_id, 12)
+
+	result, saved = asyncio.run(scenario())
+	assert sorted(result.inserted_ids) == [record_id for record_id in range(first_id, first_id + 12)
+	                                       if record_id != conflict_id]
+	assert list(result.errors) == [7]
+	assert "UNIQUE" in result.errors[7]
+	assert saved[conflict_id] == "existing"
+	assert len(saved) == 12
+
+
+def test_upsert_many_updates_existing_rows():
+	first_id = FIRST_ID + 1_000
+
+	async def scenario():
+		await init_db()
+		await registration_repo.add_many(registrations(first_id, 3, name="old"))
+		count_before = await registration_repo.count()
+		# Две существующие записи и две новые
+		result = await registration_repo.upsert_many(registrations(first_id + 1, 4, name="new"), chunk_size=3)
+		return result, count_before, await registration_repo.count(), await names(first_id, 5)
+
+	result, count_before, count_after, saved = asyncio.run(scenario())
+	assert sorted(result.inserted_ids) == list(range(first_id + 1, first_id + 5))
+	assert result.errors == {}
+	assert count_after == count_before + 2
+	assert saved == {first_id: f"old{first_id}", **{record_id: f"new{record_id}"
+	                                                 for record_id in range(first_id + 1, first_id + 5)}}
+
+
+def test_add_many_rolls_back_with_outer_unit_of_work():
+	first_id = FIRST_ID + 2_000
+
+	async def scenario():
+		await init_db()
+		with pytest.raises(RuntimeError):
+			async with unit_of_work():
+				await registration_repo.add_many(registrations(first_id, 10), chunk_size=3)
+				raise RuntimeError("ошибка после записи")
+		return await names(first_id, 10)
+
+	assert asyncio.run(scenario()) == {}
@@ -0,0 +1,41 @@
+# tests/test_database.py
+#
+# Единица работы: досрочный коммит (перед запросом к Bot API) освобождает блокировку записи SQLite,
+# а ошибка после него откатывает только последующие изменения.
+
+import asyncio
+import contextvars
+
+import pytest
+
+from src.core.dto import RegistrationAddDTO
+from src.db.database import init_db, unit_of_work, commit_early
+from src.db.repositories import registration_repo
+
+# Не пересекаются с ID из других тестов
+FIRST_ID = 30_000_000
+
+
+def test_commit_early_releases_write_lock():
+	async def concurrent_add(registration_id: int):
+		# Другое обновление: своя единица работы в пустом контексте
+		task = asyncio.create_task(registration_repo.add(RegistrationAddDTO(id=registration_id, name="other")),
+		                           context=contextvars.Context())
+		return await asyncio.wait_for(task, 1)
+
+	async def scenario():
+		await init_db()
+		with pytest.raises(RuntimeError):
+			async with unit_of_work():
+				await registration_repo.add(RegistrationAddDTO(id=FIRST_ID, name="committed"))
+				await commit_early()
+				other_id = await concurrent_add(FIRST_ID + 1)
+				await registration_repo.add(RegistrationAddDTO(id=FIRST_ID + 2, name="rolled back"))
+				raise RuntimeError("ошибка хэндлера")
+		found = [await registration_repo.get_by_id(FIRST_ID + offset) for offset in range(3)]
+		return other_id, found
+
+	other_id, (committed, other, rolled_back) = asyncio.run(scenario())
+	assert other_id == FIRST_ID + 1
+	assert committed is not None and other is not None
+	assert rolled_back is None
@@ -0,0 +1,123 @@
+# tests/test_importer.py
+#
+# Импорт CSV: выгрузка транзакций из /export (со столбцом id) импортируется обратно без задвоения
+# платежей, изменённые строки обновляются по ID вместе с балансами; ошибки строк попадают в отчёт с номерами строк файла.
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.core.dto import TransactionAddDTO
+from src.db.database import init_db, unit_of_work
+from src.db.orm import BalanceORM
+from src.db.repositories import billing_repo
+from src.telegram.export import export_csv
+from src.telegram.importer import CSVImport
+
+# Не пересекаются с ID из других тестов
+USER_A = 80_000_001
+USER_B = 80_000_002
+
+
+def run_import(data: str) -> CSVImport:
+	job = CSVImport(io.BytesIO(data.encode()))
+
+	async def scenario():
+		await init_db()
+		await job.run()
+
+	asyncio.run(scenario())
+	return job
+
+
+def transactions_export() -> str:
+	async def scenario():
+		await init_db()
+		file, _ = await export_csv(billing_repo)
+		with file:
+			file.seek(0)
+			return file.read().decode("utf-8-sig")
+
+	return asyncio.run(scenario())
+
+
+async def ledger(user_ids: list[int]) -> dict[int, tuple[int, int]]:
+	async with unit_of_work() as session:
+		rows = await session.execute(
+			select(BalanceORM.id, BalanceORM.total_paid, BalanceORM.tx_count).where(BalanceORM.id.in_(user_ids))
+		)
+		return {user_id: (total, count) for user_id, total, count in rows if count}
+
+
+def add_payments(payments: list[tuple[int, int]]) -> list[int]:
+	async def scenario():
+		await init_db()
+		created_at = datetime(2026, 4, 1, 12, 0)
+		return [await billing_repo.add(TransactionAddDTO(user_id=user_id, amount=amount,
+		                                                 created_at=created_at, updated_at=created_at))
+		        for user_id, amount in payments]
+
+	return asyncio.run(scenario())
+
+
+def test_transactions_export_round_trip():
+	add_payments([(USER_A, 100), (USER_A, 40), (USER_B, 70)])
+
+	async def snapshot():
+		await init_db()
+		return await billing_repo.count(), await ledger([USER_A, USER_B])
+
+	before = asyncio.run(snapshot())
+	data = transactions_export()
+	job = run_import(data)
+	assert job.table == "transactions"
+	assert job.error_count == 0
+	assert job.rows == job.inserted == before[0]
+	# Повторный импорт выгрузки не задваивает платежи и балансы
+	assert asyncio.run(snapshot()) == before
+	assert transactions_export() == data
+
+
+def test_transactions_import_updates_rows_by_id():
+	moved_id, kept_id = add_payments([(USER_A + 10, 100), (USER_A + 10, 40)])
+	users = [USER_A + 10, USER_B + 10]
+	data = transactions_export()
+
+	# В выгрузке первой транзакции меняются сумма и пользователь
+	reader = csv.DictReader(io.StringIO(data))
+	rows = [row for row in reader if int(row["id"]) in (moved_id, kept_id)]
+	for row in rows:
+		if int(row["id"]) == moved_id:
+			row.update(user_id=str(users[1]), amount="250")
+	output = io.StringIO()
+	writer = csv.DictWriter(output, fieldnames=reader.fieldnames)
+	writer.writeheader()
+	writer.writerows(rows)
+
+	job = run_import(output.getvalue())
+	assert (job.rows, job.inserted, job.error_count) == (2, 2, 0)
+
+	async def saved():
+		await init_db()
+		moved = await billing_repo.get_by_id(moved_id)
+		return (moved.user_id, moved.amount), await ledger(users)
+
+	moved, balances = asyncio.run(saved())
+	assert moved == (users[1], 250)
+	assert balances == {users[0]: (40, 1), users[1]: (250, 1)}
+
+
+def test_row_errors_are_reported_with_line_numbers():
+	job = run_import(
+		"id,name,billing_start_date,billing_end_date,blocked\n"
+		"20000001,import1,2026-01-01,2026-02-01,0\n"
+		"20000002,import2,not-a-date,2026-02-01,0\n"
+		"20000003,short\n"
+		"20000001,import3,2026-01-01,2026-02-01,0\n"
+	)
+	assert job.table == "users"
+	assert (job.rows, job.inserted, job.error_count) == (4, 1, 3)
+	assert [line for line, _ in sorted(job.errors)] == [3, 4, 5]
@@ -0,0 +1,105 @@
+# tests/test_ledger.py
+#
+# Таблица balances должна совпадать с агрегатами по transactions после любых изменений транзакций
+# (добавление, смена суммы и пользователя, удаление, массовая запись), а rebuild_balances - чинить
+# расхождение. На ней держится get_stats, поэтому ошибка здесь была бы незаметна.
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select, func, update
+
+from src.core.dto import TransactionAddDTO, TransactionUpdateDTO
+from src.db.database import init_db, unit_of_work
+from src.db.orm import BalanceORM, TransactionORM
+from src.db.repositories import billing_repo
+
+# Не пересекаются с ID из других тестов
+USER_A = 70_000_001
+USER_B = 70_000_002
+USER_C = 70_000_003
+
+
+def payment(user_id: int, amount: int, day: int) -> TransactionAddDTO:
+	created_at = datetime(2026, 3, day, 12, 0)
+	return TransactionAddDTO(user_id=user_id, amount=amount, created_at=created_at, updated_at=created_at)
+
+
+async def ledger_and_expected(user_ids: list[int]) -> tuple[dict, dict]:
+	async with unit_of_work() as session:
+		balances = await session.execute(
+			select(BalanceORM.id, BalanceORM.total_paid, BalanceORM.tx_count, BalanceORM.last_payment_at)
+			.where(BalanceORM.id.in_(user_ids))
+		)
+		totals = await session.execute(
+			select(TransactionORM.user_id, func.sum(TransactionORM.amount), func.count(),
+			       func.max(TransactionORM.created_at))
+			.where(TransactionORM.user_id.in_(user_ids))
+			.group_by(TransactionORM.user_id)
+		)
+		# Пользователь без транзакций может остаться в balances с нулевыми итогами
+		ledger = {user_id: (total, count, last) for user_id, total, count, last in balances if count}
+		expected = {user_id: (total, count, last) for user_id, total, count, last in totals}
+	return ledger, expected
+
+
+async def stats_and_expected():
+	stats = await billing_repo.get_stats()
+	async with unit_of_work() as session:
+		count, amount = (await session.execute(
+			select(func.count(), func.coalesce(func.sum(TransactionORM.amount), 0))
+		)).one()
+	return (stats.count, stats.amount), (count, amount)
+
+
+def test_ledger_follows_transaction_changes():
+	users = [USER_A, USER_B, USER_C]
+
+	async def scenario():
+		await init_db()
+		checks = {}
+		first = await billing_repo.add(payment(USER_A, 100, 1))
+		second = await billing_repo.add(payment(USER_A, 50, 3))
+		third = await billing_repo.add(payment(USER_B, 30, 2))
+		checks["add"] = await ledger_and_expected(users)
+
+		await billing_repo.update(first, TransactionUpdateDTO(amount=250))
+		checks["update amount"] = await ledger_and_expected(users)
+
+		await billing_repo.update(second, TransactionUpdateDTO(user_id=USER_B))
+		checks["update user"] = await ledger_and_expected(users)
+
+		await billing_repo.delete(third)
+		checks["delete"] = await ledger_and_expected(users)
+
+		await billing_repo.add_many([payment(USER_C, 10, day) for day in range(1, 6)] + [payment(USER_A, 5, 9)])
+		checks["add_many"] = await ledger_and_expected(users)
+		return checks, await stats_and_expected()
+
+	checks, (stats, expected_stats) = asyncio.run(scenario())
+	for step, (ledger, expected) in checks.items():
+		assert ledger == expected, step
+	assert stats == expected_stats
+
+
+def test_rebuild_balances_repairs_drift():
+	users = [USER_A + 10, USER_B + 10]
+
+	async def scenario():
+		await init_db()
+		for day, user_id in enumerate(users * 2, start=1):
+			await billing_repo.add(payment(user_id, 100 * day, day))
+
+		# Расхождение: итоги испорчены, у второго пользователя строки нет вовсе
+		async with unit_of_work() as session:
+			await session.execute(update(BalanceORM).where(BalanceORM.id == users[0]).values(total_paid=1, tx_count=9))
+			await session.execute(BalanceORM.__table__.delete().where(BalanceORM.id == users[1]))
+		drifted = await ledger_and_expected(users)
+
+		await billing_repo.rebuild_balances()
+		return drifted, await ledger_and_expected(users), await stats_and_expected()
+
+	(drifted, drifted_expected), (ledger, expected), (stats, expected_stats) = asyncio.run(scenario())
+	assert drifted != drifted_expected
+	assert ledger == expected
+	assert stats == expected_stats
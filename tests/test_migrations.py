@@ -0,0 +1,64 @@
+# tests/test_migrations.py
+#
+# Обновление базы, созданной исходной версией бота (до схемы с версиями), до текущей схемы.
+# Отдельный файл и движок: общая база тестов к этому моменту может быть уже создана.
+
+import asyncio
+import sqlite3
+
+from src.core.config import Settings
+from src.db.database import build_engine, init_db
+from src.db.migrations import SCHEMA_VERSION
+from src.db.orm import Base
+
+# Схема исходной версии: четыре таблицы без индексов и без таблицы версий
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+	id BIGINT NOT NULL, name VARCHAR(25) NOT NULL, billing_start_date DATE NOT NULL,
+	billing_end_date DATE NOT NULL, blocked BOOLEAN NOT NULL, PRIMARY KEY (id)
+);
+CREATE TABLE registration (
+	id BIGINT NOT NULL, name VARCHAR(25) NOT NULL, requested_at DATETIME NOT NULL, PRIMARY KEY (id)
+);
+CREATE TABLE transactions (
+	id INTEGER NOT NULL, user_id BIGINT NOT NULL, amount INTEGER NOT NULL, created_at DATE NOT NULL,
+	updated_at DATE NOT NULL, PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE messages (
+	id INTEGER NOT NULL, recipient BIGINT NOT NULL, text VARCHAR(250) NOT NULL, created_at DATE NOT NULL,
+	updated_at DATE NOT NULL, PRIMARY KEY (id), FOREIGN KEY(recipient) REFERENCES users (id)
+);
+INSERT INTO users VALUES (1, 'Alice', '2026-01-01', '2026-02-01', 0), (2, 'Bob', '2026-01-01', '2099-01-01', 1);
+INSERT INTO transactions (user_id, amount, created_at, updated_at) VALUES
+	(1, 100, '2026-01-01', '2026-01-01'), (1, 250, '2026-01-15', '2026-01-15'), (2, 300, '2026-01-10', '2026-01-10');
+INSERT INTO messages (recipient, text, created_at, updated_at) VALUES (1, 'hello', '2026-01-01', '2026-01-01');
+"""
+
+
+def test_upgrade_baseline_database(tmp_path):
+	db_file = str(tmp_path / "baseline.db")
+	with sqlite3.connect(db_file) as conn:
+		conn.executescript(BASELINE_SCHEMA)
+
+	async def upgrade():
+		engine = build_engine(Settings(DB_PATH=db_file))
+		try:
+			await init_db(engine)
+		finally:
+			await engine.dispose()
+
+	asyncio.run(upgrade())
+
+	with sqlite3.connect(db_file) as conn:
+		version = conn.execute("SELECT version FROM schema_version").fetchone()[0]
+		indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+		name_key = conn.execute("SELECT name_key FROM users WHERE id = 1").fetchone()[0]
+		balance = conn.execute("SELECT total_paid, tx_count FROM balances WHERE id = 1").fetchone()
+		message_status = conn.execute("SELECT status FROM messages").fetchone()[0]
+
+	assert version == SCHEMA_VERSION
+	for table in Base.metadata.sorted_tables:
+		assert {index.name for index in table.indexes} <= indexes
+	assert name_key == "alice"
+	assert balance == (350, 2)
+	assert message_status is None  # Старые сообщения в очередь рассылки не попадают
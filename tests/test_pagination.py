@@ -0,0 +1,85 @@
+# tests/test_pagination.py
+#
+# Keyset-пагинация списков: границы страниц вперёд и назад, последняя неполная страница, пустая
+# таблица, а также разбор callback_data кнопок навигации (повреждённые данные - первая страница).
+
+import asyncio
+
+import pytest
+from sqlalchemy import delete
+
+from src.core.dto import RegistrationAddDTO
+from src.db.database import init_db, unit_of_work
+from src.db.orm import RegistrationORM
+from src.db.repositories import registration_repo
+from src.telegram.keyboards import pagination_keyboard, parse_page_callback
+
+
+class Rollback(Exception):
+	pass
+
+
+def run_on_table(ids: list[int], scenario):
+	"""Выполняет scenario на таблице registration, где есть только ids, и откатывает изменения"""
+	results = []
+
+	async def main():
+		await init_db()
+		with pytest.raises(Rollback):
+			async with unit_of_work() as session:
+				await session.execute(delete(RegistrationORM))
+				for record_id in ids:
+					await registration_repo.add(RegistrationAddDTO(id=record_id, name=f"page{record_id}"))
+				results.append(await scenario())
+				raise Rollback
+
+	asyncio.run(main())
+	return results[0]
+
+
+def page_ids(records) -> list[int]:
+	return [record.id for record in records]
+
+
+def test_keyset_pages_forward_and_back():
+	async def scenario():
+		return {
+			"first": page_ids(await registration_repo.get_page(limit=2)),
+			"second": page_ids(await registration_repo.get_page(after_id=20, limit=2)),
+			"last": page_ids(await registration_repo.get_page(after_id=40, limit=2)),
+			"past_end": page_ids(await registration_repo.get_page(after_id=50, limit=2)),
+			"back": page_ids(await registration_repo.get_page(before_id=30, limit=2)),
+			"back_short": page_ids(await registration_repo.get_page(before_id=20, limit=2)),
+			"before_start": page_ids(await registration_repo.get_page(before_id=10, limit=2)),
+		}
+
+	pages = run_on_table([10, 20, 30, 40, 50], scenario)
+	assert pages == {
+		"first": [10, 20],
+		"second": [30, 40],
+		"last": [50],
+		"past_end": [],
+		"back": [10, 20],
+		"back_short": [10],
+		"before_start": [],
+	}
+
+
+def test_empty_table():
+	async def scenario():
+		return await registration_repo.get_page(limit=2), await registration_repo.count()
+
+	assert run_on_table([], scenario) == ([], 0)
+
+
+def test_navigation_callbacks_round_trip():
+	keyboard = pagination_keyboard("user_list", 11, 30, has_prev=True, has_next=True, back="user_control")
+	prev_button, next_button = keyboard.inline_keyboard[0]
+	assert parse_page_callback(prev_button.callback_data) == (None, 11)
+	assert parse_page_callback(next_button.callback_data) == (30, None)
+	assert parse_page_callback("user_list") == (None, None)
+
+
+@pytest.mark.parametrize("data", ["user_list_next_", "user_list_next_abc", "tx_list_prev_1.5", "user_list_prev_None"])
+def test_malformed_callback_opens_first_page(data):
+	assert parse_page_callback(data) == (None, None)
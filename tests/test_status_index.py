@@ -0,0 +1,48 @@
+# tests/test_status_index.py
+#
+# Индекс статусов против прямого подсчёта по тем же данным: после произвольных добавлений,
+# изменений и удалений совпадают и счётчики, и список истёкших (порядок и страницы).
+
+import random
+from datetime import date, timedelta
+
+from src.db.status_index import StatusIndex
+
+TODAY = date(2026, 1, 15)
+
+
+def expected_expired(users: dict[int, tuple[date, bool]]) -> list[int]:
+	expired = [(end_date, user_id) for user_id, (end_date, blocked) in users.items() if not blocked and end_date < TODAY]
+	return [user_id for _, user_id in sorted(expired, reverse=True)]
+
+
+def test_index_matches_brute_force():
+	rng = random.Random(1)
+	index = StatusIndex()
+	users: dict[int, tuple[date, bool]] = {}
+	rows = sorted(((user_id, TODAY + timedelta(days=rng.randint(-5, 5)), rng.random() < 0.1)
+	               for user_id in range(200)), key=lambda row: (row[1], row[0]))
+	index.load(rows, index.begin_load())
+	users.update({user_id: (end_date, blocked) for user_id, end_date, blocked in rows})
+
+	for _ in range(2000):
+		user_id = rng.randrange(300)
+		if rng.random() < 0.3:
+			index.remove(user_id)
+			users.pop(user_id, None)
+		else:
+			end_date, blocked = TODAY + timedelta(days=rng.randint(-5, 5)), rng.random() < 0.1
+			index.put(user_id, end_date, blocked)
+			users[user_id] = (end_date, blocked)
+
+	expired = expected_expired(users)
+	stats = index.stats(TODAY)
+	assert stats.total == len(users)
+	assert stats.blocked == sum(blocked for _, blocked in users.values())
+	assert stats.expired == len(expired)
+	assert stats.active == stats.total - stats.blocked - stats.expired
+
+	assert index.expired_ids(TODAY) == expired
+	pages = [index.expired_ids(TODAY, offset, 7) for offset in range(0, len(expired) + 7, 7)]
+	assert [user_id for page in pages for user_id in page] == expired
+	assert index.expired_ids(TODAY, len(expired), 7) == []
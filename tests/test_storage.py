@@ -0,0 +1,85 @@
+# tests/test_storage.py
+#
+# Хранилище FSM в SQLite: состояния, изменённые одновременно обрабатываемыми обновлениями, должны
+# сохраниться в базе, даже когда хэндлеры читают и пишут в базу и ждут ответа Bot API.
+
+import asyncio
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Message
+
+from benchmarks.fake_bot import FakeSession, message_update
+from src.core.dto import RegistrationAddDTO
+from src.db.database import init_db
+from src.db.repositories import registration_repo
+from src.telegram.middlewares import setup_db_middlewares
+from src.telegram.storage import SQLiteStorage
+
+# Не пересекаются с ID из других тестов
+FIRST_ID = 40_000_000
+USERS = 50
+STEPS = 3
+API_DELAY = 0.2  # Время ответа Bot API, сек
+
+
+class Form(StatesGroup):
+	step = State()
+
+
+class SlowSession(FakeSession):
+	async def make_request(self, bot, method, timeout=None):
+		await asyncio.sleep(API_DELAY)
+		return await super().make_request(bot, method, timeout)
+
+
+router = Router()
+
+
+@router.message(F.text)
+async def remember_step(message: Message, state: FSMContext):
+	# Первый шаг пишет в базу, остальные читают: состояние FSM записывается после записи хэндлера
+	# в той же транзакции или после транзакции, где было только чтение
+	if message.text == "0":
+		await registration_repo.add(RegistrationAddDTO(id=message.from_user.id, name=message.text))
+	else:
+		await registration_repo.get_by_id(message.from_user.id)
+	await state.set_state(Form.step)
+	await state.update_data(step=int(message.text))
+	await message.answer("ok")
+
+
+def build_dispatcher(storage: SQLiteStorage, bot: Bot) -> Dispatcher:
+	dp = Dispatcher(storage=storage)
+	dp.include_router(router)
+	setup_db_middlewares(dp, bot)
+	return dp
+
+
+def test_fsm_states_persist_under_concurrent_updates():
+	async def play(dp: Dispatcher, bot: Bot, user_id: int):
+		for step in range(STEPS):
+			await dp.feed_update(bot, message_update(user_id * STEPS + step, user_id, str(step)))
+
+	async def scenario():
+		await init_db()
+		bot = Bot(token="42:test", session=SlowSession())
+		dp = build_dispatcher(SQLiteStorage(cache_size=1000, cache_ttl=600), bot)
+		user_ids = range(FIRST_ID, FIRST_ID + USERS)
+		await asyncio.gather(*(play(dp, bot, user_id) for user_id in user_ids))
+
+		# Без кэша: состояния читаются из базы
+		storage = SQLiteStorage(cache_size=0, cache_ttl=0)
+		saved = {}
+		for user_id in user_ids:
+			key = StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id)
+			saved[user_id] = (await storage.get_state(key), await storage.get_data(key))
+		registrations = [await registration_repo.get_by_id(user_id) for user_id in user_ids]
+		return saved, registrations
+
+	saved, registrations = asyncio.run(scenario())
+	expected = (Form.step.state, {"step": STEPS - 1})
+	assert saved == {user_id: expected for user_id in range(FIRST_ID, FIRST_ID + USERS)}
+	assert all(registration is not None for registration in registrations)
@@ -0,0 +1,105 @@
+# tests/test_throttling.py
+#
+# Token bucket на пользователя и ThrottlingMiddleware: лишние обновления не доходят до хэндлеров,
+# а на отброшенное нажатие кнопки бот всё равно отвечает (answerCallbackQuery).
+
+import asyncio
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import CallbackQuery, Message
+
+from benchmarks.fake_bot import FakeSession, callback_update, message_update
+from src.core.config import settings
+from src.telegram import throttling
+from src.telegram.interface import THROTTLED_CALLBACK
+from src.telegram.middlewares import ThrottlingMiddleware
+from src.telegram.throttling import TokenBuckets
+
+USER_ID = 60_000_000
+
+
+class Clock:
+	def __init__(self):
+		self.now = 1000.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def test_token_bucket_burst_and_refill(monkeypatch):
+	clock = Clock()
+	monkeypatch.setattr(throttling, "monotonic", clock)
+	buckets = TokenBuckets(rate=2, burst=3, maxsize=10)
+
+	assert [buckets.allow(1) for _ in range(4)] == [True, True, True, False]
+	assert buckets.allow(2)  # бюджеты пользователей независимы
+
+	clock.now += 0.5  # +1 токен
+	assert buckets.allow(1)
+	assert not buckets.allow(1)
+
+
+def test_token_bucket_evicts_idle_and_oldest(monkeypatch):
+	clock = Clock()
+	monkeypatch.setattr(throttling, "monotonic", clock)
+	buckets = TokenBuckets(rate=1, burst=2, maxsize=2)
+
+	buckets.allow(1)
+	buckets.allow(2)
+	buckets.allow(3)  # переполнение: удаляется самая давняя корзина
+	assert len(buckets) == 2 and buckets.evictions == 1
+
+	clock.now += buckets.idle  # корзины снова полны и не хранятся
+	buckets.allow(4)
+	assert len(buckets) == 1
+
+
+class RecordingSession(FakeSession):
+	def __init__(self):
+		super().__init__()
+		self.answers: list[str | None] = []
+
+	async def make_request(self, bot, method, timeout=None):
+		if type(method).__name__ == "AnswerCallbackQuery":
+			self.answers.append(method.text)
+		return await super().make_request(bot, method, timeout)
+
+
+def test_middleware_drops_excess_updates_and_answers_callbacks():
+	router = Router()
+	handled = {"message": 0, "callback_query": 0}
+
+	@router.message(F.text)
+	async def on_message(message: Message):
+		handled["message"] += 1
+
+	@router.callback_query()
+	async def on_callback(callback: CallbackQuery):
+		handled["callback_query"] += 1
+		await callback.answer()
+
+	async def scenario():
+		session = RecordingSession()
+		bot = Bot(token="42:test", session=session)
+		dp = Dispatcher()
+		dp.include_router(router)
+		dp.update.outer_middleware(ThrottlingMiddleware())
+
+		updates = 0
+		for _ in range(settings.THROTTLE_MESSAGE_BURST + 2):
+			updates += 1
+			await dp.feed_update(bot, message_update(updates, USER_ID, "text"))
+		for _ in range(settings.THROTTLE_CALLBACK_BURST + 2):
+			updates += 1
+			await dp.feed_update(bot, callback_update(updates, USER_ID, "button"))
+		# Администратор не ограничивается
+		for _ in range(settings.THROTTLE_MESSAGE_BURST + 2):
+			updates += 1
+			await dp.feed_update(bot, message_update(updates, settings.TELEGRAM_ADMIN_ID, "text"))
+		return session.answers
+
+	answers = asyncio.run(scenario())
+	assert handled["message"] == settings.THROTTLE_MESSAGE_BURST + settings.THROTTLE_MESSAGE_BURST + 2
+	assert handled["callback_query"] == settings.THROTTLE_CALLBACK_BURST
+	# Каждое нажатие получило ответ: от хэндлера или от ограничения частоты
+	assert answers == [None] * settings.THROTTLE_CALLBACK_BURST + [THROTTLED_CALLBACK] * 2
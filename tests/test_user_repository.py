@@ -0,0 +1,112 @@
+# tests/test_user_repository.py
+#
+# Кэш пользователей и индекс статусов должны совпадать с базой после записей, идущих параллельно
+# с чтением из другой сессии (например, импорт CSV и экран статистики).
+
+import asyncio
+import contextvars
+from datetime import date, timedelta
+
+from src.core.dto import UserAddDTO, UserUpdateDTO
+from sqlalchemy import select, not_
+
+from src.db.database import init_db, unit_of_work
+from src.db.orm import UserORM
+from src.db.repositories import user_repo
+
+# Не пересекаются с ID из других тестов
+FIRST_ID = 10_000_000
+
+
+def make_users(first_id: int, count: int) -> list[UserAddDTO]:
+	today = date.today()
+	return [
+		UserAddDTO(id=user_id, name=f"bulk{user_id}", billing_start_date=today,
+		           billing_end_date=today + timedelta(days=user_id % 7 - 3), blocked=user_id % 10 == 0)
+		for user_id in range(first_id, first_id + count)
+	]
+
+
+def test_status_index_after_concurrent_bulk_write():
+	async def scenario():
+		await init_db()
+		before = await user_repo.get_status_stats()
+
+		# Запись в своём контексте, без внешней единицы работы - как у фонового импорта
+		write = asyncio.create_task(user_repo.add_many(make_users(FIRST_ID, 20_000), chunk_size=5_000),
+		                            context=contextvars.Context())
+		while not write.done():
+			await user_repo.get_status_stats()
+			await asyncio.sleep(0)
+		result = await write
+
+		after = await user_repo.get_status_stats()
+		user_repo.status_index.mark_stale()
+		expected = await user_repo.get_status_stats()
+		return before, result, after, expected
+
+	before, result, after, expected = asyncio.run(scenario())
+
+	assert len(result.inserted_ids) == 20_000
+	assert after.total == before.total + 20_000
+	assert after == expected
+
+
+def test_user_cache_after_concurrent_add():
+	user = make_users(FIRST_ID + 100_000, 1)[0]
+
+	async def scenario():
+		await init_db()
+		write = asyncio.create_task(user_repo.add(user), context=contextvars.Context())
+		while not write.done():
+			await user_repo.get_by_id(user.id)
+			await asyncio.sleep(0)
+		await write
+		return await user_repo.get_by_id(user.id)
+
+	assert asyncio.run(scenario()).model_dump() == user.model_dump()
+
+
+def test_expired_ids_match_database():
+	async def scenario():
+		await init_db()
+		await user_repo.add_many(make_users(FIRST_ID + 200_000, 100))
+		await user_repo.update(FIRST_ID + 200_001, UserUpdateDTO(billing_end_date=date.today() - timedelta(days=30)))
+		await user_repo.delete(FIRST_ID + 200_002)
+		expired = await user_repo.get_expired_ids()
+		page = await user_repo.get_expired_ids(offset=5, limit=10)
+
+		async with unit_of_work() as session:
+			query = (
+				select(UserORM.id)
+				.where(not_(UserORM.blocked), UserORM.billing_end_date < date.today())
+				.order_by(UserORM.billing_end_date.desc(), UserORM.id.desc())
+			)
+			expected = list((await session.execute(query)).scalars())
+		return expired, page, expected
+
+	expired, page, expected = asyncio.run(scenario())
+	assert expired == expected
+	assert page == expected[5:15]
+
+
+def test_user_cache_ignores_reads_from_older_snapshot():
+	user = make_users(FIRST_ID + 300_000, 1)[0]
+
+	async def rename():
+		await user_repo.update(user.id, UserUpdateDTO(name="renamed"))
+
+	async def scenario():
+		await init_db()
+		await user_repo.add(user)
+		async with unit_of_work():
+			# Транзакция обновления уже читала базу, затем другое обновление переименовало пользователя
+			await user_repo.get_status_stats()
+			await user_repo.exists_by_name(user.name)
+			await asyncio.create_task(rename(), context=contextvars.Context())
+			stale = await user_repo.get_by_id(user.id)
+		return stale, await user_repo.get_by_id(user.id)
+
+	stale, fresh = asyncio.run(scenario())
+	assert stale.name == user.name  # снимок транзакции - до переименования
+	assert fresh.name == "renamed"
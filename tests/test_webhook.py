@@ -0,0 +1,92 @@
+# tests/test_webhook.py
+#
+# Приём обновлений через вебхук: запросы без верного секрета отклоняются, слишком большое тело -
+# 413, а обновление подтверждается сразу, не дожидаясь окончания обработки в фоне.
+
+import asyncio
+import json
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.fake_bot import FakeSession, message_update
+from src.core.config import get_settings, settings
+from src.telegram.webhook import build_webhook_app
+
+SECRET = "test-secret"
+MAX_BODY_SIZE = 4096
+
+
+def run_webhook(monkeypatch, scenario):
+	monkeypatch.setattr(get_settings(), "WEBHOOK_SECRET", SECRET)
+	monkeypatch.setattr(get_settings(), "WEBHOOK_MAX_BODY_SIZE", MAX_BODY_SIZE)
+
+	router = Router()
+	handled: list[str] = []
+	release = asyncio.Event()
+
+	@router.message(F.text)
+	async def slow_handler(message: Message):
+		await release.wait()
+		handled.append(message.text)
+
+	async def main():
+		dp = Dispatcher()
+		dp.include_router(router)
+		bot = Bot(token="42:test", session=FakeSession())
+		async with TestClient(TestServer(build_webhook_app(dp, bot))) as client:
+			return await scenario(client, handled, release)
+
+	return asyncio.run(main())
+
+
+def update_body(text: str = "hello") -> str:
+	return message_update(1, 1, text).model_dump_json(exclude_none=True)
+
+
+def test_rejects_missing_or_wrong_secret(monkeypatch):
+	async def scenario(client: TestClient, handled: list[str], release: asyncio.Event):
+		release.set()
+		statuses = []
+		for headers in ({}, {"X-Telegram-Bot-Api-Secret-Token": "wrong"}):
+			response = await client.post(settings.WEBHOOK_PATH, data=update_body(), headers=headers)
+			statuses.append(response.status)
+		await asyncio.sleep(0.05)
+		return statuses, handled
+
+	statuses, handled = run_webhook(monkeypatch, scenario)
+	assert statuses == [401, 401]
+	assert handled == []
+
+
+def test_rejects_oversized_body(monkeypatch):
+	async def scenario(client: TestClient, handled: list[str], release: asyncio.Event):
+		release.set()
+		body = update_body("x" * MAX_BODY_SIZE)
+		response = await client.post(settings.WEBHOOK_PATH, data=body,
+		                             headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+		return response.status, handled
+
+	status, handled = run_webhook(monkeypatch, scenario)
+	assert status == 413
+	assert handled == []
+
+
+def test_acks_before_background_handler_finishes(monkeypatch):
+	async def scenario(client: TestClient, handled: list[str], release: asyncio.Event):
+		response = await client.post(settings.WEBHOOK_PATH, data=update_body(),
+		                             headers={"X-Telegram-Bot-Api-Secret-Token": SECRET})
+		acked = response.status, json.loads(await response.text()), list(handled)
+		# Хэндлер ещё ждёт - ответ пришёл до окончания обработки
+		release.set()
+		for _ in range(100):
+			if handled:
+				break
+			await asyncio.sleep(0.01)
+		return acked, handled
+
+	(status, body, handled_at_ack), handled = run_webhook(monkeypatch, scenario)
+	assert status == 200 and body == {}
+	assert handled_at_ack == []
+	assert handled == ["hello"]